@@ -1,12 +1,191 @@
 from loguru import logger
+import atexit
+import json
+import os
+import queue
+import random
 import sys
+import threading
+import traceback
+from contextvars import ContextVar
+from typing import Dict, Optional, TextIO
+
+# 日志级别
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+# 日志输出格式：text 彩色文本（默认，适合本地开发）、json 每行一个JSON对象（适合日志采集）
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")
+# 是否使用后台线程写日志。开启后请求线程只把格式化好的日志放入队列，由后台线程写入标准输出，写日志的IO不会阻塞请求
+LOG_ASYNC = os.getenv("LOG_ASYNC", "0") == "1"
+# 后台写日志队列的最大长度，队列满时丢弃新的日志（不阻塞请求），并在之后输出丢弃的条数
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# 按路由路径设置请求日志的采样率，例如 "/mp/exam/danxue_Answer=0.1,/mp/exam/duoxue_Answer=0.1"
+# 表示这两个接口只有10%的请求输出INFO及以下级别的日志，未配置的路由全部输出。WARNING及以上级别的日志不采样
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")
 
-# 移除默认配置
-logger.remove(0)
 # 自定义的日志输出格式 。 里面添加了process和thread记录，方便查看多进程和线程的信息
 log_format= '<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level}</level> ' \
             '| <magenta>{process}</magenta>:<yellow>{thread}</yellow> ' \
             '| <cyan>{name}</cyan>:<cyan>{function}</cyan>:<yellow>{line}</yellow> - <level>{message}</level>'
 
-# 添加自定义的控制台日志输出格式
-logger.add(sys.stdout,colorize=True,format=log_format)
+
+def _json_format(record) -> str:
+    """
+    JSON格式：把日志记录转换为一行JSON，放到 extra["_json"] 中输出
+    """
+    data = {
+        "time": record["time"].isoformat(timespec="milliseconds"),
+        "level": record["level"].name,
+        "process": record["process"].id,
+        "thread": record["thread"].id,
+        "name": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    extra = {key: value for key, value in record["extra"].items() if not key.startswith("_")}
+    if extra:
+        data["extra"] = extra
+    if record["exception"] is not None:
+        # 异常堆栈放在JSON中，保证每条日志只占一行
+        data["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["_json"] = json.dumps(data, ensure_ascii=False, default=str)
+    return "{extra[_json]}\n"
+
+
+class BackgroundSink:
+    """
+    后台写日志的输出目标：请求线程调用时只把日志放入有界队列（不阻塞），由后台线程批量写入stream
+    队列满时丢弃日志并计数，后台线程在之后输出一条丢弃条数的提示
+    """
+
+    def __init__(self, stream: TextIO, maxsize: int = LOG_QUEUE_SIZE):
+        self.stream = stream
+        self.dropped = 0
+        self._queue: queue.Queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        reported = 0
+        while True:
+            message = self._queue.get()
+            batch = []
+            # 一次取出队列中已有的日志，合并为一次写入
+            while message is not None:
+                batch.append(message)
+                if len(batch) >= 1000:
+                    break
+                try:
+                    message = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            if self.dropped != reported:
+                batch.append(f"日志队列已满，丢弃了 {self.dropped - reported} 条日志\n")
+                reported = self.dropped
+            if batch:
+                self.stream.write("".join(batch))
+                self.stream.flush()
+            if message is None:
+                return
+
+    def stop(self, timeout: float = 5) -> None:
+        """
+        写入队列中剩余的日志后停止后台线程（进程退出时自动调用）
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join(timeout)
+
+
+_background_sink: Optional[BackgroundSink] = None
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, use_background: bool = LOG_ASYNC,
+                      stream: Optional[TextIO] = None) -> None:
+    """
+    配置日志输出，重复调用时替换之前的配置
+        level: 日志级别
+        fmt: text 彩色文本、json 每行一个JSON对象
+        use_background: 是否使用后台线程写日志
+        stream: 日志输出流，默认标准输出
+    """
+    global _background_sink
+    logger.remove()
+    if _background_sink is not None:
+        _background_sink.stop()
+        _background_sink = None
+
+    sink = stream or sys.stdout
+    if use_background:
+        sink = _background_sink = BackgroundSink(sink)
+    if fmt == "json":
+        logger.add(sink, level=level, format=_json_format, colorize=False)
+    else:
+        logger.add(sink, level=level, format=log_format, colorize=True)
+
+
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(","):
+        if "=" in item:
+            path, rate = item.split("=", 1)
+            rates[path.strip()] = float(rate)
+    return rates
+
+
+_sample_rates = _parse_sample_rates(LOG_SAMPLE_RATES)
+
+
+def set_sample_rates(value: str) -> None:
+    """
+    替换路由采样率配置，格式与 LOG_SAMPLE_RATES 相同
+    """
+    global _sample_rates
+    _sample_rates = _parse_sample_rates(value)
+
+# 当前请求是否输出INFO及以下级别的日志，由LoggerMiddleware在请求开始时根据采样率设置
+request_log_sampled: ContextVar[bool] = ContextVar("request_log_sampled", default=True)
+
+
+def sample_request(path: str) -> bool:
+    """
+    按路由路径的采样率决定一个请求是否输出请求日志
+    """
+    rate = _sample_rates.get(path, 1.0)
+    return rate >= 1.0 or random.random() < rate
+
+
+class RequestLogger:
+    """
+    请求日志：当前请求未被采样时直接返回，不获取调用栈、不格式化消息
+    消息使用 loguru 的 {} 占位符传参（延迟格式化），例如 request_logger.info('/mp/exam/getQuestionList, exam_id = {}', exam_id)
+    """
+
+    def __init__(self):
+        # depth=1：日志中显示调用方的模块、函数和行号
+        self._logger = logger.opt(depth=1)
+
+    def debug(self, message: str, *args, **kwargs) -> None:
+        if request_log_sampled.get():
+            self._logger.debug(message, *args, **kwargs)
+
+    def info(self, message: str, *args, **kwargs) -> None:
+        if request_log_sampled.get():
+            self._logger.info(message, *args, **kwargs)
+
+
+request_logger = RequestLogger()
+
+configure_logging()
+
+
+@atexit.register
+def _stop_background_sink():
+    if _background_sink is not None:
+        _background_sink.stop()
@@ -1,23 +1,56 @@
 # 导入FastAPI
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from middlewares.auth_middleware import AuthMiddleware
+from middlewares.compression_middleware import CompressionMiddleware
+from middlewares.logger_middleware import LoggerMiddleware
+from middlewares.metrics_middleware import MetricsMiddleware
+from middlewares.sql_stats_middleware import SqlStatsMiddleware
+from middlewares.unit_of_work_middleware import UnitOfWorkMiddleware
+from modules.module_exam.service.answer_write_behind import answer_write_behind
+from utils.metrics_util import metrics_registry
+from utils.wx_client_util import wx_client
+
+# 应用的启动和关闭处理
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 启动答题记录写后模式的后台写入任务（未开启时不做任何处理），并补写上次未写入数据库的记录
+    answer_write_behind.start()
+    # 多进程模式下启动指标文件的定时写入
+    metrics_registry.start()
+    yield
+    # 停止后台写入任务，并写入缓冲中剩余的答题记录
+    await answer_write_behind.stop()
+    metrics_registry.stop()
+    # 关闭微信接口客户端的连接池
+    await wx_client.aclose()
+
 # 创建FastAPI应用实例
 app = FastAPI(
     title="微信小程序服务API",
     description="微信小程序-测试系统后端API",
-    version="1.0.1"
+    version="1.0.1",
+    lifespan=lifespan
 )
 
+# 压缩中间件，按 Accept-Encoding 使用 br/gzip 压缩JSON、文本等类型的响应（默认不小于1000字节），已压缩的响应不再处理
+# 最先注册（最内层），直接收到接口返回的完整响应体；注册在函数中间件外层时，响应体会被拆成多个分块
+app.add_middleware(CompressionMiddleware)
+# 工作单元中间件，每个请求中的所有DAO调用共用一个会话和事务，响应返回前统一提交。注册在认证中间件之前（内层），未认证的请求不开启工作单元
+app.middleware("http")(UnitOfWorkMiddleware)
 # 全局异常处理中间件
 # app.middleware("http")(ExceptionMiddleware)
-# 认证中间件
-# app.middleware("http")(AuthMiddleware)
-# 日志中间件
-# app.middleware("http")(LoggerMiddleware)
-# 添加 GZip 中间件，压缩大于 2000 字节的响应
-# app.add_middleware(GZipMiddleware, minimum_size=2000)
+# 认证中间件，验证JWT并将 userId、openId 保存到 request.state。注册在日志、指标中间件之前（内层），未认证的请求同样输出访问日志和统计指标
+app.middleware("http")(AuthMiddleware)
+# 日志中间件，按路由采样率决定请求是否输出请求日志，并输出访问日志
+app.middleware("http")(LoggerMiddleware)
+# SQL统计中间件，统计每个请求的SQL语句数量和数据库耗时
+app.middleware("http")(SqlStatsMiddleware)
+# 指标中间件，按路由统计请求数、耗时和处理中的请求数。最后注册的中间件最先执行，耗时包含其他中间件
+app.middleware("http")(MetricsMiddleware)
 
 # 注册CORS中间件
 app.add_middleware(
@@ -29,13 +62,16 @@ app.add_middleware(
 )
 
 # 导入控制器路由
-from modules.module_test.controller.mp_user_controller import router as mp_user_router
-from modules.module_test.controller.mp_exam_controller import router as mp_exam_router
-from modules.module_test.controller.wx_controller import router as wx_router
+from modules.module_exam.controller.mp_user_controller import router as mp_user_router
+from modules.module_exam.controller.mp_exam_controller import router as mp_exam_router
+from modules.module_exam.controller.wx_controller import router as wx_router
+from modules.module_monitor.controller.monitor_controller import router as monitor_router, metrics_router
 # 通过include_router函数，把各个路由实例加入到FastAPI应用实例中,进行统一管理
 app.include_router(mp_user_router)
 app.include_router(mp_exam_router)
 app.include_router(wx_router)
+app.include_router(monitor_router)
+app.include_router(metrics_router)
 
 # 测试运行接口
 @app.get("/")
@@ -1,46 +1,54 @@
+import os
+import re
 from fastapi import Request
 from fastapi.responses import JSONResponse
 from typing import Callable
 
-# 认证中间件
-async def AuthMiddleware(request: Request, call_next: Callable):
-    print("AuthMiddleware========================")
+from utils.jwt_util import JWTUtil
 
-    # 精确匹配的路径
-    exact_paths = ["/", "/login", "/docs", "/redoc", "/openapi.json"]
+# 不需要token的路径，逗号分隔。按路径段匹配前缀：/docs 匹配 /docs 和 /docs/...，不匹配 /docsx
+# 默认包括：根路径、接口文档、内部监控接口（由接口自身限制本机访问）、指标接口、登录注册接口、微信登录凭证换取OpenID接口
+AUTH_PUBLIC_PATHS = os.getenv(
+    "AUTH_PUBLIC_PATHS",
+    "/docs,/redoc,/openapi.json,/internal,/metrics,/mp/wxservice/getOpenIdByWxCode,"
+    "/mp/user/wxUserLogin,/mp/user/phoneLogin,/mp/user/phoneRegister,/mp/user/resetPass",
+)
 
-    # 测试路径前缀（支持通配符效果）
-    test_path_prefixes = [
-        "/mp/",  # 匹配所有以 /test/ 开头的路径
-    ]
 
-    # 检查是否是精确匹配的路径
-    if request.url.path in exact_paths:
-        # 直接放行
-        return await call_next(request)
+def compile_public_paths(paths: str) -> "re.Pattern":
+    """
+    将不需要token的路径编译为一个正则表达式，匹配耗时只与路径长度有关，与路径数量无关。根路径 / 只精确匹配
+    """
+    prefixes = sorted({path.strip().rstrip("/") for path in paths.split(",") if path.strip().rstrip("/")})
+    alternatives = "|".join(re.escape(prefix) for prefix in prefixes)
+    return re.compile(rf"/|(?:{alternatives})(?:/.*)?" if prefixes else "/", re.DOTALL)
+
+
+PUBLIC_PATH_PATTERN = compile_public_paths(AUTH_PUBLIC_PATHS)
+
 
-    # 检查是否是测试路径前缀
-    for prefix in test_path_prefixes:
-        if request.url.path.startswith(prefix):
-            return await call_next(request)
+def unauthorized(detail: str) -> JSONResponse:
+    return JSONResponse(status_code=401, content={"detail": detail})
+
+
+# 认证中间件：验证 Authorization: Bearer <token> 中的JWT，将token中的 userId、openId 保存到 request.state.user_id、request.state.open_id
+# 验证通过的token缓存到过期时间，同一个token再次请求时不再验证签名
+async def AuthMiddleware(request: Request, call_next: Callable):
+    # CORS预检请求和不需要token的路径直接放行
+    if request.method == "OPTIONS" or PUBLIC_PATH_PATTERN.fullmatch(request.url.path):
+        return await call_next(request)
 
     # 获取 Authorization 头
     auth_header = request.headers.get("Authorization")
+    if not auth_header or auth_header[:7].lower() != "bearer ":
+        return unauthorized("未授权访问，需要有效的token")
 
     # 验证 token
-    if not auth_header or not auth_header.startswith("Bearer "):
-        return JSONResponse(
-            status_code=401,
-            content={"detail": "未授权访问，需要有效的token"}
-        )
-
-    # 这里可以添加更复杂的 token 验证逻辑
-    token = auth_header.split(" ")[1]
-    if token != "valid-token":  # 实际应用中应该验证真实的 token
-        return JSONResponse(
-            status_code=401,
-            content={"detail": "无效的 token"}
-        )
+    payload = JWTUtil.get_payload_cached(auth_header[7:].strip())
+    if payload is None:
+        return unauthorized("无效的 token")
 
+    request.state.user_id = payload.get("userId")
+    request.state.open_id = payload.get("openId")
     # 验证通过，继续处理请求
-    return await call_next(request)
\ No newline at end of file
+    return await call_next(request)
@@ -0,0 +1,100 @@
+import anyio.to_thread
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from utils.compression_util import COMPRESSION_MINIMUM_SIZE, COMPRESSION_THREAD_MIN_SIZE, StreamCompressor, choose_encoding, compress, is_compressible, weak_etag
+
+
+# 压缩中间件：根据请求头 Accept-Encoding 使用 br（需要安装brotli）或 gzip 压缩响应体
+# 只压缩指定类型（JSON、文本等）且不小于 minimum_size 字节的响应；已经设置 Content-Encoding 的响应（例如接口返回的预压缩数据）不再压缩
+# 需要改写响应体并支持流式响应，因此实现为ASGI中间件，通过 app.add_middleware(CompressionMiddleware) 注册
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressionResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressionResponder:
+    """
+    处理一次请求的响应：缓存响应头，收到第一段响应体后决定是否压缩，再发送响应头
+    """
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send = None
+        self.start_message = None
+        self.compressor = None
+        self.passthrough = False
+        # 决定是否压缩之前缓存的响应体分块
+        self.buffer = []
+        self.buffered_size = 0
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_with_compression)
+
+    async def send_with_compression(self, message: Message):
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 等收到第一段响应体后再发送响应头
+            self.start_message = message
+            return
+        if message_type != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.start_message is not None:
+            # 分块发送的响应体，先缓存到 minimum_size 字节（或全部收到）再决定是否压缩
+            self.buffer.append(body)
+            self.buffered_size += len(body)
+            if more_body and self.buffered_size < self.minimum_size:
+                return
+            body = b"".join(self.buffer)
+            self.buffer = []
+            start_message, self.start_message = self.start_message, None
+            headers = MutableHeaders(raw=start_message["headers"])
+            if (start_message["status"] in (204, 304) or "content-encoding" in headers
+                    or not is_compressible(headers.get("content-type"))
+                    or (not more_body and len(body) < self.minimum_size)):
+                self.passthrough = True
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
+                return
+
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            if "etag" in headers:
+                headers["ETag"] = weak_etag(headers["etag"])
+            if not more_body:
+                # 一次发送完的响应体，整体压缩
+                if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+                    body = await anyio.to_thread.run_sync(compress, body, self.encoding)
+                else:
+                    body = compress(body, self.encoding)
+                headers["Content-Length"] = str(len(body))
+                await self.send(start_message)
+                await self.send({"type": "http.response.body", "body": body})
+                return
+            # 流式响应，逐块压缩，不设置 Content-Length
+            del headers["Content-Length"]
+            self.compressor = StreamCompressor(self.encoding)
+            await self.send(start_message)
+
+        data = self.compressor.compress(body)
+        if not more_body:
+            data += self.compressor.flush()
+        await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
@@ -1,22 +1,19 @@
 from fastapi import Request
 import time
-from loguru import logger
 from typing import Callable
 
-# 日志中间件
-async def LoggerMiddleware(request: Request, call_next: Callable):
-    # 初始化请求信息字典
-    request_info = {
-        "method": request.method,
-        "path": request.url.path,
-        "query_params": dict(request.query_params),
-        "client": str(request.client) if request.client else None
-    }
-    # 记录请求信息
-    logger.info(f"Request Info: {request_info}")
-
-    # 继续处理请求，并获取响应对象
-    response = await call_next(request)
+from config.log_config import request_logger, request_log_sampled, sample_request
 
-    # 返回响应对象
-    return response
\ No newline at end of file
+# 日志中间件：按路由的采样率决定当前请求是否输出请求日志（LOG_SAMPLE_RATES），采样的请求在结束时输出一条访问日志
+async def LoggerMiddleware(request: Request, call_next: Callable):
+    path = request.url.path
+    token = request_log_sampled.set(sample_request(path))
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+        # 记录请求信息：请求方法、路径、状态码、耗时、客户端地址
+        request_logger.info('{} {} {} {:.1f}ms client = {}', request.method, path, response.status_code,
+                            (time.perf_counter() - start) * 1000, request.client.host if request.client else None)
+        return response
+    finally:
+        request_log_sampled.reset(token)
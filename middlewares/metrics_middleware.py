@@ -0,0 +1,23 @@
+import time
+from typing import Callable
+
+from fastapi import Request
+
+from utils.metrics_util import UNMATCHED_ROUTE, metrics_registry
+
+
+# 指标中间件：按路由模板统计请求数、状态码和耗时直方图，按请求方法统计处理中的请求数，通过 /metrics 接口查看
+async def MetricsMiddleware(request: Request, call_next: Callable):
+    method = request.method
+    metrics_registry.request_started(method)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # 路由匹配成功后，FastAPI会把匹配到的路由写入scope["route"]。使用路由模板而不是实际路径作为标签，避免标签数量无限增长
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+        metrics_registry.request_finished(method, route_path, status, time.perf_counter() - start)
@@ -0,0 +1,23 @@
+from fastapi import Request
+from typing import Callable
+
+from config.log_config import logger
+from utils.sql_stats_util import RequestSqlStats, current_request_sql_stats
+
+# 一次请求执行的SQL语句数量超过该值时记录警告日志，通常意味着存在循环查询（N+1查询）
+REQUEST_QUERY_COUNT_WARN = 50
+
+# SQL统计中间件：统计每个请求执行的SQL语句数量和数据库总耗时，通过响应头 X-DB-Query-Count、X-DB-Time-Ms 返回
+async def SqlStatsMiddleware(request: Request, call_next: Callable):
+    stats = RequestSqlStats()
+    token = current_request_sql_stats.set(stats)
+    try:
+        response = await call_next(request)
+    finally:
+        current_request_sql_stats.reset(token)
+
+    response.headers["X-DB-Query-Count"] = str(stats.count)
+    response.headers["X-DB-Time-Ms"] = f"{stats.total_time * 1000:.1f}"
+    if stats.count > REQUEST_QUERY_COUNT_WARN:
+        logger.warning(f'{request.method} {request.url.path} 执行了 {stats.count} 条SQL语句，数据库总耗时 {stats.total_time * 1000:.1f}ms')
+    return response
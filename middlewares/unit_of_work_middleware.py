@@ -0,0 +1,11 @@
+from fastapi import Request
+from typing import Callable
+
+from config.database_config import async_unit_of_work
+
+# 工作单元中间件：每个请求开启一个异步工作单元，接口中的所有DAO调用共用同一个会话和事务，响应返回前统一提交，出现异常时统一回滚
+# 会话在第一次执行SQL时才占用连接，不访问数据库的请求不占用连接；接口中显式开启的工作单元直接复用该会话
+# 提交失败时抛出异常（返回500），不会出现响应已经返回成功、数据却没有提交的情况
+async def UnitOfWorkMiddleware(request: Request, call_next: Callable):
+    async with async_unit_of_work():
+        return await call_next(request)
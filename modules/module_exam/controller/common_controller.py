@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Body
-from config.log_config import logger
+from config.log_config import request_logger
 from utils.response_util import ResponseUtil
 from utils.jwt_util import JWTUtil
 import time
@@ -11,7 +11,7 @@ router = APIRouter(prefix='/mp/common', tags=['common接口'])
 """
 @router.get("/api/applet/common/token")
 def get_token():
-    logger.info("/api/applet/common/token,获取token")
+    request_logger.info("/api/applet/common/token,获取token")
     # 创建token载荷
     payload = {
         "userName": "shu-yx",
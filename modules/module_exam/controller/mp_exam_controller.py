@@ -1,52 +1,98 @@
-from datetime import datetime
 from typing import List, Optional
-from fastapi import APIRouter,Body
-from config.log_config import logger
+import anyio.to_thread
+from fastapi import APIRouter,Body,Request
+from config.log_config import request_logger
+from config.database_config import async_unit_of_work
 from modules.module_exam.dto.mp_exam_dto import MpExamDTO
 from modules.module_exam.dto.mp_option_dto import MpOptionDTO
 from modules.module_exam.dto.mp_question_dto import MpQuestionDTO
 from modules.module_exam.dto.mp_user_exam_dto import MpUserExamDTO
 from modules.module_exam.dto.mp_user_option_dto import MpUserOptionDTO
-from modules.module_exam.model.mp_option_model import MpOptionModel
 from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
-from modules.module_exam.service.mp_exam_service import MpExamService
-from modules.module_exam.service.mp_option_service import MpOptionService
-from modules.module_exam.service.mp_question_service import MpQuestionService
-from modules.module_exam.service.mp_user_exam_service import MpUserExamService
-from modules.module_exam.service.mp_user_option_service import MpUserOptionService
-from utils.response_util import ResponseUtil
+from modules.module_exam.service.mp_exam_service import AsyncMpExamService
+from modules.module_exam.service.mp_option_service import AsyncMpOptionService
+from modules.module_exam.service.mp_question_service import AsyncMpQuestionService
+from modules.module_exam.service.mp_user_exam_service import AsyncMpUserExamService
+from modules.module_exam.service.mp_user_option_service import AsyncMpUserOptionService
+from modules.module_exam.service.answer_write_behind import answer_write_behind
+from utils.compression_util import COMPRESSION_MINIMUM_SIZE, choose_encoding, encoding_headers, weak_etag
+from utils.etag_util import make_etag, etag_matches, etag_headers, not_modified_response
+from utils.response_util import ResponseUtil, JSONBytesResponse
 
 # 创建路由实例
 router = APIRouter(prefix='/mp/exam', tags=['mp_exam接口'])
-# 创建服务实例
-MpExamService_instance = MpExamService()
-MpOptionService_instance = MpOptionService()
-MpQuestionService_instance = MpQuestionService()
-MpUserExamService_instance = MpUserExamService()
-MpUserOptionService_instance = MpUserOptionService()
+# 创建异步服务实例。接口均为 async def，数据库IO不占用线程池中的线程
+MpExamService_instance = AsyncMpExamService()
+MpOptionService_instance = AsyncMpOptionService()
+MpQuestionService_instance = AsyncMpQuestionService()
+MpUserExamService_instance = AsyncMpUserExamService()
+MpUserOptionService_instance = AsyncMpUserOptionService()
 
 """
 获取测试列表信息
 """
 @router.get("/getExamList")
-def getExamList(page_num:int=1, page_size:int=10):
-    logger.info(f'/mp/exam/getExamList, page_num = {page_num}, page_size = {page_size}')
-    # 分页查询，状态正常的考试信息
-    result:List[MpExamDTO] = MpExamService_instance.get_page_list_by_filters(page_num=page_num, page_size=page_size, filters=MpExamDTO(status=0))
-    # 若result为空，则返回空列表。不为空则返回result
-    return ResponseUtil.success(data=result if result is not None else [])
+async def getExamList(request:Request, page_num:int=1, page_size:int=10, cursor:Optional[str]=None):
+    request_logger.info('/mp/exam/getExamList, page_num = {}, page_size = {}, cursor = {}', page_num, page_size, cursor)
+    # 版本号和测试列表在同一个工作单元（同一个会话、同一个从库）中读取，先读版本号：响应内容不会比ETag中的版本号旧
+    async with async_unit_of_work():
+        # ETag由数据库中的测试列表版本号生成（测试的写操作使其加1），所有worker进程相同。
+        # 客户端缓存的版本号仍是最新时直接返回304，不查询测试列表、不序列化；版本号不同时返回完整的响应
+        etag = make_etag("exam", await MpExamService_instance.get_exam_list_version())
+        if etag_matches(request, etag):
+            return not_modified_response(etag)
+        # 传入cursor参数时使用游标分页（第一页传空字符串），返回当前页数据和下一页游标
+        if cursor is not None:
+            try:
+                result, next_cursor = await MpExamService_instance.get_list_by_cursor(page_size=page_size, cursor=cursor or None, filters=MpExamDTO(status=0))
+            except ValueError as e:
+                return ResponseUtil.exception(message=str(e))
+            response = ResponseUtil.success_json(data={"list": result, "next_cursor": next_cursor})
+        else:
+            # 分页查询，状态正常的考试信息
+            result:List[MpExamDTO] = await MpExamService_instance.get_page_list_by_filters(page_num=page_num, page_size=page_size, filters=MpExamDTO(status=0))
+            # 若result为空，则返回空列表。不为空则返回result
+            response = ResponseUtil.success_json(data=result if result is not None else [])
+    response.headers.update(etag_headers(etag))
+    return response
 
 """
 获取测试题目列表信息
 """
 @router.post("/getQuestionList")
-def getQuestionList(exam_id:int = Body(None,embed=True)):
-    logger.info(f'/mp/exam/getQuestionList, exam_id = {exam_id}')
-
-    # 调用自定义方法获取问题和选项数据
-    question_list = MpQuestionService_instance.get_questions_with_options(exam_id)
+async def getQuestionList(request:Request, exam_id:int = Body(None,embed=True)):
+    request_logger.info('/mp/exam/getQuestionList, exam_id = {}', exam_id)
+    return await question_list_response(request, exam_id)
 
-    return ResponseUtil.success(data=question_list)
+"""
+获取测试题目列表信息（GET方式，参数通过查询字符串传递，便于客户端使用条件请求）
+"""
+@router.get("/getQuestionList")
+async def getQuestionListByGet(request:Request, exam_id:int):
+    request_logger.info('/mp/exam/getQuestionList, exam_id = {}', exam_id)
+    return await question_list_response(request, exam_id)
+
+async def question_list_response(request:Request, exam_id:int):
+    # 从题库缓存中获取问题和选项数据。响应体在题库缓存项中只序列化一次，之后的请求直接返回缓存的字节串
+    question_bank = await MpQuestionService_instance.get_question_bank(exam_id)
+    # ETag由题库缓存项的版本号（题库内容的摘要）生成，题库没有修改时直接返回304，不返回响应体
+    etag = make_etag("question", exam_id, question_bank.version)
+    # 客户端接受压缩时返回题库缓存项中的预压缩响应体（每个题库只压缩一次），压缩中间件不再重复压缩
+    encoding = choose_encoding(request.headers.get("accept-encoding"))
+    if encoding is not None:
+        etag = weak_etag(etag)
+    if etag_matches(request, etag):
+        return not_modified_response(etag)
+    if encoding is not None and len(await question_bank_body(question_bank)) < COMPRESSION_MINIMUM_SIZE:
+        encoding = None
+    body = await question_bank_body(question_bank, encoding)
+    return JSONBytesResponse(body, headers={**etag_headers(etag), **encoding_headers(encoding)})
+
+async def question_bank_body(question_bank, encoding:Optional[str] = None) -> bytes:
+    # 已生成的响应体直接返回。第一次生成该编码的响应体时在线程池中执行，避免序列化、压缩大题库时阻塞事件循环
+    if question_bank.has_response_body(encoding):
+        return question_bank.response_body(encoding)
+    return await anyio.to_thread.run_sync(question_bank.response_body, encoding)
 
 
 
@@ -56,11 +102,11 @@ def getQuestionList(exam_id:int = Body(None,embed=True)):
 
 
 @router.post("/getQuestionList2")
-def getQuestionList2(exam_id: int = Body(None, embed=True)):
-    logger.info(f'/mp/exam/getQuestionList2, exam_id = {exam_id}')
+async def getQuestionList2(exam_id: int = Body(None, embed=True)):
+    request_logger.info('/mp/exam/getQuestionList2, exam_id = {}', exam_id)
 
     # 根据examid去查询所属测试的状态正常的题目
-    questionlist: List[MpQuestionDTO] = MpQuestionService_instance.get_list_by_filters(filters=MpQuestionDTO(exam_id=exam_id, status=0))
+    questionlist: List[MpQuestionDTO] = await MpQuestionService_instance.get_list_by_filters(filters=MpQuestionDTO(exam_id=exam_id, status=0))
 
     jsonArray = []
     # 遍历题目列表，查询每个题目对应的选项
@@ -73,7 +119,7 @@ def getQuestionList2(exam_id: int = Body(None, embed=True)):
         }
 
         # 查询选项列表
-        optionList: List[MpOptionDTO] = MpOptionService_instance.get_list_by_filters(filters=MpOptionDTO(question_id=question.id))
+        optionList: List[MpOptionDTO] = await MpOptionService_instance.get_list_by_filters(filters=MpOptionDTO(question_id=question.id))
         jsonArray2 = []
         for option in optionList:
             jsonArray2.append({
@@ -85,17 +131,17 @@ def getQuestionList2(exam_id: int = Body(None, embed=True)):
         jsonobj["options"] = jsonArray2
         # 将选项列表添加到题目字典中
         jsonArray.append(jsonobj)
-    return ResponseUtil.success(data=jsonArray)
+    return ResponseUtil.success_json(data=jsonArray)
 
 
 """
 获取测试进度信息
 """
 @router.post("/getExamProgress")
-def getExamProgress(user_id:int = Body(None),exam_id:int = Body(None)):
-    logger.info(f'/mp/exam/getExamProgress, user_id = {user_id}, exam_id = {exam_id}')
+async def getExamProgress(user_id:int = Body(None),exam_id:int = Body(None)):
+    request_logger.info('/mp/exam/getExamProgress, user_id = {}, exam_id = {}', user_id, exam_id)
     # 调用服务层方法，查询考试进度信息
-    result:MpUserExamDTO = MpUserExamService_instance.get_one_by_filters(filters=MpUserExamDTO(user_id=user_id, exam_id=exam_id))
+    result:MpUserExamDTO = await MpUserExamService_instance.get_one_by_filters(filters=MpUserExamDTO(user_id=user_id, exam_id=exam_id))
     # 返回测试进度
     if result is not None:
         return ResponseUtil.success(data={"exam_pageNo": result.page_no})
@@ -106,46 +152,42 @@ def getExamProgress(user_id:int = Body(None),exam_id:int = Body(None)):
 单选题答题
 """
 @router.post("/danxue_Answer")
-def danxueAnswer(userId = Body(None),examId = Body(None),questionId = Body(None),optionId = Body(None),pageNo = Body(None)):
-    logger.info(f'/mp/exam/danxue_Answer, userId = {userId}, examId = {examId}, questionId = {questionId}, optionId = {optionId}, pageNo = {pageNo}')
-    # 查询选项信息
-    option_result:MpOptionDTO = MpOptionService_instance.get_by_id(id=optionId)
-    # 根据exam_id查询某个测试的题目个数
-    question_count:int = MpQuestionService_instance.get_total_by_filters(filters=MpQuestionDTO(exam_id=examId))
-
-    # 查询用户是否有没做完的测试记录
-    user_exam_result: MpUserExamDTO = MpUserExamService_instance.find_last_one_not_finished_user_exam(user_id=userId, exam_id=examId)
-    if user_exam_result is None:
-        logger.info(f'用户 userId = {userId}, examId = {examId}, 无未做完测试，创建新的测试记录')
-        # 创建新的测试记录
-        MpUserExamService_instance.add(data=MpUserExamDTO(
+async def danxueAnswer(userId = Body(None),examId = Body(None),questionId = Body(None),optionId = Body(None),pageNo = Body(None)):
+    request_logger.info('/mp/exam/danxue_Answer, userId = {}, examId = {}, questionId = {}, optionId = {}, pageNo = {}', userId, examId, questionId, optionId, pageNo)
+    # 在同一个工作单元中完成本次答题的全部查询和写入：只占用一个连接、只提交一次，任一步骤失败则整体回滚
+    # 请求已经由工作单元中间件开启工作单元时直接复用，在请求结束时提交
+    async with async_unit_of_work():
+        # 从答案索引中读取选项得分
+        option_score = await MpQuestionService_instance.get_option_score(exam_id=examId, option_id=optionId)
+        if option_score is None:
+            return ResponseUtil.error(data={"message": "选项不存在"})
+        # 根据exam_id查询某个测试的题目个数
+        question_count:int = await MpQuestionService_instance.get_total_by_filters(filters=MpQuestionDTO(exam_id=examId))
+
+        # 原子地累加分数、更新题号，没有未做完的测试记录时创建一条。若题号和题目数相等，则表示这是最后一题，同时设置完成时间
+        user_exam_id:int = await MpUserExamService_instance.record_answer(
             user_id=userId,
             exam_id=examId,
+            score_delta=option_score,
             page_no=pageNo,
-            score=option_result.score,
-            create_time=datetime.now(),
-        ))
-    else:
-        logger.info(f'用户 userId = {userId}, examId = {examId}, 有未做完测试，继续测试')
-        user_exam_result.score += option_result.score
-        user_exam_result.page_no = pageNo
-        # 若题号和题目数相等，则表示这是最后一题,还需要更新finish_time
-        if pageNo == question_count:
-            user_exam_result.finish_time = datetime.now()
-        # 更新测试记录
-        MpUserExamService_instance.update_by_id(id=user_exam_result.id,update_data=user_exam_result)
-
-    # 创建新的用户选项信息
-    mpUserOption = MpUserOptionDTO(
-        user_id=userId,
-        exam_id=examId,
-        is_duoxue=0,
-        question_id=questionId,
-        option_id=optionId,
-        is_right=1 if option_result.score == 1 else 0,
-    )
-    # 新增新的用户选项记录
-    MpUserOptionService_instance.add(data=mpUserOption)
+            is_finished=pageNo == question_count,
+        )
+
+        # 创建新的用户选项信息
+        mpUserOption = MpUserOptionDTO(
+            user_id=userId,
+            exam_id=examId,
+            user_exam_id=user_exam_id,
+            is_duoxue=0,
+            question_id=questionId,
+            option_id=optionId,
+            is_right=1 if option_score == 1 else 0,
+        )
+        # 新增新的用户选项记录。写后模式下追加到本地缓冲（追加失败时整体回滚），事务提交后才会写入数据库
+        if answer_write_behind.enabled:
+            await answer_write_behind.append([mpUserOption])
+        else:
+            await MpUserOptionService_instance.add(data=mpUserOption)
 
     return ResponseUtil.success()
 
@@ -153,72 +195,47 @@ def danxueAnswer(userId = Body(None),examId = Body(None),questionId = Body(None)
 多选题答题
 """
 @router.post("/duoxue_Answer")
-def duoxue_Answer(userId = Body(None),examId = Body(None),questionId = Body(None),optionIds:List[int] = Body(None),pageNo = Body(None)):
-    logger.info(f'/mp/exam/duoxue_Answer, user_id = {userId}, exam_id = {examId}, question_id = {questionId}, option_ids = {optionIds}, page_no = {pageNo}')
-
-    # 使用 session_execute_query 方法 查询题目的正确选项集合
-    rightList:List[MpOptionDTO] = MpOptionService_instance.session_execute_query(
-        lambda db_session: db_session.query(MpOptionModel).filter(MpOptionModel.question_id == questionId, MpOptionModel.score == 1).all()
-    )
-    rightIds:List[int] = [item.id for item in rightList]
-
-    # 将正确的选项集合与用户选项的数组进行对比
-    isSame:bool
-    if set(rightIds) == set(optionIds):
-        isSame = True
-    else:
-        isSame = False
-
-    logger.info(f'用户选择的选项 optionIds = {optionIds}, 多选题目的正确选项 = {rightIds}, 是否相同 = {isSame}')
-
-    # 根据exam_id查询某个测试的题目个数
-    question_count:int = MpQuestionService_instance.get_total_by_filters(filters=MpQuestionDTO(exam_id=examId))
-
-    # 使用 session_execute_query 方法  查询用户是否有没做完的测试记录
-    mp_user_exam_result: MpUserExamDTO = MpUserExamService_instance.session_execute_query(
-        lambda db_session: db_session.query(MpUserExamModel).filter(
-            MpUserExamModel.user_id == userId,
-            MpUserExamModel.exam_id == int(examId),
-            MpUserExamModel.finish_time == None,
-        ).first()
-    )
-
-    if mp_user_exam_result is None:
-        logger.info(f'用户 userId = {userId}, examId = {examId}, 无未做完测试，创建新的测试记录')
-        # 创建新的测试记录
-        MpUserExamService_instance.add(data=MpUserExamDTO(
-            user_id=userId,
-            exam_id=examId,
-            page_no=pageNo,
-            score=1 if isSame else 0,
-            create_time=datetime.now(),
-        ))
-    else:
-        logger.info(f'用户 userId = {userId}, examId = {examId}, 有未做完测试，继续测试')
-        mp_user_exam_result.page_no = pageNo
-        if isSame:
-            mp_user_exam_result.score += mp_user_exam_result.score
-        else:
-            mp_user_exam_result.score = 0
+async def duoxue_Answer(userId = Body(None),examId = Body(None),questionId = Body(None),optionIds:List[int] = Body(None),pageNo = Body(None)):
+    request_logger.info('/mp/exam/duoxue_Answer, user_id = {}, exam_id = {}, question_id = {}, option_ids = {}, page_no = {}', userId, examId, questionId, optionIds, pageNo)
+
+    # 在同一个工作单元中完成本次答题的全部查询和写入：只占用一个连接、只提交一次，任一步骤失败则整体回滚
+    # 请求已经由工作单元中间件开启工作单元时直接复用，在请求结束时提交
+    async with async_unit_of_work():
+        # 从答案索引中读取题目的正确选项集合，在内存中与用户选项进行对比
+        rightIds = await MpQuestionService_instance.get_right_option_ids(exam_id=examId, question_id=questionId)
+        isSame:bool = rightIds == set(optionIds)
+
+        request_logger.info('用户选择的选项 optionIds = {}, 多选题目的正确选项 = {}, 是否相同 = {}', optionIds, rightIds, isSame)
 
-        # 若题号和题目数相等，则表示这是最后一题,还需要更新finish_time
-        if pageNo == question_count:
-            mp_user_exam_result.finish_time = datetime.now()
-        # 更新测试记录
-        MpUserExamService_instance.update_by_id(id=mp_user_exam_result.id, update_data=mp_user_exam_result)
+        # 根据exam_id查询某个测试的题目个数
+        question_count:int = await MpQuestionService_instance.get_total_by_filters(filters=MpQuestionDTO(exam_id=examId))
 
-    # 创建新的用户选项信息
-    for optionId in optionIds:
-        new_user_option = MpUserOptionDTO(
+        # 原子地累加分数（回答正确得1分）、更新题号，没有未做完的测试记录时创建一条。若题号和题目数相等，则表示这是最后一题，同时设置完成时间
+        user_exam_id:int = await MpUserExamService_instance.record_answer(
             user_id=userId,
             exam_id=examId,
-            is_duoxue=1,
-            question_id=questionId,
-            option_id=optionId,
-            is_right=1 if rightIds.__contains__(optionId) else 0,
+            score_delta=1 if isSame else 0,
+            page_no=pageNo,
+            is_finished=pageNo == question_count,
         )
-        # 新增新的用户选项记录
-        MpUserOptionService_instance.add(data=new_user_option)
+
+        # 创建新的用户选项信息
+        new_user_options:List[MpUserOptionDTO] = []
+        for optionId in optionIds:
+            new_user_options.append(MpUserOptionDTO(
+                user_id=userId,
+                exam_id=examId,
+                user_exam_id=user_exam_id,
+                is_duoxue=1,
+                question_id=questionId,
+                option_id=optionId,
+                is_right=1 if rightIds.__contains__(optionId) else 0,
+            ))
+        # 批量新增用户选项记录，一条INSERT语句、一个事务写入全部选项。写后模式下追加到本地缓冲，事务提交后才会写入数据库
+        if answer_write_behind.enabled:
+            await answer_write_behind.append(new_user_options)
+        else:
+            await MpUserOptionService_instance.add_many(data_list=new_user_options)
 
     return ResponseUtil.success()
 
@@ -227,13 +244,13 @@ def duoxue_Answer(userId = Body(None),examId = Body(None),questionId = Body(None
 计算并获取测试结果
 """
 @router.post("/result")
-def result(userId = Body(None),examId = Body(None)):
-    logger.info(f'/mp/exam/result, user_id = {userId}, exam_id = {examId}')
+async def result(userId = Body(None),examId = Body(None),cursor:Optional[str] = Body(None),page_size:int = Body(10)):
+    request_logger.info('/mp/exam/result, user_id = {}, exam_id = {}, cursor = {}, page_size = {}', userId, examId, cursor, page_size)
 
     JsonArray = []
 
     # 查询用户最近一次完成的测试记录
-    last_finish_user_exam:MpUserExamDTO = MpUserExamService_instance.find_last_one_not_finished_user_exam(user_id=userId, exam_id=examId)
+    last_finish_user_exam:MpUserExamDTO = await MpUserExamService_instance.find_last_one_not_finished_user_exam(user_id=userId, exam_id=examId)
 
     if last_finish_user_exam is None:
         return ResponseUtil.success(data={"message": "用户未完成任何测试"})
@@ -245,12 +262,21 @@ def result(userId = Body(None),examId = Body(None)):
         })
 
     JsonArray2 = []
-    # 根据user_id和exam_id查询全部完成的测试记录
-    all_finish_user_exams:List[MpUserExamDTO] = MpUserExamService_instance.session_execute_query(
-        lambda db_session: db_session.query(MpUserExamModel).filter(
-            MpUserExamModel.user_id == userId, MpUserExamModel.exam_id == examId, MpUserExamModel.finish_time != None
-        ).all()
-    )
+    next_cursor = None
+    if cursor is not None:
+        # 传入cursor参数时（第一页传空字符串），游标分页查询完成的测试记录
+        try:
+            all_finish_user_exams, next_cursor = await MpUserExamService_instance.get_finished_user_exams_by_cursor(
+                user_id=userId, exam_id=examId, page_size=page_size, cursor=cursor or None)
+        except ValueError as e:
+            return ResponseUtil.exception(message=str(e))
+    else:
+        # 根据user_id和exam_id查询全部完成的测试记录
+        all_finish_user_exams:List[MpUserExamDTO] = await MpUserExamService_instance.session_execute_query(
+            lambda db_session: db_session.query(MpUserExamModel).filter(
+                MpUserExamModel.user_id == userId, MpUserExamModel.exam_id == examId, MpUserExamModel.finish_time != None
+            ).all()
+        )
 
     for user_exam in all_finish_user_exams:
         JsonArray2.append({
@@ -260,6 +286,9 @@ def result(userId = Body(None),examId = Body(None)):
             "time_num": user_exam.finish_time
         })
     JsonArray.append(JsonArray2)
+    # 游标分页时，追加下一页游标
+    if cursor is not None:
+        JsonArray.append({"next_cursor": next_cursor})
 
     return ResponseUtil.success(data=JsonArray)
 
@@ -267,30 +296,31 @@ def result(userId = Body(None),examId = Body(None)):
 查询用户测试历史记录
 """
 @router.post("/history")
-def history(userId = Body(None,embed=True)):
-    logger.info(f'/mp/exam/history, user_id = {userId}')
+async def history(userId = Body(None,embed=True),cursor:Optional[str] = Body(None,embed=True),page_size:int = Body(10,embed=True)):
+    request_logger.info('/mp/exam/history, user_id = {}, cursor = {}, page_size = {}', userId, cursor, page_size)
     JsonArray = []
 
-    # 查询该用户的全部测试历史记录
-    examids:List[int] = MpExamService_instance.get_all_exam_id()
-
-    # 遍历所有测试记录，将其转换为json格式
-    for exam_id in examids:
-        # 根据exam_id 查询对应的测试信息
-
-        # 根据exam_id 和 user_id 查询用户最近的完成的测试基类
-        last_user_exam:Optional[MpUserExamDTO] = MpUserExamService_instance.find_last_one_finished_user_exam(user_id=userId, exam_id=exam_id)
+    # 一次查询得到用户做过的每个测试最近一次完成的记录及测试名称
+    # 传入cursor参数时（第一页传空字符串），按测试id游标分页
+    try:
+        latest_list, next_cursor = await MpUserExamService_instance.get_latest_finished_exams(
+            user_id=userId,
+            page_size=page_size if cursor is not None else None,
+            cursor=cursor or None,
+        )
+    except ValueError as e:
+        return ResponseUtil.exception(message=str(e))
 
-        # 若用户有做过该测试，则取最近一次的测试记录
-        if last_user_exam is not None:
-            exam_info:Optional[MpExamDTO] = MpExamService_instance.get_by_id(last_user_exam.exam_id)
-            # 将历史测试记录转换为json格式，并添加到JsonArray中
-            JsonArray.append({
-                "examId": exam_info.exam_id,
-                "examName": exam_info.name,
-                "finishTime": last_user_exam.finish_time,
-            })
+    # 将历史测试记录转换为json格式，并添加到JsonArray中
+    for last_user_exam in latest_list:
+        JsonArray.append({
+            "examId": last_user_exam.exam_id,
+            "examName": last_user_exam.exam_name,
+            "finishTime": last_user_exam.finish_time,
+        })
 
+    if cursor is not None:
+        return ResponseUtil.success(data={"list": JsonArray, "next_cursor": next_cursor})
     return ResponseUtil.success(data=JsonArray)
 
 
@@ -298,69 +328,27 @@ def history(userId = Body(None,embed=True)):
 进行问题分析
 """
 @router.post("/questionAnalyse")
-def questionAnalyse(userId = Body(None),examId = Body(None)):
-    logger.info(f'/mp/exam/questionAnalyse, user_id = {userId}, exam_id = {examId}')
+async def questionAnalyse(userId = Body(None),examId = Body(None)):
+    request_logger.info('/mp/exam/questionAnalyse, user_id = {}, exam_id = {}', userId, examId)
     JsonArray = []
 
     # 获取最近一次完成的测试记录
-    last_finish_user_exam:MpUserExamDTO = MpUserExamService_instance.find_last_one_finished_user_exam(user_id=userId, exam_id=examId)
+    last_finish_user_exam:MpUserExamDTO = await MpUserExamService_instance.find_last_one_finished_user_exam(user_id=userId, exam_id=examId)
     if last_finish_user_exam is None:
         return ResponseUtil.error(data={"message": "用户未完成任何测试"})
     else:
         last_finish_user_exam_id = last_finish_user_exam.id
 
-    # 查询最近一次测试的问题列表
-    last_question_list:List[MpQuestionDTO] = MpQuestionService_instance.get_list_by_filters(filters=MpQuestionDTO(
-        exam_id=examId,
-    ))
-    for question in last_question_list:
-        json = {}
-        json['questionId'] = question.id
-        qid = question.id
-        qtype = question.type
-
-        # 查询某个测试的某个问题的选项数据
-        uOption:List[MpUserOptionDTO] = MpUserOptionService_instance.get_list_by_filters(filters=MpUserOptionDTO(
-            user_exam_id=last_finish_user_exam_id,
-            question_id=question.id,
-        ))
-
-        if qtype == "单选题":
-            # 单选题
-            if uOption[0].is_right == 1:
-                json['isAnswerCorrect'] = 1
-            else:
-                json['isAnswerCorrect'] = 0
-
-        elif qtype == "多选题":
-            # 多选题
-            # 查询用户选择的选项集合
-            choiceIds = []
-            for u in uOption:
-                choiceIds.append(u.option_id)
-
-            # 查询正确的选项集合
-            rightIds = []
-            right_items:List[MpOptionDTO] = MpOptionService_instance.get_list_by_filters(filters=MpOptionDTO(
-                question_id=question.id,
-                score=1,
-            ))
-            for r in right_items:
-                rightIds.append(r.id)
-
-            # 将正确选项集合和用户选择的选项集合进行对比
-            if set(choiceIds) == set(rightIds):
-                isSame = True
-            else:
-                isSame = False
-
-            # 根据对比结果判断用户是否回答正确
-            if isSame:
-                json['isAnswerCorrect'] = 1
-            else:
-                json['isAnswerCorrect'] = 0
+    # 写后模式下，本次测试的答题记录可能还在本地缓冲中，先写入数据库
+    await answer_write_behind.flush_pending(last_finish_user_exam_id)
 
-        JsonArray.append(json)
+    # 一次分组查询得到本次测试中每个问题是否回答正确
+    question_results = await MpUserOptionService_instance.get_question_results(user_exam_id=last_finish_user_exam_id, exam_id=examId)
+    for item in question_results:
+        JsonArray.append({
+            'questionId': item["question_id"],
+            'isAnswerCorrect': item["is_right"],
+        })
 
     return ResponseUtil.success(data=JsonArray)
 
@@ -369,17 +357,18 @@ def questionAnalyse(userId = Body(None),examId = Body(None)):
 选项分析
 """
 @router.post("/optionAnalyse")
-def optionAnalyse(userExamId = Body(None),questionId = Body(None)):
-    logger.info(f'/mp/exam/optionAnalyse, user_exam_id = {userExamId}, question_id = {questionId}')
+async def optionAnalyse(userExamId = Body(None),questionId = Body(None)):
+    request_logger.info('/mp/exam/optionAnalyse, user_exam_id = {}, question_id = {}', userExamId, questionId)
     JsonArray = []
     json = {}
 
     # 用户选择的选项id集合
     choiceNums = []
 
-    # 查询用户选择的选项id集合
+    # 查询用户选择的选项id集合。写后模式下，本次测试的答题记录可能还在本地缓冲中，先写入数据库
     choiceIds = []
-    uoptions:List[MpUserOptionDTO] = MpUserOptionService_instance.get_list_by_filters(filters=MpUserOptionDTO(
+    await answer_write_behind.flush_pending(userExamId)
+    uoptions:List[MpUserOptionDTO] = await MpUserOptionService_instance.get_list_by_filters(filters=MpUserOptionDTO(
         user_exam_id=userExamId,
         question_id=questionId,
     ))
@@ -387,14 +376,14 @@ def optionAnalyse(userExamId = Body(None),questionId = Body(None)):
         choiceIds.append(u.option_id)
 
     # 根据question_id 查询问题内容
-    question:MpQuestionDTO = MpQuestionService_instance.get_one_by_filters(filters=MpQuestionDTO(
+    question:MpQuestionDTO = await MpQuestionService_instance.get_one_by_filters(filters=MpQuestionDTO(
         id=questionId,
     ))
     json['question_name'] = question.name
     JsonArray.append(json)
 
     # 根据question_id 查询选项内容
-    options:List[MpOptionDTO] = MpOptionService_instance.get_list_by_filters(filters=MpOptionDTO(
+    options:List[MpOptionDTO] = await MpOptionService_instance.get_list_by_filters(filters=MpOptionDTO(
         question_id=questionId,
     ))
     JsonArray2 = []
@@ -1,18 +1,19 @@
 from datetime import datetime
 
 from fastapi import APIRouter,Body
-from config.log_config import logger
+from config.log_config import request_logger
 from modules.module_exam.dto.mp_user_dto import MpUserDTO
-from modules.module_exam.service.mp_user_service import MpUserService
+from modules.module_exam.service.mp_user_service import AsyncMpUserService
 from modules.module_exam.controller.wx_controller import get_wx_openid_by_code
+from utils.wx_client_util import WxApiError
 from utils.response_util import ResponseUtil
 from utils.jwt_util import JWTUtil
 
 # 创建路由实例
 router = APIRouter(prefix='/mp/user', tags=['mp_user接口'])
 
-# 创建服务实例
-MpUserService_instance = MpUserService()
+# 创建异步服务实例。接口均为 async def，数据库IO不占用线程池中的线程
+MpUserService_instance = AsyncMpUserService()
 
 """
 微信登录接口
@@ -20,18 +21,21 @@ MpUserService_instance = MpUserService()
 2.注册或登录用户
 """
 @router.post("/wxUserLogin")
-def wxUserLogin(code:str = Body(None,embed=True)):
-        logger.info(f'/mp/user/wxUserLogin, code = {code}')
-        # 根据code获取openId
-        wxinfo = get_wx_openid_by_code(code)
-        if wxinfo is not None:
+async def wxUserLogin(code:str = Body(None,embed=True)):
+        request_logger.info('/mp/user/wxUserLogin, code = {}', code)
+        # 根据code获取openId。使用异步微信接口客户端，带超时、重试和熔断
+        try:
+            wxinfo = await get_wx_openid_by_code(code)
+        except WxApiError as e:
+            return ResponseUtil.error(data={"message": f"无法获取用户openId,unionId：{e}"})
+        if wxinfo is not None and wxinfo.get("openid"):
             openId = wxinfo.get("openid")
             unionId = wxinfo.get("unionid")
         else:
-            return ResponseUtil.error(data={"message": "无法获取用户openId,unionId"})
+            return ResponseUtil.error(data={"message": "无法获取用户openId,unionId", "errcode": wxinfo.get("errcode") if wxinfo else None})
 
         # 根据openid 查询用户是否存在
-        user:MpUserDTO = MpUserService_instance.get_one_by_filters(filters=MpUserDTO(wx_openid=openId))
+        user:MpUserDTO = await MpUserService_instance.get_one_by_filters(filters=MpUserDTO(wx_openid=openId))
         if user is None:
             # 查询不出用户，则注册用户
             newuser = MpUserDTO(
@@ -44,23 +48,23 @@ def wxUserLogin(code:str = Body(None,embed=True)):
                 last_login_time= datetime.now()
             )
             # 调用服务层方法，新增用户
-            result = MpUserService_instance.add(data=newuser)
+            result = await MpUserService_instance.add(data=newuser)
             if result is None:
                 return ResponseUtil.error(data={"message": "微信注册用户失败"})
 
-            # 获取user的id
-            userId = user.id
+            # 获取新增用户的id
+            userId = result.id
             # 创建token,传入openId,userId生成token
             token = JWTUtil.create_token({"openId": openId, "userId": userId})
             # 返回响应数据
-            return ResponseUtil.success(data={"isFirstLogin": 1,"token": token,"userInfo":user})
+            return ResponseUtil.success(data={"isFirstLogin": 1,"token": token,"userInfo":result})
 
         else:
             # 查询到用户，则登录用户
             user.login_count += 1
             user.last_login_time = datetime.now()
             # 调用服务层方法，更新用户
-            result = MpUserService_instance.update_by_id(id=user.id,update_data=user)
+            result = await MpUserService_instance.update_by_id(id=user.id,update_data=user)
             if result is False:
                 return ResponseUtil.error(data={"message": "微信登录用户失败"})
 
@@ -75,15 +79,15 @@ def wxUserLogin(code:str = Body(None,embed=True)):
 手机号注册接口
 """
 @router.get("/phoneRegister")
-def phoneRegister(phone:str,password:str):
-    logger.info(f'/mp/user/phoneRegister, phone = {phone} password = {password}')
+async def phoneRegister(phone:str,password:str):
+    request_logger.info('/mp/user/phoneRegister, phone = {} password = {}', phone, password)
     # 构造用户字典数据
     user = {
         "phone": phone,
         "password": password
     }
     # 调用服务层方法，新增用户
-    result = MpUserService_instance.add(data=user)
+    result = await MpUserService_instance.add(data=user)
     if result["success"]:
         return ResponseUtil.success(data={"isRegister": 1, "message": "注册成功"})
     else:
@@ -93,15 +97,15 @@ def phoneRegister(phone:str,password:str):
 电话登录接口
 """
 @router.post("/phoneLogin")
-def phoneLogin(phone:str = Body(...),password:str = Body(...)):
-    logger.info(f'/mp/user/phoneLogin, phone = {phone} password = {password}')
+async def phoneLogin(phone:str = Body(...),password:str = Body(...)):
+    request_logger.info('/mp/user/phoneLogin, phone = {} password = {}', phone, password)
     # 构造用户字典数据
     user = {
         "phone": phone,
         "password": password
     }
     # 调用服务层方法，新增用户
-    result = MpUserService_instance.get_one_by_filters(filters=user)
+    result = await MpUserService_instance.get_one_by_filters(filters=user)
     print(result)
     if result is None:
         return ResponseUtil.error(data={"userId": 0, "isLogin": 0, "message": "电话登录失败"})
@@ -112,21 +116,21 @@ def phoneLogin(phone:str = Body(...),password:str = Body(...)):
 重置密码
 """
 @router.post("/resetPass")
-def phoneLogin(phone:str = Body(...),password:str = Body(...),newpassword:str = Body(...)):
-    logger.info(f'/mp/user/resetPass, phone = {phone} password = {password} newpassword = {newpassword}')
+async def phoneLogin(phone:str = Body(...),password:str = Body(...),newpassword:str = Body(...)):
+    request_logger.info('/mp/user/resetPass, phone = {} password = {} newpassword = {}', phone, password, newpassword)
     # 构造用户字典数据
     user = {
         "phone": phone,
         "password": password
     }
     # 调用服务层方法，查询用户是否存在
-    result = MpUserService_instance.get_one_by_filters(filters=user)
+    result = await MpUserService_instance.get_one_by_filters(filters=user)
     if result is not None:
         # 构造需要更新的数据
         newuser = {
             "password": newpassword
         }
-        newresult = MpUserService_instance.update(id=result["id"],data=newuser)
+        newresult = await MpUserService_instance.update(id=result["id"],data=newuser)
         if newresult["success"]:
             return ResponseUtil.success(data={"isReset": 1, "message": "重置密码成功"})
         else:
@@ -138,8 +142,8 @@ def phoneLogin(phone:str = Body(...),password:str = Body(...),newpassword:str =
 
 
 @router.post("/saveUserINFO")
-def saveUserINFO(userId:int = Body(),head:str = Body(),name:str = Body(),gender:int = Body(),age = Body(),address:str = Body(),phone = Body(),email = Body()):
-        logger.info(f'/mp/user/saveUserINFO, userId = {userId} head = {head} name = {name} gender = {gender} age = {age} address = {address} phone = {phone} email = {email}')
+async def saveUserINFO(userId:int = Body(),head:str = Body(),name:str = Body(),gender:int = Body(),age = Body(),address:str = Body(),phone = Body(),email = Body()):
+        request_logger.info('/mp/user/saveUserINFO, userId = {} head = {} name = {} gender = {} age = {} address = {} phone = {} email = {}', userId, head, name, gender, age, address, phone, email)
         updateuser = {
             "id": userId,
             "head": head,
@@ -151,16 +155,16 @@ def saveUserINFO(userId:int = Body(),head:str = Body(),name:str = Body(),gender:
             "email": email
         }
         # 调用服务层方法，更新用户信息
-        result = MpUserService_instance.update(id=userId,data=updateuser)
+        result = await MpUserService_instance.update(id=userId,data=updateuser)
         if result["success"] is False:
             return ResponseUtil.error(data={"message": "更新失败"})
 
         return ResponseUtil.success(data={"message": "更新成功"})
 
 @router.post("/getUserINFO")
-def getUserINFO(userId:int = Body(...)):
-        logger.info(f'/mp/user/getUserINFO, userId = {userId}')
+async def getUserINFO(userId:int = Body(...)):
+        request_logger.info('/mp/user/getUserINFO, userId = {}', userId)
         # 调用服务层方法，查询用户信息
-        result = MpUserService_instance.get_one_by_filters(filters={"id": userId})
+        result = await MpUserService_instance.get_one_by_filters(filters={"id": userId})
         # 若result为空，则返回空字典。不为空则返回result
         return ResponseUtil.success(data=result if result is not None else {})
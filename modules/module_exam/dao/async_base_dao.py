@@ -0,0 +1,186 @@
+from typing import List, Dict, Any, Callable, Optional, Tuple, Union
+
+from sqlalchemy.engine import Row
+
+# 导入异步数据库会话工厂
+from config.database_config import async_session_maker, current_async_db_session
+from .base_dao import BaseDao, ModelType, DtoType, COUNT_MODE_EXACT, DEFAULT_CHUNK_SIZE
+
+class AsyncBaseDao(BaseDao[ModelType, DtoType]):
+    """
+    异步基础数据访问对象类
+    提供与BaseDao相同的CRUD方法，但每个方法都是协程，需要在 async def 接口中通过 await 调用
+
+    数据库操作运行在异步引擎的连接上，等待数据库期间会让出事件循环，不会占用线程池中的线程。
+    各方法的具体查询逻辑复用BaseDao中的_xxx方法，通过AsyncSession.run_sync在异步会话中执行，
+    因此session_execute_query依然可以传入 lambda db_session: db_session.query(...) 形式的查询函数
+    """
+
+    async def _run_in_session(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        获取异步会话，并在该会话中执行传入的func函数
+        当前处于async_unit_of_work()中时复用工作单元的会话，否则创建新会话并在结束时提交
+            func: 第一个参数为db_session的同步函数，例如 self._get_by_id
+        """
+        db_session = current_async_db_session.get()
+        if db_session is not None:
+            return await db_session.run_sync(func, *args, **kwargs)
+        async with async_session_maker() as db_session:
+            return await db_session.run_sync(func, *args, **kwargs)
+
+
+    async def get_page_list_by_filters(self, page_size: int, page_num: int, filters: DtoType = None, sort_by: List[str] = None) -> List[DtoType]:
+        """
+        获取分页列表
+            page_size: 每页大小
+            page_num: 页码
+            filters: 查询条件DTO。例如 XXXDTO(field1=value1, field2=value2)
+            sort_by: 排序字段，是一个字符串列表。例如 ["field1", "-field2"] 表示按field1升序，按field2降序排序。
+        """
+        return await self._run_in_session(self._get_page_list_by_filters, page_size, page_num, filters, sort_by)
+
+    async def get_page_list_by_filters_as_dict(self, page_size: int, page_num: int, filters: Dict = None, sort_by: List[str] = None) -> List[DtoType]:
+        """
+        获取分页列表（dict形式）
+            page_size: 每页大小
+            page_num: 页码
+            filters: 查询条件字典。例如 {"filed1": value1, "filed2": value2}
+            sort_by: 排序字段，是一个字符串列表。例如 ["field1", "-field2"] 表示按field1升序，按field2降序排序。
+        """
+        return await self._run_in_session(self._get_page_list_by_filters_as_dict, page_size, page_num, filters, sort_by)
+
+    async def get_page_with_total(self, page_size: int, page_num: int, filters: DtoType = None, sort_by: List[str] = None, count_mode: str = COUNT_MODE_EXACT) -> Tuple[List[DtoType], int]:
+        """
+        获取分页列表和记录总数，参数与返回值同BaseDao.get_page_with_total
+            page_size: 每页大小
+            page_num: 页码
+            filters: 查询条件DTO
+            sort_by: 排序字段
+            count_mode: 计数模式 exact/cached/estimated
+        """
+        return await self._run_in_session(self._get_page_with_total, page_size, page_num, filters, sort_by, count_mode)
+
+    async def get_list_by_cursor(self, page_size: int, cursor: Optional[str] = None, filters: DtoType = None, sort_by: List[str] = None) -> Tuple[List[DtoType], Optional[str]]:
+        """
+        游标分页（keyset分页）获取列表，参数与返回值同BaseDao.get_list_by_cursor
+            page_size: 每页大小
+            cursor: 分页游标。第一页传None，之后传上一页返回的next_cursor
+            filters: 查询条件DTO
+            sort_by: 排序字段。会自动追加id作为最后一个排序字段
+        """
+        return await self._run_in_session(self._get_list_by_cursor, page_size, cursor, filters, sort_by)
+
+    async def get_total_by_filters(self, filters: DtoType = None) -> int:
+        """
+        获取记录总数（dto形式）
+            filters: 查询条件DTO。例如 XXXDTO(filed1=value1, filed2=value2)
+        """
+        return await self._run_in_session(self._get_total_by_filters, filters)
+
+    async def get_by_id(self, id: int) -> DtoType:
+        """
+        根据ID获取单条记录
+            id: 记录ID
+        """
+        return await self._run_in_session(self._get_by_id, id)
+
+    async def get_list_by_filters(self, filters: DtoType = None, sort_by: List[str] = None, fields: List[str] = None, as_dict: bool = False) -> List[Union[DtoType, Row, Dict[str, Any]]]:
+        """
+        根据条件查询列表（dto形式）
+            filters: 查询条件DTO。例如 XXXDTO(filed1=value1, filed2=value2)
+            sort_by: 排序字段，是一个字符串列表。例如 ["field1", "-field2"] 表示按field1升序，按field2降序排序。
+            fields: 只查询的字段列表，传入后返回Row列表（as_dict为True时返回字典列表）
+            as_dict: 传入fields时，是否将每一行转换为字典
+        """
+        return await self._run_in_session(self._get_list_by_filters, filters, sort_by, fields, as_dict)
+
+    async def get_one_by_filters(self, filters: DtoType = None, fields: List[str] = None, as_dict: bool = False) -> Union[DtoType, Row, Dict[str, Any]]:
+        """
+        根据条件获取单条记录（dto形式）
+            filters: 查询条件DTO。例如 XXXDTO(field1=value1, field2=value2)
+            fields: 只查询的字段列表，传入后返回Row（as_dict为True时返回字典）
+            as_dict: 传入fields时，是否将结果转换为字典
+        """
+        return await self._run_in_session(self._get_one_by_filters, filters, fields, as_dict)
+
+    async def update_by_id(self, id: int, update_data: DtoType) -> bool:
+        """
+        根据ID更新信息（dto形式）
+            id: 要更新的记录ID
+            update_date: 更新数据DTO
+        """
+        return await self._run_in_session(self._update_by_id, id, update_data)
+
+    async def delete_by_id(self, id: int) -> bool:
+        """
+        根据ID删除记录
+            id: 要删除的记录ID
+        """
+        return await self._run_in_session(self._delete_by_id, id)
+
+    async def add(self, data: DtoType = None) -> DtoType:
+        """
+        添加新记录(DTO形式)
+            data: 添加数据DTO
+        """
+        if data is None:
+            return None
+        return await self._run_in_session(self._add, data)
+
+    async def add_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+        """
+        批量添加记录，参数与返回值同BaseDao.add_many
+            data_list: DTO或字典列表
+            chunk_size: 每条INSERT语句最多包含的记录数
+            return_ids: 是否返回新记录的id列表
+        """
+        if not data_list:
+            return [] if return_ids else 0
+        return await self._run_in_session(self._add_many, data_list, chunk_size, return_ids)
+
+    async def update_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        根据ID批量更新记录，参数与返回值同BaseDao.update_many
+            data_list: DTO或字典列表，每一项都必须包含id字段
+            chunk_size: 每批executemany最多包含的记录数
+        """
+        if not data_list:
+            return 0
+        return await self._run_in_session(self._update_many, data_list, chunk_size)
+
+    async def upsert_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], update_fields: List[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        批量新增或更新记录，参数与返回值同BaseDao.upsert_many
+            data_list: DTO或字典列表
+            update_fields: 冲突时需要更新的字段
+            chunk_size: 每条INSERT语句最多包含的记录数
+        """
+        if not data_list:
+            return 0
+        return await self._run_in_session(self._upsert_many, data_list, update_fields, chunk_size)
+
+    async def delete_many(self, ids: List[int], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        根据ID列表批量删除记录，参数与返回值同BaseDao.delete_many
+            ids: 要删除的记录ID列表
+            chunk_size: 每条DELETE语句的IN列表最多包含的ID数
+        """
+        if not ids:
+            return 0
+        return await self._run_in_session(self._delete_many, ids, chunk_size)
+
+    async def session_execute_query(self, query_func, fields: List[str] = None, as_dict: bool = False):
+        """
+        session_execute_query方法用于执行自定义的高级查询操作，可以直接使用sqlalchemy的内置方法进行查询
+        参数:
+            query_func: 接收db_session的查询函数，写法与BaseDao.session_execute_query相同
+            fields: 只查询的字段列表。query_func返回未执行的Query对象时生效
+            as_dict: 是否将Row列表中的每一行转换为字典
+        返回:
+            查询结果
+
+        调用示例
+        async def get_all():
+            return await session_execute_query(lambda db_session: db_session.query(self.model).all())
+        """
+        return await self._run_in_session(self._session_execute_query, query_func, fields, as_dict)
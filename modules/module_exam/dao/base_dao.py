@@ -1,22 +1,62 @@
-from typing import List, Optional, Generic, TypeVar, Type, Dict, Any, Callable
+from typing import List, Optional, Generic, TypeVar, Type, Dict, Any, Callable, Tuple, Union
 from pydantic import BaseModel
-from sqlalchemy import asc, desc, text
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import asc, desc, and_, or_, func, DateTime, insert, update, delete, bindparam, select, table as sql_table, column as sql_column
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Row
+from sqlalchemy.orm import DeclarativeBase, Session, Query
 from datetime import datetime
+from contextlib import contextmanager
+import base64
+import json
 
 # 导入数据库会话工厂
-from config.database_config import session_maker
+from config.database_config import session_maker, current_db_session
+from utils.cache_util import TTLCache
+from .model_converter import get_model_converter
 
 # 定义泛型
 ModelType = TypeVar("ModelType", bound=DeclarativeBase)
 DtoType = TypeVar("DtoType", bound=BaseModel)
 
+# 记录总数的计数模式
+COUNT_MODE_EXACT = "exact"          # 精确计数，与分页数据在同一条SQL中通过 COUNT(*) OVER() 得到（MySQL 5.7 单独count）
+COUNT_MODE_CACHED = "cached"        # 缓存计数，总数在缓存有效期内复用，适合总数变化不敏感的列表
+COUNT_MODE_ESTIMATED = "estimated"  # 估算计数，无查询条件时读取MySQL表统计信息，否则退化为缓存计数
+
+# 记录总数缓存，key为(表名, 查询条件)，供cached/estimated计数模式使用
+total_count_cache = TTLCache(maxsize=1024, ttl=60)
+
+# 批量写入时每条SQL最多包含的记录数
+DEFAULT_CHUNK_SIZE = 500
+
+
+def supports_window_functions(dialect) -> bool:
+    """
+    数据库是否支持窗口函数（COUNT(*) OVER()）。MySQL 8.0、MariaDB 10.2、SQLite 3.25 开始支持，MySQL 5.7 不支持
+    数据库版本号在第一次连接后才能取到，取不到时按不支持处理
+    """
+    version = dialect.server_version_info or ()
+    if dialect.name == "mysql":
+        return version >= ((10, 2) if getattr(dialect, "is_mariadb", False) else (8, 0))
+    if dialect.name == "sqlite":
+        return version >= (3, 25)
+    return True
+
 class BaseDao(Generic[ModelType, DtoType]):
     """
     基础数据访问对象类
     提供通用的CRUD操作，专注于数据访问层，不包含业务逻辑、日志和异常处理
 
     其中session_execute_query方法用于执行自定义的高级查询操作，可以直接使用sqlalchemy的内置方法进行查询
+
+    每个公开方法都由两部分组成：
+        _xxx(db_session, ...)：在传入的db_session中执行具体的数据库操作，只flush不提交
+        xxx(...)：负责获取会话，然后调用_xxx方法
+    异步数据访问对象AsyncBaseDao复用这些_xxx方法，只替换了会话的获取方式
+
+    在unit_of_work()中调用时，复用工作单元绑定的会话，由工作单元统一提交；否则每次调用创建新会话并在结束时提交
+    配置了从库时，会话（RoutingSession）将读操作（get_xxx、session_execute_query中的SELECT）路由到从库，写操作路由到主库，
+    详见 config/database_config.py
     """
     def __init__(self, model: Type[ModelType], dto: Type[DtoType]):
         """
@@ -26,10 +66,26 @@ class BaseDao(Generic[ModelType, DtoType]):
         """
         self.model = model
         self.dto = dto
+        # 模型实例转DTO的转换器，同一组(模型类, DTO类)只编译一次
+        self.converter = get_model_converter(model, dto)
+
+    @contextmanager
+    def _session_scope(self):
+        """
+        获取执行数据库操作的会话
+        当前处于工作单元中时复用工作单元的会话（由工作单元负责提交和回滚），否则创建新会话
+        """
+        db_session = current_db_session.get()
+        if db_session is not None:
+            yield db_session
+        else:
+            with session_maker() as db_session:
+                yield db_session
 
     def _model_to_dict__(self, model: ModelType) -> Dict[str, Any]:
         """
         将SQLAlchemy模型实例转换为字典，自动将SQLAlchemy模型实例中datetime类型的字段转换为字符串
+        DAO内部的模型转DTO已改用self.converter，该方法仅为兼容保留
         """
         model_dict = {}
         for column in model.__table__.columns:
@@ -64,10 +120,30 @@ class BaseDao(Generic[ModelType, DtoType]):
             输入: SQLAlchemy 模型实例
             输出: Pydantic 模型实例
         """
-        # 先将SQLAlchemy模型实例转换为字典
-        model_dict = self._model_to_dict__(model)
-        # 然后使用model_validate方法将字典转换为Pydantic模型实例
-        return self.dto.model_validate(model_dict)
+        # 数据来自本系统数据库，字段类型已由表结构保证，直接构建DTO实例，不再逐字段校验
+        return self.converter.to_dto(model)
+
+    def _resolve_columns(self, fields: List[str]) -> list:
+        """
+        将字段名列表转换为模型类的列对象列表，用于只查询部分字段
+            fields: 字段名列表。例如 ["id", "name"]
+        """
+        table_columns = self.model.__table__.columns
+        unknown_fields = [field for field in fields if field not in table_columns]
+        if unknown_fields:
+            raise ValueError(f"{self.model.__tablename__} 表中不存在字段: {unknown_fields}")
+        return [getattr(self.model, field) for field in fields]
+
+    @staticmethod
+    def _rows_to_result(rows: list, as_dict: bool = False) -> list:
+        """
+        处理只查询部分字段得到的Row列表
+        Row是轻量的类元组对象，不经过ORM的实例化和身份映射，可以通过下标或字段名访问。例如 row[0]、row.id
+            as_dict: 是否将每一行转换为普通字典
+        """
+        if as_dict:
+            return [row._asdict() for row in rows]
+        return rows
 
 
     def get_page_list_by_filters(self, page_size: int, page_num: int, filters: DtoType = None, sort_by: List[str] = None) -> List[DtoType]:
@@ -78,38 +154,41 @@ class BaseDao(Generic[ModelType, DtoType]):
             filters: 查询条件DTO。例如 XXXDTO(field1=value1, field2=value2)
             sort_by: 排序字段，是一个字符串列表。例如 ["field1", "-field2"] 表示按field1升序，按field2降序排序。
         """
-        with session_maker() as db_session:
-            query = db_session.query(self.model)
-
-            # 动态构建查询条件
-            if filters:
-                # 将DTO转换为字典，过滤出非None值的字段
-                filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
-                for field, value in filters_dict.items():
-                    if hasattr(self.model, field) and value is not None:
-                            query = query.filter(getattr(self.model, field) == value)
-
-            # 动态构建排序条件
-            if sort_by:
-                # 遍历排序字段列表
-                for sort_field in sort_by:
-                    # 判断排序方向
-                    if sort_field.startswith('-'):
-                        # 降序
-                        field_name = sort_field[1:]
-                        if hasattr(self.model, field_name):
-                            query = query.order_by(desc(getattr(self.model, field_name)))
-                    else:
-                        # 升序
-                        if hasattr(self.model, sort_field):
-                            query = query.order_by(asc(getattr(self.model, sort_field)))
-
-            # 计算分页偏移量
-            offset_value = (page_num - 1) * page_size
-            # 获取当前分页数据
-            records = query.offset(offset_value).limit(page_size).all()
-            # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回
-            return [self.__model_to_dto__(record) for record in records]
+        with self._session_scope() as db_session:
+            return self._get_page_list_by_filters(db_session, page_size, page_num, filters, sort_by)
+
+    def _get_page_list_by_filters(self, db_session: Session, page_size: int, page_num: int, filters: DtoType = None, sort_by: List[str] = None) -> List[DtoType]:
+        query = db_session.query(self.model)
+
+        # 动态构建查询条件
+        if filters:
+            # 将DTO转换为字典，过滤出非None值的字段
+            filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
+            for field, value in filters_dict.items():
+                if hasattr(self.model, field) and value is not None:
+                        query = query.filter(getattr(self.model, field) == value)
+
+        # 动态构建排序条件
+        if sort_by:
+            # 遍历排序字段列表
+            for sort_field in sort_by:
+                # 判断排序方向
+                if sort_field.startswith('-'):
+                    # 降序
+                    field_name = sort_field[1:]
+                    if hasattr(self.model, field_name):
+                        query = query.order_by(desc(getattr(self.model, field_name)))
+                else:
+                    # 升序
+                    if hasattr(self.model, sort_field):
+                        query = query.order_by(asc(getattr(self.model, sort_field)))
+
+        # 计算分页偏移量
+        offset_value = (page_num - 1) * page_size
+        # 获取当前分页数据
+        records = query.offset(offset_value).limit(page_size).all()
+        # 通过转换器将sqlAlchemy模型实例列表转换为DTO实例列表,并返回
+        return self.converter.to_dto_list(records)
 
 
     def get_page_list_by_filters_as_dict(self, page_size: int, page_num: int, filters: Dict = None, sort_by: List[str] = None) -> List[DtoType]:
@@ -120,36 +199,252 @@ class BaseDao(Generic[ModelType, DtoType]):
             filters: 查询条件字典。例如 {"filed1": value1, "filed2": value2}
             sort_by: 排序字段，是一个字符串列表。例如 ["field1", "-field2"] 表示按field1升序，按field2降序排序。
         """
-        with session_maker() as db_session:
-            query = db_session.query(self.model)
-
-            # 动态构建查询条件
-            if filters:
-                for field, value in filters.items():
-                    if hasattr(self.model, field) and value is not None:
-                            query = query.filter(getattr(self.model, field) == value)
-
-            # 动态构建排序条件
-            if sort_by:
-                # 遍历排序字段列表
-                for sort_field in sort_by:
-                    # 判断排序方向
-                    if sort_field.startswith('-'):
-                        # 降序
-                        field_name = sort_field[1:]
-                        if hasattr(self.model, field_name):
-                            query = query.order_by(desc(getattr(self.model, field_name)))
-                    else:
-                        # 升序
-                        if hasattr(self.model, sort_field):
-                            query = query.order_by(asc(getattr(self.model, sort_field)))
-
-            # 计算分页偏移量
-            offset_value = (page_num - 1) * page_size
-            # 获取当前分页数据
+        with self._session_scope() as db_session:
+            return self._get_page_list_by_filters_as_dict(db_session, page_size, page_num, filters, sort_by)
+
+    def _get_page_list_by_filters_as_dict(self, db_session: Session, page_size: int, page_num: int, filters: Dict = None, sort_by: List[str] = None) -> List[DtoType]:
+        query = db_session.query(self.model)
+
+        # 动态构建查询条件
+        if filters:
+            for field, value in filters.items():
+                if hasattr(self.model, field) and value is not None:
+                        query = query.filter(getattr(self.model, field) == value)
+
+        # 动态构建排序条件
+        if sort_by:
+            # 遍历排序字段列表
+            for sort_field in sort_by:
+                # 判断排序方向
+                if sort_field.startswith('-'):
+                    # 降序
+                    field_name = sort_field[1:]
+                    if hasattr(self.model, field_name):
+                        query = query.order_by(desc(getattr(self.model, field_name)))
+                else:
+                    # 升序
+                    if hasattr(self.model, sort_field):
+                        query = query.order_by(asc(getattr(self.model, sort_field)))
+
+        # 计算分页偏移量
+        offset_value = (page_num - 1) * page_size
+        # 获取当前分页数据
+        records = query.offset(offset_value).limit(page_size).all()
+        # 通过转换器将sqlAlchemy模型实例列表转换为DTO实例列表,并返回
+        return self.converter.to_dto_list(records)
+
+
+    def get_page_with_total(self, page_size: int, page_num: int, filters: DtoType = None, sort_by: List[str] = None, count_mode: str = COUNT_MODE_EXACT) -> Tuple[List[DtoType], int]:
+        """
+        获取分页列表和记录总数，只使用一个会话
+            page_size: 每页大小
+            page_num: 页码
+            filters: 查询条件DTO。例如 XXXDTO(field1=value1, field2=value2)
+            sort_by: 排序字段，写法同get_page_list_by_filters
+            count_mode: 计数模式
+                exact: 默认。通过 COUNT(*) OVER() 窗口函数，在查询分页数据的同一条SQL中得到精确总数。
+                       数据库不支持窗口函数时（MySQL 5.7）单独执行一次count查询
+                cached: 总数从缓存中读取，缓存不存在时执行一次count查询并缓存60秒
+                estimated: 无查询条件时读取MySQL的表统计信息（近似值），有查询条件时同cached
+        返回:
+            (当前页DTO列表, 记录总数)
+        """
+        with self._session_scope() as db_session:
+            return self._get_page_with_total(db_session, page_size, page_num, filters, sort_by, count_mode)
+
+    def _get_page_with_total(self, db_session: Session, page_size: int, page_num: int, filters: DtoType = None, sort_by: List[str] = None, count_mode: str = COUNT_MODE_EXACT) -> Tuple[List[DtoType], int]:
+        if count_mode not in (COUNT_MODE_EXACT, COUNT_MODE_CACHED, COUNT_MODE_ESTIMATED):
+            raise ValueError(f"不支持的计数模式: {count_mode}")
+
+        query = db_session.query(self.model)
+
+        # 动态构建查询条件
+        filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True) if filters else {}
+        filters_dict = {field: value for field, value in filters_dict.items() if hasattr(self.model, field)}
+        for field, value in filters_dict.items():
+            query = query.filter(getattr(self.model, field) == value)
+        count_query = query
+
+        # 动态构建排序条件
+        for sort_field in sort_by or []:
+            is_desc = sort_field.startswith('-')
+            field_name = sort_field[1:] if is_desc else sort_field
+            if hasattr(self.model, field_name):
+                column = getattr(self.model, field_name)
+                query = query.order_by(desc(column) if is_desc else asc(column))
+
+        # 计算分页偏移量
+        offset_value = (page_num - 1) * page_size
+
+        if count_mode == COUNT_MODE_EXACT and not supports_window_functions(db_session.bind.dialect):
+            # 不支持窗口函数，分页数据和总数分两次查询
+            records = query.offset(offset_value).limit(page_size).all()
+            total = count_query.count()
+        elif count_mode == COUNT_MODE_EXACT:
+            # 每行附带窗口函数计算出的总数，总数在limit之前计算，因此等于符合条件的全部记录数
+            rows = query.add_columns(func.count().over().label("total_count")).offset(offset_value).limit(page_size).all()
+            if rows:
+                total = rows[0].total_count
+            elif page_num > 1:
+                # 页码超出范围时没有返回行，单独查询总数
+                total = count_query.count()
+            else:
+                total = 0
+            records = [row[0] for row in rows]
+        else:
             records = query.offset(offset_value).limit(page_size).all()
-            # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回
-            return [self.__model_to_dto__(record) for record in records]
+            total = self._get_cached_or_estimated_total(db_session, count_query, filters_dict, count_mode)
+
+        # 通过转换器将sqlAlchemy模型实例列表转换为DTO实例列表,并返回
+        return self.converter.to_dto_list(records), total
+
+    def _get_cached_or_estimated_total(self, db_session: Session, count_query: Query, filters_dict: Dict[str, Any], count_mode: str) -> int:
+        """
+        获取缓存的或估算的记录总数
+        """
+        # 估算模式：无查询条件时读取MySQL表统计信息中的行数，该值为InnoDB的近似值
+        if count_mode == COUNT_MODE_ESTIMATED and not filters_dict and db_session.bind.dialect.name == "mysql":
+            # 使用select()而不是原生SQL：读写分离会话把原生SQL当作写操作，会发送到主库并触发主库粘滞
+            tables = sql_table("TABLES", sql_column("TABLE_ROWS"), sql_column("TABLE_SCHEMA"), sql_column("TABLE_NAME"), schema="information_schema")
+            table_rows = db_session.execute(
+                select(tables.c.TABLE_ROWS).where(tables.c.TABLE_SCHEMA == func.database(), tables.c.TABLE_NAME == self.model.__tablename__)
+            ).scalar()
+            if table_rows is not None:
+                return int(table_rows)
+
+        # 缓存模式：缓存中不存在时，执行count查询并写入缓存
+        cache_key = (self.model.__tablename__, tuple(sorted(filters_dict.items())))
+        total = total_count_cache.get(cache_key)
+        if total is None:
+            total = count_query.count()
+            total_count_cache.set(cache_key, total)
+        return total
+
+    def get_list_by_cursor(self, page_size: int, cursor: Optional[str] = None, filters: DtoType = None, sort_by: List[str] = None) -> Tuple[List[DtoType], Optional[str]]:
+        """
+        游标分页（keyset分页）获取列表
+        不使用offset，而是根据上一页最后一条记录的排序字段值定位下一页，因此翻到第N页的开销与第1页相同
+            page_size: 每页大小
+            cursor: 分页游标。第一页传None，之后传上一页返回的next_cursor
+            filters: 查询条件DTO。例如 XXXDTO(field1=value1, field2=value2)
+            sort_by: 排序字段，写法同get_page_list_by_filters。会自动追加id作为最后一个排序字段，保证排序唯一
+        返回:
+            (当前页DTO列表, 下一页游标)。没有下一页时游标为None
+        注意：排序字段应为非空字段，游标只能用于生成它时所用的sort_by
+        """
+        with self._session_scope() as db_session:
+            return self._get_list_by_cursor(db_session, page_size, cursor, filters, sort_by)
+
+    def _get_list_by_cursor(self, db_session: Session, page_size: int, cursor: Optional[str] = None, filters: DtoType = None, sort_by: List[str] = None) -> Tuple[List[DtoType], Optional[str]]:
+        query = db_session.query(self.model)
+
+        # 动态构建查询条件
+        if filters:
+            # 将DTO转换为字典，过滤出非None值的字段
+            filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
+            for field, value in filters_dict.items():
+                if hasattr(self.model, field) and value is not None:
+                        query = query.filter(getattr(self.model, field) == value)
+
+        # 追加游标条件、排序条件，并多查询一条记录用于判断是否还有下一页
+        records = self.apply_cursor_pagination(query, page_size, cursor, sort_by).all()
+        # 通过转换器将sqlAlchemy模型实例列表转换为DTO实例列表
+        dto_list = self.converter.to_dto_list(records)
+        return self.build_cursor_page(dto_list, page_size, sort_by)
+
+    def _resolve_cursor_sort_keys(self, sort_by: List[str] = None) -> List[Tuple[str, bool]]:
+        """
+        将sort_by解析为游标分页使用的排序键列表 [(字段名, 是否降序), ...]
+        若sort_by中没有id字段，则追加id字段（方向与最后一个排序字段相同），保证排序结果唯一
+        """
+        sort_keys: List[Tuple[str, bool]] = []
+        for sort_field in sort_by or []:
+            is_desc = sort_field.startswith('-')
+            field_name = sort_field[1:] if is_desc else sort_field
+            if hasattr(self.model, field_name):
+                sort_keys.append((field_name, is_desc))
+        if not any(field_name == 'id' for field_name, _ in sort_keys):
+            sort_keys.append(('id', sort_keys[-1][1] if sort_keys else False))
+        return sort_keys
+
+    def _encode_cursor(self, sort_keys: List[Tuple[str, bool]], values: List[Any]) -> str:
+        """
+        将排序键和对应的字段值编码为不透明的游标字符串
+        """
+        payload = {
+            "s": [('-' if is_desc else '') + field_name for field_name, is_desc in sort_keys],
+            "v": [value.isoformat() if isinstance(value, datetime) else value for value in values],
+        }
+        raw = json.dumps(payload, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+        return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+    def _decode_cursor(self, sort_keys: List[Tuple[str, bool]], cursor: str) -> List[Any]:
+        """
+        解码游标字符串，返回各排序字段的值。游标与当前排序键不匹配时抛出ValueError
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+            payload = json.loads(raw.decode('utf-8'))
+            sort_spec, values = payload["s"], payload["v"]
+        except Exception as e:
+            raise ValueError(f"无效的分页游标: {cursor}") from e
+
+        if sort_spec != [('-' if is_desc else '') + field_name for field_name, is_desc in sort_keys] or len(values) != len(sort_keys):
+            raise ValueError(f"分页游标与排序字段不匹配: {cursor}")
+
+        # 将datetime类型字段的字符串值还原为datetime
+        decoded = []
+        for (field_name, _), value in zip(sort_keys, values):
+            column = self.model.__table__.columns[field_name]
+            if value is not None and isinstance(column.type, DateTime):
+                value = datetime.fromisoformat(value)
+            decoded.append(value)
+        return decoded
+
+    def apply_cursor_pagination(self, query: Query, page_size: int, cursor: Optional[str] = None, sort_by: List[str] = None) -> Query:
+        """
+        为查询追加游标分页所需的定位条件、排序条件和limit，可用于session_execute_query中的自定义查询
+            query: 已经添加过查询条件的Query对象
+            page_size: 每页大小。实际会多查询一条，用于判断是否还有下一页
+            cursor: 上一页返回的游标，第一页传None
+            sort_by: 排序字段，写法同get_page_list_by_filters
+        查询结果需要再交给build_cursor_page处理，得到当前页数据和下一页游标
+        """
+        sort_keys = self._resolve_cursor_sort_keys(sort_by)
+
+        if cursor:
+            values = self._decode_cursor(sort_keys, cursor)
+            # 构建定位条件：(k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...  降序字段使用 <
+            seek_conditions = []
+            for i, (field_name, is_desc) in enumerate(sort_keys):
+                column = getattr(self.model, field_name)
+                equal_conditions = [getattr(self.model, sort_keys[j][0]) == values[j] for j in range(i)]
+                compare_condition = column < values[i] if is_desc else column > values[i]
+                seek_conditions.append(and_(*equal_conditions, compare_condition))
+            query = query.filter(or_(*seek_conditions))
+
+        for field_name, is_desc in sort_keys:
+            column = getattr(self.model, field_name)
+            query = query.order_by(desc(column) if is_desc else asc(column))
+
+        return query.limit(page_size + 1)
+
+    def build_cursor_page(self, records: List[Any], page_size: int, sort_by: List[str] = None) -> Tuple[List[Any], Optional[str]]:
+        """
+        根据apply_cursor_pagination的查询结果，截取当前页数据并生成下一页游标
+            records: 查询结果列表，元素可以是DTO、模型实例或Row，只需要能通过属性访问排序字段
+            page_size: 每页大小
+            sort_by: 排序字段，需要与apply_cursor_pagination中使用的一致
+        返回:
+            (当前页数据, 下一页游标)。没有下一页时游标为None
+        """
+        if len(records) <= page_size:
+            return records, None
+        page = records[:page_size]
+        sort_keys = self._resolve_cursor_sort_keys(sort_by)
+        last = page[-1]
+        next_cursor = self._encode_cursor(sort_keys, [getattr(last, field_name) for field_name, _ in sort_keys])
+        return page, next_cursor
 
 
     def get_total_by_filters(self, filters: DtoType = None) -> int:
@@ -157,88 +452,110 @@ class BaseDao(Generic[ModelType, DtoType]):
         获取记录总数（dto形式）
             filters: 查询条件DTO。例如 XXXDTO(filed1=value1, filed2=value2)
         """
-        with session_maker() as db_session:
-            query = db_session.query(self.model)
+        with self._session_scope() as db_session:
+            return self._get_total_by_filters(db_session, filters)
+
+    def _get_total_by_filters(self, db_session: Session, filters: DtoType = None) -> int:
+        query = db_session.query(self.model)
 
-            # 动态构建查询条件
-            if filters:
-                # 将DTO转换为字典，过滤出非None值的字段
-                filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
-                for field, value in filters_dict.items():
-                    if hasattr(self.model, field) and value is not None:
-                            query = query.filter(getattr(self.model, field) == value)
+        # 动态构建查询条件
+        if filters:
+            # 将DTO转换为字典，过滤出非None值的字段
+            filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
+            for field, value in filters_dict.items():
+                if hasattr(self.model, field) and value is not None:
+                        query = query.filter(getattr(self.model, field) == value)
 
-            return query.count()
+        return query.count()
 
     def get_by_id(self, id: int) -> DtoType:
         """
         根据ID获取单条记录
             id: 记录ID
         """
-        with session_maker() as db_session:
-            # 查询单条记录
-            record = db_session.query(self.model).filter(self.model.id == id).first()
-            # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回DTO数据
-            return self.__model_to_dto__(record) if record else None
+        with self._session_scope() as db_session:
+            return self._get_by_id(db_session, id)
 
-    def get_list_by_filters(self, filters: DtoType = None,sort_by: List[str] = None) -> List[DtoType]:
+    def _get_by_id(self, db_session: Session, id: int) -> DtoType:
+        # 查询单条记录
+        record = db_session.query(self.model).filter(self.model.id == id).first()
+        # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回DTO数据
+        return self.__model_to_dto__(record) if record else None
+
+    def get_list_by_filters(self, filters: DtoType = None,sort_by: List[str] = None, fields: List[str] = None, as_dict: bool = False) -> List[Union[DtoType, Row, Dict[str, Any]]]:
         """
         根据条件查询列表（dto形式）
             filters: 查询条件DTO，内部会将其转换为字典形式。例如 XXXDTO(filed1=value1, filed2=value2)
             sort_by: 排序字段，是一个字符串列表。例如 ["field1", "-field2"] 表示按field1升序，按field2降序排序。
+            fields: 只查询的字段列表。例如 ["id"]。传入后返回Row列表（as_dict为True时返回字典列表），不再返回DTO列表
+            as_dict: 传入fields时，是否将每一行转换为字典
         """
-        with session_maker() as db_session:
-            query = db_session.query(self.model)
-
-            # 动态构建查询条件
-            if filters:
-                # 将DTO转换为字典，过滤出非None值的字段
-                filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
-                for field, value in filters_dict.items():
-                    if hasattr(self.model, field) and value is not None:
-                            query = query.filter(getattr(self.model, field) == value)
-
-            # 动态构建排序条件
-            if sort_by:
-                # 遍历排序字段列表
-                for sort_field in sort_by:
-                    # 判断排序方向
-                    if sort_field.startswith('-'):
-                        # 降序
-                        field_name = sort_field[1:]
-                        if hasattr(self.model, field_name):
-                            query = query.order_by(desc(getattr(self.model, field_name)))
-                    else:
-                        # 升序
-                        if hasattr(self.model, sort_field):
-                            query = query.order_by(asc(getattr(self.model, sort_field)))
-
-            # 执行查询并获取所有记录
-            records = query.all()
-            # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回DTO列表数据
-            return [self.__model_to_dto__(record) for record in records]
-
-    def get_one_by_filters(self, filters: DtoType = None) -> DtoType:
+        with self._session_scope() as db_session:
+            return self._get_list_by_filters(db_session, filters, sort_by, fields, as_dict)
+
+    def _get_list_by_filters(self, db_session: Session, filters: DtoType = None, sort_by: List[str] = None, fields: List[str] = None, as_dict: bool = False) -> List[Union[DtoType, Row, Dict[str, Any]]]:
+        # 传入fields时只查询这些字段，否则查询整个模型
+        query = db_session.query(*self._resolve_columns(fields)) if fields else db_session.query(self.model)
+
+        # 动态构建查询条件
+        if filters:
+            # 将DTO转换为字典，过滤出非None值的字段
+            filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
+            for field, value in filters_dict.items():
+                if hasattr(self.model, field) and value is not None:
+                        query = query.filter(getattr(self.model, field) == value)
+
+        # 动态构建排序条件
+        if sort_by:
+            # 遍历排序字段列表
+            for sort_field in sort_by:
+                # 判断排序方向
+                if sort_field.startswith('-'):
+                    # 降序
+                    field_name = sort_field[1:]
+                    if hasattr(self.model, field_name):
+                        query = query.order_by(desc(getattr(self.model, field_name)))
+                else:
+                    # 升序
+                    if hasattr(self.model, sort_field):
+                        query = query.order_by(asc(getattr(self.model, sort_field)))
+
+        # 执行查询并获取所有记录
+        records = query.all()
+        if fields:
+            return self._rows_to_result(records, as_dict)
+        # 通过转换器将sqlAlchemy模型实例列表转换为DTO实例列表,并返回DTO列表数据
+        return self.converter.to_dto_list(records)
+
+    def get_one_by_filters(self, filters: DtoType = None, fields: List[str] = None, as_dict: bool = False) -> Union[DtoType, Row, Dict[str, Any]]:
         """
         根据条件获取单条记录（dto形式）
             filters: 查询条件DTO，内部会将其转换为字典形式，然后再根据字典构建查询条件。
             例如 XXXDTO(field1=value1, field2=value2)
+            fields: 只查询的字段列表。传入后返回Row（as_dict为True时返回字典），不再返回DTO
+            as_dict: 传入fields时，是否将结果转换为字典
         """
-        with session_maker() as db_session:
-            query = db_session.query(self.model)
+        with self._session_scope() as db_session:
+            return self._get_one_by_filters(db_session, filters, fields, as_dict)
+
+    def _get_one_by_filters(self, db_session: Session, filters: DtoType = None, fields: List[str] = None, as_dict: bool = False) -> Union[DtoType, Row, Dict[str, Any]]:
+        # 传入fields时只查询这些字段，否则查询整个模型
+        query = db_session.query(*self._resolve_columns(fields)) if fields else db_session.query(self.model)
 
-            # 动态构建查询条件
-            if filters:
-                # 将DTO转换为字典，过滤出非None值的字段
-                filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
-                for field, value in filters_dict.items():
-                    if hasattr(self.model, field) and value is not None:
-                            query = query.filter(getattr(self.model, field) == value)
+        # 动态构建查询条件
+        if filters:
+            # 将DTO转换为字典，过滤出非None值的字段
+            filters_dict = filters.model_dump(exclude_unset=True, exclude_none=True)
+            for field, value in filters_dict.items():
+                if hasattr(self.model, field) and value is not None:
+                        query = query.filter(getattr(self.model, field) == value)
 
-            # 执行查询并获取第一条记录
-            record = query.first()
-            # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回DTO数据
-            return self.__model_to_dto__(record) if record else None
+        # 执行查询并获取第一条记录
+        record = query.first()
+        if fields:
+            return record._asdict() if as_dict and record else record
+        # 通过__model_to_dto__方法将sqlAlchemy模型实例转换为DTO实例,并返回DTO数据
+        return self.__model_to_dto__(record) if record else None
 
 
     def update_by_id(self, id: int, update_data: DtoType) -> bool:
@@ -247,32 +564,36 @@ class BaseDao(Generic[ModelType, DtoType]):
             id: 要更新的记录ID
             update_date: 更新数据DTO
         """
-        with session_maker() as db_session:
-            # 先获取model模型类的所有字段名
-            # 然后将DTO转换为字典，过滤出model模型类中存在的字段
-            model_fields = {col.name for col in self.model.__table__.columns}
-            update_data_dict = update_data.model_dump(exclude_unset=True, exclude_none=True)
-            new_update_data = {k: v for k, v in update_data_dict.items() if k in model_fields}
+        with self._session_scope() as db_session:
+            return self._update_by_id(db_session, id, update_data)
 
-            if not new_update_data:
-                return True  # 没有需要更新的字段，视为成功
+    def _update_by_id(self, db_session: Session, id: int, update_data: DtoType) -> bool:
+        # 先获取model模型类的所有字段名
+        # 然后将DTO转换为字典，过滤出model模型类中存在的字段
+        model_fields = {col.name for col in self.model.__table__.columns}
+        update_data_dict = update_data.model_dump(exclude_unset=True, exclude_none=True)
+        new_update_data = {k: v for k, v in update_data_dict.items() if k in model_fields}
+
+        if not new_update_data:
+            return True  # 没有需要更新的字段，视为成功
 
-            # 执行更新并获取受影响的行数
-            affected_rows = db_session.query(self.model).filter(self.model.id == id).update(new_update_data)
-            db_session.commit()  # 显式提交事务
-            return affected_rows > 0
+        # 执行更新并获取受影响的行数。事务由会话上下文统一提交
+        affected_rows = db_session.query(self.model).filter(self.model.id == id).update(new_update_data)
+        return affected_rows > 0
 
     def delete_by_id(self, id: int) -> bool:
         """
         根据ID删除记录
             id: 要删除的记录ID
         """
-        with session_maker() as db_session:
-            # 执行删除并获取受影响的行数
-            # 如果受影响的行数为0，说明记录不存在。大于0说明删除成功
-            affected_rows = db_session.query(self.model).filter(self.model.id == id).delete()
-            db_session.commit()  # 显式提交事务
-            return affected_rows > 0
+        with self._session_scope() as db_session:
+            return self._delete_by_id(db_session, id)
+
+    def _delete_by_id(self, db_session: Session, id: int) -> bool:
+        # 执行删除并获取受影响的行数
+        # 如果受影响的行数为0，说明记录不存在。大于0说明删除成功
+        affected_rows = db_session.query(self.model).filter(self.model.id == id).delete()
+        return affected_rows > 0
 
     def add(self, data: DtoType=None) -> DtoType:
         """
@@ -282,52 +603,206 @@ class BaseDao(Generic[ModelType, DtoType]):
         if data is None:
             return None
 
-        with session_maker() as db_session:
-            # 遍历data，过滤出模型中存在的字段
-            model_fields = {col.name for col in self.model.__table__.columns}
-            model_data = data.model_dump(exclude_unset=True, exclude_none=True)
-            model_data = {k: v for k, v in model_data.items() if k in model_fields}
+        with self._session_scope() as db_session:
+            return self._add(db_session, data)
+
+    def _add(self, db_session: Session, data: DtoType) -> DtoType:
+        # 遍历data，过滤出模型中存在的字段
+        model_fields = {col.name for col in self.model.__table__.columns}
+        model_data = data.model_dump(exclude_unset=True, exclude_none=True)
+        model_data = {k: v for k, v in model_data.items() if k in model_fields}
+
+        # 将字典数据转换为模型实例
+        instance = self.model(**model_data)
+        db_session.add(instance)
+        db_session.flush()  # 执行INSERT获取自增id，事务由会话上下文统一提交
+        # 将sqlAlchemy模型实例转换为DTO返回，会返回包含ID的完整DTO数据
+        return self.__model_to_dto__(instance)
+
+
+    def _to_column_dict(self, data: Union[DtoType, Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        将DTO或字典转换为只包含模型字段的字典
+        DTO会过滤掉未设置和值为None的字段（与add、update_by_id一致），字典则保留传入的值
+        """
+        model_fields = self.model.__table__.columns.keys()
+        if isinstance(data, BaseModel):
+            data = data.model_dump(exclude_unset=True, exclude_none=True)
+        return {k: v for k, v in data.items() if k in model_fields}
+
+    def _group_rows_by_keys(self, rows: List[Dict[str, Any]], chunk_size: int) -> List[List[Dict[str, Any]]]:
+        """
+        将字典列表按字段集合分组，再按chunk_size切分为多个批次
+        同一批次中的字典字段相同，才能使用同一条executemany/多行VALUES语句
+        """
+        groups: Dict[Tuple[str, ...], List[Dict[str, Any]]] = {}
+        for row in rows:
+            groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+        return [group[i:i + chunk_size] for group in groups.values() for i in range(0, len(group), chunk_size)]
+
+    def add_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+        """
+        批量添加记录，所有记录在同一个事务中写入
+            data_list: DTO或字典列表
+            chunk_size: 每条INSERT语句最多包含的记录数，默认500
+            return_ids: 是否返回新记录的id列表
+        返回:
+            return_ids为False时返回写入的记录数，为True时返回与data_list顺序一致的id列表
+        注意：MySQL不支持INSERT ... RETURNING，return_ids为True时会逐条INSERT（仍在同一个事务中）
+        """
+        if not data_list:
+            return [] if return_ids else 0
+        with self._session_scope() as db_session:
+            return self._add_many(db_session, data_list, chunk_size, return_ids)
+
+    def _add_many(self, db_session: Session, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+        table = self.model.__table__
+        rows = [self._to_column_dict(data) for data in data_list]
+
+        if return_ids:
+            if db_session.bind.dialect.insert_executemany_returning:
+                # 数据库支持批量INSERT ... RETURNING，按原顺序分批写入并返回id
+                ids: List[int] = []
+                for i in range(0, len(rows), chunk_size):
+                    result = db_session.execute(insert(table).returning(table.c.id, sort_by_parameter_order=True), rows[i:i + chunk_size])
+                    ids.extend(result.scalars().all())
+                return ids
+            # 不支持RETURNING时（例如MySQL），逐条INSERT并读取自增id
+            return [db_session.execute(insert(table), row).inserted_primary_key[0] for row in rows]
+
+        # executemany方式写入，pymysql会将其改写为多行 INSERT ... VALUES (...), (...)
+        affected_rows = 0
+        for chunk in self._group_rows_by_keys(rows, chunk_size):
+            affected_rows += db_session.execute(insert(table), chunk).rowcount
+        return affected_rows
+
+    def update_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        根据ID批量更新记录，所有记录在同一个事务中更新
+            data_list: DTO或字典列表，每一项都必须包含id字段，其他字段为需要更新的值
+            chunk_size: 每批executemany最多包含的记录数，默认500
+        返回:
+            匹配到的记录数
+        """
+        if not data_list:
+            return 0
+        with self._session_scope() as db_session:
+            return self._update_many(db_session, data_list, chunk_size)
+
+    def _update_many(self, db_session: Session, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        table = self.model.__table__
+        rows = [self._to_column_dict(data) for data in data_list]
+        if any(row.get('id') is None for row in rows):
+            raise ValueError("update_many的每条数据都必须包含id")
+
+        affected_rows = 0
+        for chunk in self._group_rows_by_keys(rows, chunk_size):
+            update_fields = [field for field in chunk[0] if field != 'id']
+            if not update_fields:
+                continue
+            # UPDATE table SET f1=:f1, ... WHERE id=:_id  每条数据作为一组参数
+            stmt = update(table).where(table.c.id == bindparam('_id')).values({field: bindparam(field) for field in update_fields})
+            params = [{**{field: row[field] for field in update_fields}, '_id': row['id']} for row in chunk]
+            affected_rows += db_session.execute(stmt, params).rowcount
+        return affected_rows
+
+    def upsert_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], update_fields: List[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        批量新增或更新记录：记录不存在时插入，主键或唯一索引冲突时更新
+        MySQL使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite使用 INSERT ... ON CONFLICT(id) DO UPDATE
+            data_list: DTO或字典列表
+            update_fields: 冲突时需要更新的字段，默认为除id外传入的全部字段
+            chunk_size: 每条INSERT语句最多包含的记录数，默认500
+        返回:
+            处理的记录数
+        """
+        if not data_list:
+            return 0
+        with self._session_scope() as db_session:
+            return self._upsert_many(db_session, data_list, update_fields, chunk_size)
+
+    def _upsert_many(self, db_session: Session, data_list: List[Union[DtoType, Dict[str, Any]]], update_fields: List[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        table = self.model.__table__
+        dialect_name = db_session.bind.dialect.name
+        rows = [self._to_column_dict(data) for data in data_list]
+
+        for chunk in self._group_rows_by_keys(rows, chunk_size):
+            fields = update_fields or [field for field in chunk[0] if field != 'id']
+            if dialect_name == 'mysql':
+                stmt = mysql.insert(table).values(chunk)
+                stmt = stmt.on_duplicate_key_update({field: stmt.inserted[field] for field in fields})
+            elif dialect_name == 'sqlite':
+                stmt = sqlite.insert(table).values(chunk)
+                stmt = stmt.on_conflict_do_update(index_elements=[table.c.id], set_={field: stmt.excluded[field] for field in fields})
+            else:
+                raise NotImplementedError(f"upsert_many不支持当前数据库: {dialect_name}")
+            db_session.execute(stmt)
+        return len(rows)
+
+    def delete_many(self, ids: List[int], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        根据ID列表批量删除记录，所有记录在同一个事务中删除
+            ids: 要删除的记录ID列表
+            chunk_size: 每条DELETE语句的IN列表最多包含的ID数，默认500
+        返回:
+            删除的记录数
+        """
+        if not ids:
+            return 0
+        with self._session_scope() as db_session:
+            return self._delete_many(db_session, ids, chunk_size)
 
-            # 将字典数据转换为模型实例
-            instance = self.model(**model_data)
-            db_session.add(instance)
-            db_session.commit()  # 显式提交事务
-            # 将sqlAlchemy模型实例转换为DTO返回，会返回包含ID的完整DTO数据
-            return self.__model_to_dto__(instance)
+    def _delete_many(self, db_session: Session, ids: List[int], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        table = self.model.__table__
+        affected_rows = 0
+        for i in range(0, len(ids), chunk_size):
+            affected_rows += db_session.execute(delete(table).where(table.c.id.in_(ids[i:i + chunk_size]))).rowcount
+        return affected_rows
 
 
-    def session_execute_query(self, query_func):
+    def session_execute_query(self, query_func, fields: List[str] = None, as_dict: bool = False):
         """
         session_execute_query方法用于执行自定义的高级查询操作，可以直接使用sqlalchemy的内置方法进行查询
         参数:
             query_func: 接收db_session的查询函数
+            fields: 只查询的字段列表。query_func返回未执行的Query对象时生效，只查询这些字段并返回Row列表
+            as_dict: 是否将Row列表中的每一行转换为字典
         返回:
             查询结果
 
         调用示例
         def get_all():
             return session_execute_query(lambda db_session: db_session.query(self.model).all())
+        def get_all_id():
+            return session_execute_query(lambda db_session: db_session.query(self.model), fields=["id"])
         """
-        with session_maker() as db_session:
-            try:
-                result = query_func(db_session)
-                # 当为查询操作时，此处不会有变更需要提交。其他操作时需要显式调用commit()方法提交事务
-                # 这里只是为了符合事务的完整性，避免后续操作受到影响
-                db_session.commit()
-
-                print(result)
-
-                # 处理JOIN查询结果（包含多个模型实例的元组）
-                if isinstance(result, list) and result and isinstance(result[0], tuple):
-                    return result  # 直接返回原始结果，由调用方处理
-
-                # 转换为DTO
-                # 处理列表类型结果
-                if isinstance(result, list):
-                    return [self.__model_to_dto__(record) for record in result]
-                # 处理单个模型实例
-                elif isinstance(result, self.model):
-                    return self.__model_to_dto__(result) if result else None
-            except Exception as e:
-                db_session.rollback()
-                raise
\ No newline at end of file
+        with self._session_scope() as db_session:
+            return self._session_execute_query(db_session, query_func, fields, as_dict)
+
+    def _session_execute_query(self, db_session: Session, query_func, fields: List[str] = None, as_dict: bool = False):
+        # 执行查询函数。写操作由会话上下文统一提交，出现异常时由会话上下文统一回滚
+        result = query_func(db_session)
+
+        # 查询函数返回未执行的Query对象时，按fields替换查询的字段后再执行
+        if isinstance(result, Query):
+            if fields:
+                result = result.with_entities(*self._resolve_columns(fields))
+            result = result.all()
+
+        # 处理JOIN查询结果（包含多个模型实例的元组）。sqlalchemy 2.x 中查询返回的Row不再是tuple的子类
+        if isinstance(result, list) and result and isinstance(result[0], (tuple, Row)):
+            # 直接返回原始结果，由调用方处理
+            return self._rows_to_result(result, as_dict) if isinstance(result[0], Row) else result
+
+        # 转换为DTO
+        # 处理模型实例列表类型结果
+        if isinstance(result, list) and (not result or isinstance(result[0], self.model)):
+            return self.converter.to_dto_list(result)
+        # 处理单个模型实例
+        elif isinstance(result, self.model):
+            return self.__model_to_dto__(result) if result else None
+        # 处理只查询部分字段得到的单行结果
+        elif isinstance(result, Row):
+            return result._asdict() if as_dict else result
+        # 其他结果（例如数值、集合、字典列表）直接返回
+        return result
@@ -0,0 +1,119 @@
+from functools import lru_cache
+from operator import attrgetter, itemgetter
+from typing import Any, Dict, Generic, Iterable, List, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy.orm import DeclarativeBase
+
+# 定义泛型
+ModelType = TypeVar("ModelType", bound=DeclarativeBase)
+DtoType = TypeVar("DtoType", bound=BaseModel)
+
+# 绕过BaseModel.__setattr__直接设置实例属性，与pydantic的model_construct内部做法相同
+_object_new = object.__new__
+_object_setattr = object.__setattr__
+
+
+class ModelConverter(Generic[ModelType, DtoType]):
+    """
+    SQLAlchemy模型实例 → DTO 的转换器，每个(模型类, DTO类)组合只编译一次
+
+    编译时确定需要读取的字段和对应的读取器，转换时不再遍历 __table__.columns、也不再逐个判断字段类型：
+        to_dto/to_dto_list: 可信转换。数据来自本系统的数据库，字段类型已由表结构保证，直接构建DTO实例，跳过校验
+        validate_list: 校验转换。通过缓存的TypeAdapter对整个列表做一次批量校验，用于需要校验的数据
+    """
+
+    def __init__(self, model: Type[ModelType], dto: Type[DtoType]):
+        """
+        初始化转换器
+            model: SQLAlchemy 模型类
+            dto: Pydantic 模型类
+        """
+        self.model = model
+        self.dto = dto
+        # 同时存在于模型和DTO中的字段，按表字段顺序排列
+        dto_fields = dto.model_fields
+        self.fields: Tuple[str, ...] = tuple(column.key for column in model.__table__.columns if column.key in dto_fields)
+        # DTO中有、模型中没有的字段，需要在转换时通过extra参数传入
+        self.missing_fields = frozenset(dto_fields).difference(self.fields)
+        # 已加载的字段值保存在模型实例的__dict__中，直接按字段名读取，避免逐个字段经过SQLAlchemy属性描述符
+        # 字段未加载（例如提交后过期）时，退回getattr读取，由SQLAlchemy负责加载
+        self._dict_getter = self._as_tuple_getter(itemgetter(*self.fields))
+        self._attr_getter = self._as_tuple_getter(attrgetter(*self.fields))
+        # DTO没有自定义初始化逻辑时，直接构建实例；否则使用model_construct
+        self._direct_construct = (
+            not dto.__pydantic_root_model__
+            and not dto.__pydantic_post_init__
+            and not dto.__private_attributes__
+            and dto.model_config.get("extra") != "allow"
+        )
+        # 列表批量校验使用的TypeAdapter
+        self._list_adapter = TypeAdapter(List[dto])
+
+    def _as_tuple_getter(self, getter):
+        """
+        只有一个字段时itemgetter/attrgetter返回单个值而非元组，统一包装为返回元组
+        """
+        if len(self.fields) == 1:
+            return lambda obj: (getter(obj),)
+        return getter
+
+    def _values(self, instance: ModelType) -> tuple:
+        """
+        读取模型实例的字段值，按self.fields的顺序返回元组
+        """
+        try:
+            return self._dict_getter(instance.__dict__)
+        except KeyError:
+            return self._attr_getter(instance)
+
+    def _construct(self, values: Dict[str, Any]) -> DtoType:
+        """
+        不做校验，直接用字段值构建DTO实例
+        """
+        if not self._direct_construct or not self.missing_fields.issubset(values):
+            return self.dto.model_construct(set(values), **values)
+        dto_instance = _object_new(self.dto)
+        _object_setattr(dto_instance, "__dict__", values)
+        _object_setattr(dto_instance, "__pydantic_fields_set__", set(values))
+        _object_setattr(dto_instance, "__pydantic_extra__", None)
+        _object_setattr(dto_instance, "__pydantic_private__", None)
+        return dto_instance
+
+    def to_dict(self, instance: ModelType) -> Dict[str, Any]:
+        """
+        将模型实例转换为字典，字段值保持原始类型（datetime不转换为字符串）
+        """
+        return dict(zip(self.fields, self._values(instance)))
+
+    def to_dto(self, instance: ModelType, **extra: Any) -> DtoType:
+        """
+        可信转换：将单个模型实例转换为DTO，不做字段校验
+            extra: 模型中没有、需要额外设置的DTO字段。例如问题-选项DTO中的options
+        """
+        values = dict(zip(self.fields, self._values(instance)))
+        if extra:
+            values.update(extra)
+        return self._construct(values)
+
+    def to_dto_list(self, instances: Iterable[ModelType]) -> List[DtoType]:
+        """
+        可信转换：将模型实例列表转换为DTO列表，不做字段校验
+        """
+        construct, fields, read = self._construct, self.fields, self._values
+        return [construct(dict(zip(fields, read(instance)))) for instance in instances]
+
+    def validate_list(self, instances: Iterable[ModelType]) -> List[DtoType]:
+        """
+        校验转换：将模型实例列表转换为DTO列表，通过TypeAdapter对整个列表做一次批量校验
+        """
+        fields, read = self.fields, self._values
+        return self._list_adapter.validate_python([dict(zip(fields, read(instance))) for instance in instances])
+
+
+@lru_cache(maxsize=None)
+def get_model_converter(model: Type[ModelType], dto: Type[DtoType]) -> ModelConverter[ModelType, DtoType]:
+    """
+    获取(模型类, DTO类)对应的转换器，同一组合只编译一次
+    """
+    return ModelConverter(model, dto)
@@ -1,5 +1,6 @@
 from modules.module_exam.model.mp_exam_model import MpExamModel
 from .base_dao import BaseDao
+from .async_base_dao import AsyncBaseDao
 from modules.module_exam.dto.mp_exam_dto import MpExamDTO
 
 # 继承基础Dao类，可添加自定义方法
@@ -10,3 +11,10 @@ class MpExamDao(BaseDao[MpExamModel, MpExamDTO]):
         super().__init__(MpExamModel, MpExamDTO)
 
     # 可以根据业务需求添加自定义方法
+
+
+# 继承异步基础Dao类，供 async def 接口使用
+class AsyncMpExamDao(AsyncBaseDao[MpExamModel, MpExamDTO]):
+    def __init__(self):
+        """初始化DAO实例"""
+        super().__init__(MpExamModel, MpExamDTO)
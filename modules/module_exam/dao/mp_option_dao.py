@@ -1,5 +1,6 @@
 from modules.module_exam.model.mp_option_model import MpOptionModel
 from .base_dao import BaseDao
+from .async_base_dao import AsyncBaseDao
 from ..dto.mp_option_dto import MpOptionDTO
 
 
@@ -11,3 +12,10 @@ class MpOptionDao(BaseDao[MpOptionModel,MpOptionDTO]):
         super().__init__(MpOptionModel,MpOptionDTO)
 
     # 可以根据业务需求添加自定义方法
+
+
+# 继承异步基础Dao类，供 async def 接口使用
+class AsyncMpOptionDao(AsyncBaseDao[MpOptionModel,MpOptionDTO]):
+    def __init__(self):
+        """初始化DAO实例"""
+        super().__init__(MpOptionModel,MpOptionDTO)
@@ -1,5 +1,6 @@
 from modules.module_exam.model.mp_question_model import MpQuestionModel
 from .base_dao import BaseDao
+from .async_base_dao import AsyncBaseDao
 from ..dto.mp_question_dto import MpQuestionDTO
 
 
@@ -11,3 +12,10 @@ class MpQuestionDao(BaseDao[MpQuestionModel,MpQuestionDTO]):
         super().__init__(MpQuestionModel,MpQuestionDTO)
 
     # 可以根据业务需求添加自定义方法
+
+
+# 继承异步基础Dao类，供 async def 接口使用
+class AsyncMpQuestionDao(AsyncBaseDao[MpQuestionModel,MpQuestionDTO]):
+    def __init__(self):
+        """初始化DAO实例"""
+        super().__init__(MpQuestionModel,MpQuestionDTO)
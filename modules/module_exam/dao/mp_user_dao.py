@@ -1,5 +1,6 @@
 from modules.module_exam.model.mp_user_model import MpUserModel
 from .base_dao import BaseDao
+from .async_base_dao import AsyncBaseDao
 from ..dto.mp_user_dto import MpUserDTO
 
 
@@ -11,3 +12,10 @@ class MpUserDao(BaseDao[MpUserModel,MpUserDTO]):
         super().__init__(MpUserModel,MpUserDTO)
 
     # 可以根据业务需求添加自定义方法
+
+
+# 继承异步基础Dao类，供 async def 接口使用
+class AsyncMpUserDao(AsyncBaseDao[MpUserModel,MpUserDTO]):
+    def __init__(self):
+        """初始化DAO实例"""
+        super().__init__(MpUserModel,MpUserDTO)
@@ -1,5 +1,6 @@
 from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
 from .base_dao import BaseDao
+from .async_base_dao import AsyncBaseDao
 from ..dto.mp_user_exam_dto import MpUserExamDTO
 # 导入数据库会话工厂
 from config.database_config import session_maker
@@ -18,3 +19,9 @@ class MpUserExamDao(BaseDao[MpUserExamModel,MpUserExamDTO]):
             mp_user_exam = session.query(self.model).filter(self.model.is_finish == True).order_by(desc(self.model.id)).first()
             return mp_user_exam
 
+
+# 继承异步基础Dao类，供 async def 接口使用
+class AsyncMpUserExamDao(AsyncBaseDao[MpUserExamModel,MpUserExamDTO]):
+    def __init__(self):
+        """初始化DAO实例"""
+        super().__init__(MpUserExamModel,MpUserExamDTO)
@@ -1,5 +1,6 @@
 from modules.module_exam.model.mp_user_option_model import MpUserOptionModel
 from .base_dao import BaseDao
+from .async_base_dao import AsyncBaseDao
 from ..dto.mp_user_option_dto import MpUserOptionDTO
 
 
@@ -11,3 +12,10 @@ class MpUserOptionDao(BaseDao[MpUserOptionModel,MpUserOptionDTO]):
         super().__init__(MpUserOptionModel,MpUserOptionDTO)
 
     # 可以根据业务需求添加自定义方法
+
+
+# 继承异步基础Dao类，供 async def 接口使用
+class AsyncMpUserOptionDao(AsyncBaseDao[MpUserOptionModel,MpUserOptionDTO]):
+    def __init__(self):
+        """初始化DAO实例"""
+        super().__init__(MpUserOptionModel,MpUserOptionDTO)
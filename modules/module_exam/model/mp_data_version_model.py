@@ -0,0 +1,17 @@
+# 导入sqlalchemy框架中的相关字段
+from sqlalchemy import Column, String, BigInteger, DateTime, func
+# 导入公共基类
+from config.database_config import myBaseModel
+
+class MpDataVersionModel(myBaseModel):
+    """
+    数据版本号表 mp_data_version
+    每种被进程内缓存的数据对应一行，数据修改时在同一个事务中将版本号加1。
+    各worker进程读取版本号与缓存时的版本号比较，发现其他进程修改过数据时重新加载
+    已有数据库执行 python scripts/upgrade_schema.py --execute 创建该表
+    """
+    __tablename__ = 'mp_data_version'
+
+    data_key = Column("data_key", String(64), primary_key=True, comment='数据标识，例如 question_bank:1、exam_list')
+    version = Column("version", BigInteger, nullable=False, default=0, comment='版本号，数据每修改一次加1')
+    update_time = Column("update_time", DateTime, comment='最后修改时间', default=func.now(), onupdate=func.now())
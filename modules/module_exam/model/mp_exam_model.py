@@ -17,6 +17,6 @@ class MpExamModel(myBaseModel):
 
     # 添加索引
     __table_args__ = (
-        Index('index_id', 'id'),
-        Index('index_name', 'name'),
+        # 测试列表：WHERE status = ? ORDER BY id（分页、游标分页）
+        Index('index_status_id', 'status', 'id'),
     )
@@ -18,6 +18,6 @@ class MpOptionModel(myBaseModel):
 
     # 添加索引
     __table_args__ = (
-        Index('index_id', 'id'),
-        Index('index_question_id', 'question_id'),
+        # 问题的选项：WHERE question_id = ?；正确选项：WHERE question_id = ? AND is_right = 1
+        Index('index_question_id_is_right', 'question_id', 'is_right'),
     )
\ No newline at end of file
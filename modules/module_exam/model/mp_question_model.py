@@ -19,6 +19,6 @@ class MpQuestionModel(myBaseModel):
 
     # 添加索引
     __table_args__ = (
-        Index('index_id', 'id'),
-        Index('index_exam_id', 'exam_id'),
+        # 题库：WHERE exam_id = ? AND status = 0；题目个数：WHERE exam_id = ?（使用索引前缀）
+        Index('index_exam_id_status', 'exam_id', 'status'),
     )
\ No newline at end of file
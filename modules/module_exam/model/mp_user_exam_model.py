@@ -1,5 +1,5 @@
 # 导入sqlalchemy框架中的相关字段
-from sqlalchemy import Column, Integer, String, DateTime, CHAR, func, Index
+from sqlalchemy import Column, Integer, String, DateTime, CHAR, func, Index, Computed
 # 导入公共基类
 from config.database_config import myBaseModel
 
@@ -16,10 +16,15 @@ class MpUserExamModel(myBaseModel):
     score = Column("score", Integer, nullable=False, comment='用户测试分数')
     create_time = Column("create_time",DateTime, comment='创建时间', default=func.now())
     finish_time = Column("finish_time", DateTime, comment='测试完成时间')
+    # 生成列：未完成时为1，完成后为NULL。与user_id、exam_id组成唯一索引，保证同一用户同一测试最多只有一条未完成的记录
+    # 已有数据库执行 python scripts/upgrade_schema.py --execute 升级：先清理重复的未完成记录，再增加该列和唯一索引
+    unfinished = Column("unfinished", Integer, Computed("CASE WHEN finish_time IS NULL THEN 1 ELSE NULL END", persisted=True), comment='是否未完成 1未完成 NULL已完成')
 
     # 添加索引
     __table_args__ = (
-        Index('index_id', 'id'),
-        Index('index_user_id', 'user_id'),
-        Index('index_exam_id', 'exam_id'),
+        # 最近一次（未）完成的记录、完成记录的游标分页：WHERE user_id = ? AND exam_id = ? AND finish_time IS [NOT] NULL ORDER BY id DESC
+        # 测试历史：WHERE user_id = ? AND finish_time IS NOT NULL GROUP BY exam_id 取 MAX(id)
+        # id放在finish_time之前：按id倒序读取索引即可，不需要排序；finish_time在索引中，判断是否完成时不需要回表
+        Index('index_user_exam_id_finish', 'user_id', 'exam_id', 'id', 'finish_time'),
+        Index('uk_user_exam_unfinished', 'user_id', 'exam_id', 'unfinished', unique=True),
     )
\ No newline at end of file
@@ -27,6 +27,5 @@ class MpUserModel(myBaseModel):
 
     # 添加索引
     __table_args__ = (
-        Index('index_id', 'id'),
-        Index('index_phone', 'phone'),
+        # phone、wx_openid 已有唯一索引，主键id无需额外索引
     )
\ No newline at end of file
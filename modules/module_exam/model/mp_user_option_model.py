@@ -21,8 +21,7 @@ class MpUserOptionModel(myBaseModel):
 
     # 添加索引
     __table_args__ = (
-        Index('index_id', 'id'),
-        Index('index_user_id', 'user_id'),
-        Index('index_exam_id', 'exam_id'),
-        Index('index_user_exam_id', 'user_exam_id'),
+        # 选项分析：WHERE user_exam_id = ? AND question_id = ?
+        # 问题分析：LEFT JOIN ... ON user_exam_id = ? AND question_id = ? AND option_id = ?
+        Index('index_user_exam_question_option', 'user_exam_id', 'question_id', 'option_id'),
     )
\ No newline at end of file
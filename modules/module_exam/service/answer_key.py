@@ -0,0 +1,55 @@
+from typing import Dict, FrozenSet, Iterable, List, Optional
+
+from ..dto.mp_question_dto import MpQuestionOptionDTO
+
+
+class AnswerKey:
+    """
+    测试的答案索引，答题判分时直接在内存中比较，不再查询数据库
+        right_option_ids: 问题ID -> 该问题正确选项ID的集合
+        option_scores: 选项ID -> 选项得分（选项的is_right字段，正确为1，错误为0）
+    """
+
+    __slots__ = ("right_option_ids", "option_scores")
+
+    def __init__(self, right_option_ids: Dict[int, FrozenSet[int]], option_scores: Dict[int, int]):
+        self.right_option_ids = right_option_ids
+        self.option_scores = option_scores
+
+    @classmethod
+    def from_questions(cls, questions: List[MpQuestionOptionDTO]) -> "AnswerKey":
+        """
+        根据问题+选项列表构建答案索引
+        """
+        right_option_ids: Dict[int, FrozenSet[int]] = {}
+        option_scores: Dict[int, int] = {}
+        for question in questions:
+            right_ids = []
+            for option in question.options or []:
+                score = 1 if option.is_right == 1 else 0
+                option_scores[option.id] = score
+                if score:
+                    right_ids.append(option.id)
+            right_option_ids[question.id] = frozenset(right_ids)
+        return cls(right_option_ids, option_scores)
+
+    def get_right_option_ids(self, question_id: int) -> Optional[FrozenSet[int]]:
+        """
+        获取问题的正确选项ID集合，问题不在索引中时返回None
+        """
+        return self.right_option_ids.get(question_id)
+
+    def get_option_score(self, option_id: int) -> Optional[int]:
+        """
+        获取选项得分，选项不在索引中时返回None
+        """
+        return self.option_scores.get(option_id)
+
+    def is_answer_right(self, question_id: int, option_ids: Iterable[int]) -> Optional[bool]:
+        """
+        判断用户选择的选项集合是否与正确选项集合完全相同，问题不在索引中时返回None
+        """
+        right_ids = self.right_option_ids.get(question_id)
+        if right_ids is None:
+            return None
+        return right_ids == set(option_ids)
@@ -0,0 +1,446 @@
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+import anyio.to_thread
+from pydantic import ValidationError
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+
+from config.database_config import await_after_transaction, mark_primary_write, outside_unit_of_work
+from config.log_config import logger
+from utils.file_lock_util import async_file_lock
+from ..dto.mp_user_option_dto import MpUserOptionDTO
+from .mp_user_option_service import AsyncMpUserOptionService
+
+# 是否开启答题记录写后模式（write-behind）。默认关闭，答题记录在答题接口的事务中直接写入数据库
+ANSWER_WRITE_BEHIND_ENABLED = os.getenv("ANSWER_WRITE_BEHIND", "0") == "1"
+# 本地缓冲文件路径（SQLite数据库文件，WAL模式），默认在项目根目录下，与启动时的工作目录无关
+# 同一台机器上的多个worker进程共用同一个缓冲文件，通过文件锁保证同一时刻只有一个进程写入数据库
+ANSWER_BUFFER_PATH = os.getenv(
+    "ANSWER_BUFFER_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))), "answer_buffer.db"),
+)
+# 后台写入的间隔（秒），缓冲中的记录达到一批时会提前写入
+ANSWER_FLUSH_INTERVAL = float(os.getenv("ANSWER_FLUSH_INTERVAL", "1"))
+# 每批写入数据库的最大记录数
+ANSWER_FLUSH_BATCH_SIZE = int(os.getenv("ANSWER_FLUSH_BATCH_SIZE", "500"))
+# 单条记录写入数据库失败（数据本身的错误，例如违反约束）的最大次数，达到后移入死信表，不再阻塞后面的记录
+ANSWER_MAX_ATTEMPTS = int(os.getenv("ANSWER_MAX_ATTEMPTS", "3"))
+# 应用关闭、查询前补写时等待其他进程释放写入锁的最长时间（秒）。后台任务不等待，锁被占用时跳过本次写入
+ANSWER_FLUSH_LOCK_TIMEOUT = float(os.getenv("ANSWER_FLUSH_LOCK_TIMEOUT", "10"))
+# 未确认记录的最长保留时间（秒）。答题接口的事务超过该时间仍未提交或回滚（进程在提交和确认之间退出）时，记录移入死信表
+ANSWER_CONFIRM_TIMEOUT = float(os.getenv("ANSWER_CONFIRM_TIMEOUT", "60"))
+
+# 缓冲表中后来增加的字段，打开旧版本创建的缓冲文件时补充
+_PENDING_ANSWER_COLUMNS = {
+    "attempts": "INTEGER NOT NULL DEFAULT 0",
+    "confirmed": "INTEGER NOT NULL DEFAULT 1",
+    "user_exam_id": "INTEGER",
+    "append_time": "REAL",
+}
+
+
+class AnswerBuffer:
+    """
+    答题记录的本地持久化缓冲，使用SQLite文件保存，追加返回后即使进程崩溃或机器断电也不会丢失
+    开启WAL模式并设置synchronous=FULL，每次提交都等待磁盘同步。方法会阻塞，在事件循环中需要通过线程池调用
+
+    记录分为未确认和已确认两种状态：答题接口在事务中追加未确认的记录，事务提交后确认、回滚后删除，只有已确认的记录会写入数据库
+    多次写入数据库失败的记录和长时间未确认的记录移入死信表dead_answer，保留原始记录和错误信息，供人工处理
+    """
+
+    def __init__(self, path: str):
+        """
+        打开（不存在时创建）缓冲文件
+            path: 缓冲文件路径
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        # 多个进程同时写入缓冲文件时，等待其他进程的写事务完成，而不是直接报错"database is locked"
+        self._conn = sqlite3.connect(path, timeout=10, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS pending_answer (id INTEGER PRIMARY KEY AUTOINCREMENT, payload TEXT NOT NULL, "
+                           "attempts INTEGER NOT NULL DEFAULT 0, confirmed INTEGER NOT NULL DEFAULT 1, user_exam_id INTEGER, append_time REAL)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(pending_answer)")}
+        for column, definition in _PENDING_ANSWER_COLUMNS.items():
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE pending_answer ADD COLUMN {column} {definition}")
+        self._conn.execute("CREATE INDEX IF NOT EXISTS index_user_exam_id ON pending_answer (user_exam_id)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS dead_answer (id INTEGER PRIMARY KEY, payload TEXT NOT NULL, error TEXT, "
+                           "attempts INTEGER NOT NULL, dead_time TEXT NOT NULL)")
+
+    def append(self, records: List[Dict[str, Any]], confirmed: bool = True) -> List[int]:
+        """
+        追加记录，多条记录在同一个事务中写入，返回缓冲记录id列表
+            confirmed: 是否为已确认状态。为False时需要在之后调用confirm，否则不会写入数据库
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                row_ids = [
+                    self._conn.execute(
+                        "INSERT INTO pending_answer (payload, confirmed, user_exam_id, append_time) VALUES (?, ?, ?, ?)",
+                        (json.dumps(record, ensure_ascii=False, default=_json_default), int(confirmed), record.get("user_exam_id"), now),
+                    ).lastrowid
+                    for record in records
+                ]
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return row_ids
+
+    def confirm(self, ids: List[int]) -> None:
+        """
+        确认记录，确认后由后台任务写入数据库
+        """
+        with self._lock:
+            self._conn.executemany("UPDATE pending_answer SET confirmed = 1 WHERE id = ?", [(row_id,) for row_id in ids])
+
+    def peek(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """
+        按写入顺序读取最早的limit条已确认记录，不删除
+        返回:
+            [(缓冲记录id, 记录字典), ...]
+        """
+        with self._lock:
+            rows = self._conn.execute("SELECT id, payload FROM pending_answer WHERE confirmed = 1 ORDER BY id LIMIT ?", (limit,)).fetchall()
+        return [(row_id, json.loads(payload)) for row_id, payload in rows]
+
+    def has_pending(self, user_exam_id: int) -> bool:
+        """
+        是否有指定测试记录的已确认、尚未写入数据库的记录
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM pending_answer WHERE user_exam_id = ? AND confirmed = 1 LIMIT 1", (user_exam_id,)).fetchone()
+        return row is not None
+
+    def remove(self, ids: List[int]) -> None:
+        """
+        删除指定id的记录（已写入数据库的记录，或者事务回滚后的未确认记录）
+        """
+        with self._lock:
+            self._conn.executemany("DELETE FROM pending_answer WHERE id = ?", [(row_id,) for row_id in ids])
+
+    def record_failure(self, row_id: int) -> int:
+        """
+        记录一次写入失败，返回该记录累计的失败次数
+        """
+        with self._lock:
+            self._conn.execute("UPDATE pending_answer SET attempts = attempts + 1 WHERE id = ?", (row_id,))
+            row = self._conn.execute("SELECT attempts FROM pending_answer WHERE id = ?", (row_id,)).fetchone()
+        return row[0] if row else 0
+
+    def move_to_dead(self, row_id: int, error: str) -> None:
+        """
+        将记录移入死信表，不再重试写入
+        """
+        self._move_to_dead("id = ?", (row_id,), error)
+
+    def expire_unconfirmed(self, before: float) -> int:
+        """
+        将追加时间早于before的未确认记录移入死信表，返回移入的记录数
+        """
+        return self._move_to_dead("confirmed = 0 AND append_time < ?", (before,), "答题接口的事务状态未知：记录追加后长时间没有确认或删除")
+
+    def _move_to_dead(self, condition: str, params: tuple, error: str) -> int:
+        with self._lock:
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.execute(f"INSERT OR REPLACE INTO dead_answer (id, payload, error, attempts, dead_time) "
+                                   f"SELECT id, payload, ?, attempts, ? FROM pending_answer WHERE {condition}",
+                                   (error, datetime.now().isoformat(), *params))
+                moved = self._conn.execute(f"DELETE FROM pending_answer WHERE {condition}", params).rowcount
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return moved
+
+    def dead_count(self) -> int:
+        """
+        死信表中的记录数
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM dead_answer").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM pending_answer").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _json_default(value: Any) -> Any:
+    """
+    json序列化时将datetime转换为字符串
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"无法序列化的类型: {type(value)}")
+
+
+def _is_permanent_error(error: Exception) -> bool:
+    """
+    是否是记录本身导致的错误（重试也不会成功）：数据校验失败、违反约束、数据类型或长度不符、无法生成SQL参数
+    数据库连接断开、超时、死锁等临时错误返回False，记录保留在缓冲中等待下一个周期重试
+    """
+    if isinstance(error, (ValidationError, IntegrityError, DataError)):
+        return True
+    return isinstance(error, StatementError) and not isinstance(error, DBAPIError)
+
+
+class AnswerWriteBehind:
+    """
+    答题记录（mp_user_option）的写后模式
+
+    开启后，答题接口只把答题记录追加到本地缓冲，不再写入数据库；
+    后台任务定时从缓冲中按写入顺序取出一批记录，通过add_many批量写入数据库，写入成功后再从缓冲中删除。
+    服务重启时，缓冲中尚未写入数据库的记录会在后台任务启动后继续写入。
+
+    答题记录与答题接口的事务（分数、进度）同时生效：在事务提交之前以未确认状态追加到缓冲，追加失败时事务回滚；
+    事务提交后确认记录，回滚后删除记录。进程在提交和确认之间退出时，记录超过ANSWER_CONFIRM_TIMEOUT秒后移入死信表，需要人工核对
+
+    多个worker进程共用同一个缓冲文件，每次写入数据库时持有文件锁（<缓冲文件路径>.lock），
+    其他进程的后台任务发现锁被占用时跳过本次写入，同一批记录不会被多个进程重复写入。
+
+    整批写入因为记录本身的错误失败时，改为逐条写入：正常的记录照常写入，出错的记录累计失败次数，
+    达到ANSWER_MAX_ATTEMPTS次（数据校验失败时立即）移入死信表，不会一直阻塞后面的记录。
+
+    注意：
+        1. 数据库写入成功、但删除缓冲记录之前进程崩溃时，重启后这一批记录会被再次写入（至少写入一次）
+        2. 答题记录写入数据库之前，直接查询mp_user_option读不到这些记录。问题分析、选项分析接口查询前调用flush_pending补写；
+           测试结果、历史记录接口只读取mp_user_exam（分数和进度在答题接口的事务中写入），不受影响
+        3. 文件锁只在同一台机器的进程之间有效，多台机器需要各自使用本机的缓冲文件
+    """
+
+    def __init__(self, enabled: bool = ANSWER_WRITE_BEHIND_ENABLED, buffer_path: str = ANSWER_BUFFER_PATH,
+                 flush_interval: float = ANSWER_FLUSH_INTERVAL, batch_size: int = ANSWER_FLUSH_BATCH_SIZE,
+                 max_attempts: int = ANSWER_MAX_ATTEMPTS, confirm_timeout: float = ANSWER_CONFIRM_TIMEOUT):
+        """
+        初始化写后模式
+            enabled: 是否开启
+            buffer_path: 本地缓冲文件路径
+            flush_interval: 后台写入的间隔（秒）
+            batch_size: 每批写入数据库的最大记录数
+            max_attempts: 单条记录写入失败的最大次数，达到后移入死信表
+            confirm_timeout: 未确认记录的最长保留时间（秒），超过后移入死信表
+        """
+        self.enabled = enabled
+        self.buffer_path = buffer_path
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.confirm_timeout = confirm_timeout
+        self._buffer: Optional[AnswerBuffer] = None
+        self._buffer_lock = threading.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._service = AsyncMpUserOptionService()
+
+    @property
+    def buffer(self) -> AnswerBuffer:
+        """
+        本地缓冲，第一次使用时打开缓冲文件
+        """
+        if self._buffer is None:
+            with self._buffer_lock:
+                if self._buffer is None:
+                    self._buffer = AnswerBuffer(self.buffer_path)
+        return self._buffer
+
+    async def append(self, data_list: List[Union[MpUserOptionDTO, Dict[str, Any]]]) -> None:
+        """
+        将答题记录追加到本地缓冲（在线程池中执行，不阻塞事件循环），返回时记录已经持久化
+        在异步工作单元中调用时，记录在工作单元提交后才会写入数据库，回滚时删除；不在工作单元中时直接确认
+        追加失败时抛出异常，调用方的工作单元随之回滚
+        记录的创建时间取追加时的时间，而不是写入数据库的时间
+            data_list: 答题记录DTO或字典列表
+        """
+        now = datetime.now()
+        records = []
+        for data in data_list:
+            record = data.model_dump(exclude_none=True) if isinstance(data, MpUserOptionDTO) else dict(data)
+            record.setdefault("create_time", now)
+            records.append(record)
+        row_ids = await anyio.to_thread.run_sync(self.buffer.append, records, False)
+
+        async def confirm() -> None:
+            await anyio.to_thread.run_sync(self.buffer.confirm, row_ids)
+            # 缓冲中的记录足够一批时，唤醒后台任务提前写入
+            if self._wakeup is not None and len(row_ids) >= self.batch_size:
+                self._wakeup.set()
+
+        async def discard() -> None:
+            await anyio.to_thread.run_sync(self.buffer.remove, row_ids)
+
+        await await_after_transaction(confirm, discard)
+
+    async def flush_pending(self, user_exam_id: int) -> None:
+        """
+        查询某次测试的答题记录之前调用：缓冲中有该次测试已确认的记录时，先写入数据库，并使当前请求之后的读操作使用主库
+        写入失败时只记录日志，查询结果可能缺少这些记录
+        """
+        if not self.enabled or not await anyio.to_thread.run_sync(self.buffer.has_pending, user_exam_id):
+            return
+        try:
+            await self.flush_all(lock_timeout=ANSWER_FLUSH_LOCK_TIMEOUT)
+        except Exception as e:
+            logger.warning(f'答题记录写后模式，查询前补写测试记录 {user_exam_id} 的答题记录失败: {e!r}')
+        mark_primary_write()
+
+    async def flush_once(self, lock_timeout: float = 0) -> int:
+        """
+        从缓冲中取出一批记录写入数据库，返回从缓冲中移除的记录数（写入数据库或移入死信表）
+            lock_timeout: 等待其他进程释放写入锁的最长时间（秒），超时后不写入，返回0
+        """
+        async with async_file_lock(self.buffer_path + ".lock", timeout=lock_timeout) as locked:
+            return await self._flush_batch() if locked else 0
+
+    async def flush_all(self, lock_timeout: float = 0) -> int:
+        """
+        将缓冲中的全部记录写入数据库，返回从缓冲中移除的记录数。写入期间一直持有写入锁
+        有记录写入失败（留在缓冲中等待重试）时停止，下一个周期再写入
+            lock_timeout: 等待其他进程释放写入锁的最长时间（秒），超时后不写入，返回0
+        """
+        async with async_file_lock(self.buffer_path + ".lock", timeout=lock_timeout) as locked:
+            if not locked:
+                return 0
+            total = 0
+            while True:
+                removed = await self._flush_batch()
+                total += removed
+                if removed < self.batch_size:
+                    return total
+
+    async def _flush_batch(self) -> int:
+        """
+        写入一批记录（调用方持有写入锁），返回从缓冲中移除的记录数
+        """
+        items = await anyio.to_thread.run_sync(self.buffer.peek, self.batch_size)
+        removed = 0
+        valid_items = []
+        for row_id, record in items:
+            try:
+                valid_items.append((row_id, MpUserOptionDTO.model_validate(record)))
+            except ValidationError as e:
+                removed += await self._fail(row_id, e, dead=True)
+        if not valid_items:
+            return removed
+        try:
+            await self._write([data for _, data in valid_items])
+        except Exception as e:
+            if not _is_permanent_error(e):
+                raise
+            # 整批写入失败时逐条写入，找出出错的记录
+            for row_id, data in valid_items:
+                try:
+                    await self._write([data])
+                except Exception as row_error:
+                    if not _is_permanent_error(row_error):
+                        raise
+                    removed += await self._fail(row_id, row_error)
+                else:
+                    await anyio.to_thread.run_sync(self.buffer.remove, [row_id])
+                    removed += 1
+        else:
+            # 写入成功后再删除缓冲记录
+            await anyio.to_thread.run_sync(self.buffer.remove, [row_id for row_id, _ in valid_items])
+            removed += len(valid_items)
+        return removed
+
+    async def _write(self, data_list: List[MpUserOptionDTO]) -> None:
+        """
+        写入数据库。不使用调用方（例如查询前补写的请求）的工作单元，写入后立即提交，之后才会删除缓冲记录
+        """
+        with outside_unit_of_work():
+            await self._service.add_many(data_list=data_list)
+
+    async def _fail(self, row_id: int, error: Exception, dead: bool = False) -> bool:
+        """
+        记录一次写入失败，失败次数达到max_attempts（或dead为True）时移入死信表
+        返回是否移入了死信表
+        """
+        attempts = await anyio.to_thread.run_sync(self.buffer.record_failure, row_id)
+        if dead or attempts >= self.max_attempts:
+            await anyio.to_thread.run_sync(self.buffer.move_to_dead, row_id, repr(error))
+            logger.error(f'答题记录写后模式，缓冲记录 {row_id} 写入失败 {attempts} 次，移入死信表: {error!r}')
+            return True
+        logger.warning(f'答题记录写后模式，缓冲记录 {row_id} 写入失败 {attempts} 次，稍后重试: {error!r}')
+        return False
+
+    async def expire_unconfirmed(self) -> int:
+        """
+        将超过confirm_timeout秒仍未确认的记录移入死信表，返回移入的记录数
+        """
+        expired = await anyio.to_thread.run_sync(self.buffer.expire_unconfirmed, time.time() - self.confirm_timeout)
+        if expired:
+            logger.error(f'答题记录写后模式，{expired} 条记录超过 {self.confirm_timeout} 秒没有确认，移入死信表，需要人工核对')
+        return expired
+
+    async def _run(self) -> None:
+        """
+        后台任务：定时写入，写入失败时等待下一个周期重试，记录保留在缓冲中
+        """
+        while True:
+            try:
+                await self.expire_unconfirmed()
+                flushed = await self.flush_all()
+                if flushed:
+                    logger.info(f'答题记录写后模式，处理缓冲记录 {flushed} 条')
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f'答题记录写后模式，写入数据库失败，稍后重试: {e!r}')
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self) -> None:
+        """
+        启动后台写入任务，需要在事件循环中调用（应用启动时）
+        缓冲中残留的上次未写入的记录会在启动后首先写入
+        """
+        if not self.enabled or self._task is not None:
+            return
+        pending = len(self.buffer)
+        if pending:
+            logger.info(f'答题记录写后模式，缓冲中有 {pending} 条上次未写入的记录，开始补写')
+        dead = self.buffer.dead_count()
+        if dead:
+            logger.warning(f'答题记录写后模式，死信表中有 {dead} 条无法写入的记录，需要人工处理（{self.buffer_path} 的dead_answer表）')
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        停止后台写入任务，并尝试写入缓冲中剩余的记录（应用关闭时调用）
+        写入失败的记录保留在缓冲中，下次启动后继续写入
+        """
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        try:
+            await self.flush_all(lock_timeout=ANSWER_FLUSH_LOCK_TIMEOUT)
+        except Exception as e:
+            logger.error(f'答题记录写后模式，关闭时写入数据库失败，记录保留在缓冲中: {e!r}')
+
+
+# 全局答题记录写后模式实例
+answer_write_behind = AnswerWriteBehind()
@@ -0,0 +1,213 @@
+from typing import Generic, TypeVar, List, Optional, Union, Dict, Any, Callable, Tuple
+
+from pydantic import BaseModel
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.declarative import DeclarativeMeta
+
+from config.database_config import call_after_commit
+from ..dao.base_dao import COUNT_MODE_EXACT, DEFAULT_CHUNK_SIZE
+
+# 定义泛型
+ModelType = TypeVar('ModelType', bound=DeclarativeMeta)
+DtoType = TypeVar('DtoType', bound=BaseModel)
+
+class AsyncBaseService(Generic[ModelType, DtoType]):
+    """
+    异步通用服务基类 提供与BaseService相同的CRUD方法，作为AsyncBaseDao和Controller层的中间层
+    所有方法都是协程，需要在 async def 接口中通过 await 调用
+
+    其中session_execute_query方法用于执行自定义的高级查询操作，可以直接使用sqlalchemy的内置方法进行查询
+    """
+
+    def __init__(self, dao_instance):
+        """
+        初始化服务实例
+            dao_instance: AsyncBaseDao实例，处理数据库操作
+        """
+        self.dao = dao_instance
+
+
+    async def get_page_list_by_filters(self, page_num: int = 1, page_size: int = 10, filters: DtoType = None, sort_by: List[str] = None) -> List[DtoType]:
+        """
+        获取分页数据（DTO形式）
+            page_num: 页码，默认1
+            page_size: 每页大小，默认10
+            filters: 查询条件DTO
+        """
+        return await self.dao.get_page_list_by_filters(page_size, page_num, filters, sort_by)
+
+    async def get_page_list_by_filters_as_dict(self, page_num: int = 1, page_size: int = 10, filters: dict = None, sort_by: List[str] = None) -> List[DtoType]:
+        """
+        获取分页数据(dict形式)
+            page_num: 页码，默认1
+            page_size: 每页大小，默认10
+            filters: 查询条件dict
+        """
+        return await self.dao.get_page_list_by_filters_as_dict(page_size, page_num, filters, sort_by)
+
+    async def get_page_with_total(self, page_num: int = 1, page_size: int = 10, filters: DtoType = None, sort_by: List[str] = None, count_mode: str = COUNT_MODE_EXACT) -> Tuple[List[DtoType], int]:
+        """
+        获取分页数据和记录总数（DTO形式），代替先调用get_page_list_by_filters再调用get_total_by_filters的写法
+            page_num: 页码，默认1
+            page_size: 每页大小，默认10
+            filters: 查询条件DTO
+            count_mode: 计数模式。exact精确计数（默认），cached缓存计数，estimated估算计数
+        返回:
+            (当前页DTO列表, 记录总数)
+        """
+        return await self.dao.get_page_with_total(page_size, page_num, filters, sort_by, count_mode)
+
+    async def get_list_by_cursor(self, page_size: int = 10, cursor: Optional[str] = None, filters: DtoType = None, sort_by: List[str] = None) -> Tuple[List[DtoType], Optional[str]]:
+        """
+        游标分页获取数据（DTO形式），翻页开销不随页码增长
+            page_size: 每页大小，默认10
+            cursor: 分页游标。第一页传None，之后传上一页返回的next_cursor
+            filters: 查询条件DTO
+            sort_by: 排序字段
+        返回:
+            (当前页DTO列表, 下一页游标)。没有下一页时游标为None
+        """
+        return await self.dao.get_list_by_cursor(page_size, cursor, filters, sort_by)
+
+    async def get_total_by_filters(self, filters: DtoType = None) -> int:
+        """
+        获取符合条件的记录总数（DTO形式）
+            filters: 查询条件DTO
+        """
+        return await self.dao.get_total_by_filters(filters)
+
+    async def get_by_id(self, id: int) -> DtoType:
+        """
+        根据ID获取详情
+            id: 记录ID
+        """
+        return await self.dao.get_by_id(id)
+
+    async def get_list_by_filters(self, filters: DtoType = None, sort_by: List[str] = None, fields: List[str] = None, as_dict: bool = False) -> List[Union[DtoType, Row, Dict[str, Any]]]:
+        """
+        根据条件获取列表（DTO形式）
+            filters: 查询条件DTO
+            fields: 只查询的字段列表，传入后返回Row列表（as_dict为True时返回字典列表）
+        """
+        return await self.dao.get_list_by_filters(filters, sort_by, fields, as_dict)
+
+    async def get_one_by_filters(self, filters: DtoType = None, fields: List[str] = None, as_dict: bool = False) -> Union[DtoType, Row, Dict[str, Any]]:
+        """
+        根据条件获取单条记录
+            filters: 查询条件DTO
+            fields: 只查询的字段列表，传入后返回Row（as_dict为True时返回字典）
+        """
+        return await self.dao.get_one_by_filters(filters, fields, as_dict)
+
+    async def add(self, data: DtoType) -> DtoType:
+        """
+        添加记录到数据库（DTO形式）
+            data: 要添加的数据DTO
+        """
+        context = await self._before_write(data_list=[data])
+        result = await self.dao.add(data)
+        await self._after_write(context)
+        return result
+
+    async def update_by_id(self, id: int, update_data: DtoType) -> bool:
+        """
+        更新记录（返回是否成功）（DTO形式）
+            id: 记录ID
+            update_data: 要更新的数据DTO
+        """
+        context = await self._before_write(ids=[id], data_list=[update_data])
+        result = await self.dao.update_by_id(id, update_data)
+        await self._after_write(context)
+        return result
+
+    async def delete_by_id(self, id: int) -> bool:
+        """
+        删除记录
+            id: 记录ID
+        """
+        context = await self._before_write(ids=[id])
+        result = await self.dao.delete_by_id(id)
+        await self._after_write(context)
+        return result
+
+
+    async def add_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+        """
+        批量添加记录，所有记录在同一个事务中写入
+            data_list: DTO或字典列表
+            chunk_size: 每条INSERT语句最多包含的记录数，默认500
+            return_ids: 是否返回新记录的id列表
+        """
+        context = await self._before_write(data_list=data_list)
+        result = await self.dao.add_many(data_list, chunk_size, return_ids)
+        await self._after_write(context)
+        return result
+
+    async def update_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        根据ID批量更新记录（返回匹配到的记录数）
+            data_list: DTO或字典列表，每一项都必须包含id字段
+        """
+        context = await self._before_write(data_list=data_list)
+        result = await self.dao.update_many(data_list, chunk_size)
+        await self._after_write(context)
+        return result
+
+    async def upsert_many(self, data_list: List[Union[DtoType, Dict[str, Any]]], update_fields: List[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        批量新增或更新记录，主键或唯一索引冲突时更新update_fields中的字段
+            data_list: DTO或字典列表
+            update_fields: 冲突时需要更新的字段，默认为除id外传入的全部字段
+        """
+        context = await self._before_write(data_list=data_list)
+        result = await self.dao.upsert_many(data_list, update_fields, chunk_size)
+        await self._after_write(context)
+        return result
+
+    async def delete_many(self, ids: List[int], chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        根据ID列表批量删除记录（返回删除的记录数）
+            ids: 要删除的记录ID列表
+        """
+        context = await self._before_write(ids=ids)
+        result = await self.dao.delete_many(ids, chunk_size)
+        await self._after_write(context)
+        return result
+
+
+    async def _before_write(self, ids: List[int] = (), data_list: list = ()) -> Any:
+        """
+        写方法（add、update_by_id、delete_by_id、add_many、update_many、upsert_many、delete_many）执行前调用，返回值传给_after_write
+        子类重写该方法和_after_write，在写操作前后处理缓存等，默认不做任何处理
+            ids: 被修改或删除的记录ID
+            data_list: 写入的数据（DTO或字典）
+        """
+        return None
+
+    async def _after_write(self, context: Any) -> None:
+        """
+        写方法执行完成后调用。在工作单元中时数据尚未提交，需要在提交后执行的操作使用after_commit
+            context: _before_write的返回值
+        """
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        """
+        在数据提交后调用callback：当前在工作单元中时等工作单元提交后调用（回滚时不调用），否则立即调用
+        """
+        call_after_commit(callback, is_async=True)
+
+    async def session_execute_query(self, query_func, fields: List[str] = None, as_dict: bool = False) -> Any:
+        """
+        session_execute_query方法用于执行自定义高级查询操作，可以直接使用sqlalchemy的原生查询方法
+        参数:
+            query_func: 接收lambda匿名函数。该函数内部使用db_session进行查询操作。
+            fields: 只查询的字段列表。query_func返回未执行的Query对象时生效
+            as_dict: 是否将Row列表中的每一行转换为字典
+        返回:
+            查询结果
+
+        调用示例
+        async def get_all():
+            return await session_execute_query(lambda db_session: db_session.query(self.model).all())
+        """
+        return await self.dao.session_execute_query(query_func, fields, as_dict)
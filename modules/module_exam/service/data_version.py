@@ -0,0 +1,56 @@
+from typing import Iterable
+
+from sqlalchemy import func, select
+from sqlalchemy.dialects import mysql, sqlite
+
+from ..model.mp_data_version_model import MpDataVersionModel
+
+# 测试列表的版本号key，测试的写操作会使版本号加1
+EXAM_LIST_VERSION_KEY = "exam_list"
+
+
+def question_bank_version_key(exam_id: int) -> str:
+    """
+    测试题库的版本号key，问题和选项的写操作会使所属测试的版本号加1
+    """
+    return f"question_bank:{exam_id}"
+
+
+def bump_versions_query(keys: Iterable[str]):
+    """
+    构建查询函数：将指定key的版本号加1，key不存在时插入版本号为1的记录
+    在工作单元中执行时与数据的写操作一起提交，其他进程读取到新版本号时数据一定已经提交
+    MySQL使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite使用 INSERT ... ON CONFLICT DO UPDATE
+    同步服务和异步服务共用该查询函数
+    """
+    # 按key排序，多个事务同时修改多个key时按相同的顺序加锁，避免死锁
+    keys = sorted(set(keys))
+    table = MpDataVersionModel.__table__
+
+    def query_func(db_session) -> int:
+        if not keys:
+            return 0
+        rows = [{"data_key": key, "version": 1, "update_time": func.now()} for key in keys]
+        dialect_name = db_session.bind.dialect.name
+        if dialect_name == 'mysql':
+            stmt = mysql.insert(table).values(rows)
+            stmt = stmt.on_duplicate_key_update(version=table.c.version + 1, update_time=func.now())
+        elif dialect_name == 'sqlite':
+            stmt = sqlite.insert(table).values(rows)
+            stmt = stmt.on_conflict_do_update(index_elements=[table.c.data_key], set_={"version": table.c.version + 1, "update_time": func.now()})
+        else:
+            raise NotImplementedError(f"bump_versions_query不支持当前数据库: {dialect_name}")
+        db_session.execute(stmt)
+        return len(keys)
+
+    return query_func
+
+
+def version_query(key: str):
+    """
+    构建查询函数：读取指定key的版本号（主键查询），没有记录时返回0
+    与进程内缓存的版本号比较时需要在use_primary()中执行：从库延迟时读到旧版本号会被当作数据已修改，导致反复重新加载
+    用于生成ETag时，在读取数据之前、在同一个会话中读取：数据不会比版本号旧
+    """
+    table = MpDataVersionModel.__table__
+    return lambda db_session: db_session.execute(select(table.c.version).where(table.c.data_key == key)).scalar() or 0
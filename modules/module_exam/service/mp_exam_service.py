@@ -1,14 +1,17 @@
-from typing import List
+from typing import Any, List
 
-from ..dao.mp_exam_dao import MpExamDao
+from ..dao.mp_exam_dao import MpExamDao, AsyncMpExamDao
 from ..dto.mp_exam_dto import MpExamDTO
 from ..model.mp_exam_model import MpExamModel
 from .base_service import BaseService
+from .async_base_service import AsyncBaseService
+from .data_version import EXAM_LIST_VERSION_KEY, bump_versions_query, version_query
 
 class MpExamService(BaseService[MpExamModel,MpExamDTO]):
     """
     MpExamService 类，继承自通用服务基类
     提供相关的业务逻辑处理
+    测试的写操作会将数据库中的测试列表版本号加1
     """
 
     def __init__(self):
@@ -19,14 +22,56 @@ class MpExamService(BaseService[MpExamModel,MpExamDTO]):
         self.dao_instance = MpExamDao()
         super().__init__(self.dao_instance)
 
+    def _after_write(self, context: Any) -> None:
+        # 测试列表版本号加1（在工作单元中时与写操作一起提交），所有worker进程的测试列表ETag随之变化
+        self.session_execute_query(bump_versions_query([EXAM_LIST_VERSION_KEY]))
+
     # 可以根据业务需求添加自定义方法
 
     def get_all_exam_id(self) -> List[int]:
         """
         查询所有考试的id，返回一个包含所有考试id的列表
         """
-        examlist:List[MpExamDTO] = self.dao_instance.get_list_by_filters(filters=None)
-        examids:List[int] = []
-        for exam in examlist:
-            examids.append(exam.id)
-        return examids
+        # 只查询id字段，不加载完整的考试记录
+        rows = self.dao_instance.get_list_by_filters(filters=None, fields=["id"])
+        return [row.id for row in rows]
+
+    def get_exam_list_version(self) -> int:
+        """
+        读取测试列表的版本号（主键查询），测试没有修改过时为0
+        """
+        return self.session_execute_query(version_query(EXAM_LIST_VERSION_KEY))
+
+
+class AsyncMpExamService(AsyncBaseService[MpExamModel,MpExamDTO]):
+    """
+    AsyncMpExamService 类，继承自异步通用服务基类
+    提供与MpExamService相同的业务方法，供 async def 接口使用
+    测试的写操作会将数据库中的测试列表版本号加1
+    """
+
+    def __init__(self):
+        """
+        初始化考试服务实例
+        创建异步DAO实例并传递给基类
+        """
+        self.dao_instance = AsyncMpExamDao()
+        super().__init__(self.dao_instance)
+
+    async def get_all_exam_id(self) -> List[int]:
+        """
+        查询所有考试的id，返回一个包含所有考试id的列表
+        """
+        # 只查询id字段，不加载完整的考试记录
+        rows = await self.dao_instance.get_list_by_filters(filters=None, fields=["id"])
+        return [row.id for row in rows]
+
+    async def _after_write(self, context: Any) -> None:
+        # 测试列表版本号加1（在工作单元中时与写操作一起提交），所有worker进程的测试列表ETag随之变化
+        await self.session_execute_query(bump_versions_query([EXAM_LIST_VERSION_KEY]))
+
+    async def get_exam_list_version(self) -> int:
+        """
+        读取测试列表的版本号（主键查询），测试没有修改过时为0
+        """
+        return await self.session_execute_query(version_query(EXAM_LIST_VERSION_KEY))
@@ -1,12 +1,18 @@
-from typing import List
+from typing import List, Set
 
 from .base_service import BaseService
-from ..dao.mp_option_dao import MpOptionDao
+from .async_base_service import AsyncBaseService
+from .data_version import bump_versions_query, question_bank_version_key
+from .question_bank_cache import question_bank_cache, affected_exam_ids_query
+from ..dao.mp_option_dao import MpOptionDao, AsyncMpOptionDao
 from ..dto.mp_option_dto import MpOptionDTO
 from ..model.mp_option_model import MpOptionModel
 
 
 class MpOptionService(BaseService[MpOptionModel, MpOptionDTO]):
+    """
+    选项的写操作会使所属测试的题库缓存失效，并将数据库中的题库版本号加1
+    """
     def __init__(self):
         """
         初始化服务实例
@@ -15,5 +21,39 @@ class MpOptionService(BaseService[MpOptionModel, MpOptionDTO]):
         dao_instance = MpOptionDao()
         super().__init__(dao_instance)
 
+    def _before_write(self, ids: List[int] = (), data_list: list = ()) -> Set[int]:
+        # 写入前查询受影响的测试，选项修改前后所属的测试都需要失效
+        return self.session_execute_query(affected_exam_ids_query(self.dao.model, set(ids), list(data_list)))
+
+    def _after_write(self, exam_ids: Set[int]) -> None:
+        # 题库版本号加1（在工作单元中时与写操作一起提交），其他worker进程检查版本号时重新加载
+        self.session_execute_query(bump_versions_query(question_bank_version_key(exam_id) for exam_id in exam_ids if exam_id is not None))
+        # 立即失效，并在工作单元提交后再失效一次
+        question_bank_cache.invalidate(exam_ids)
+        self.after_commit(lambda: question_bank_cache.invalidate(exam_ids))
+
     # 可以根据业务需求添加自定义方法
 
+
+class AsyncMpOptionService(AsyncBaseService[MpOptionModel, MpOptionDTO]):
+    """
+    选项的写操作会使所属测试的题库缓存失效，并将数据库中的题库版本号加1
+    """
+    def __init__(self):
+        """
+        初始化服务实例
+        创建异步DAO实例并传递给基类
+        """
+        dao_instance = AsyncMpOptionDao()
+        super().__init__(dao_instance)
+
+    async def _before_write(self, ids: List[int] = (), data_list: list = ()) -> Set[int]:
+        # 写入前查询受影响的测试，选项修改前后所属的测试都需要失效
+        return await self.session_execute_query(affected_exam_ids_query(self.dao.model, set(ids), list(data_list)))
+
+    async def _after_write(self, exam_ids: Set[int]) -> None:
+        # 题库版本号加1（在工作单元中时与写操作一起提交），其他worker进程检查版本号时重新加载
+        await self.session_execute_query(bump_versions_query(question_bank_version_key(exam_id) for exam_id in exam_ids if exam_id is not None))
+        # 立即失效，并在工作单元提交后再失效一次
+        question_bank_cache.invalidate(exam_ids)
+        self.after_commit(lambda: question_bank_cache.invalidate(exam_ids))
@@ -1,8 +1,13 @@
-from typing import List, Dict, Any
+from typing import Dict, FrozenSet, List, Optional, Set
 
+from config.database_config import use_primary
 from .base_service import BaseService
-from ..dao.mp_option_dao import MpOptionDao
-from ..dao.mp_question_dao import MpQuestionDao
+from .async_base_service import AsyncBaseService
+from .answer_key import AnswerKey
+from .data_version import bump_versions_query, question_bank_version_key, version_query
+from .question_bank_cache import question_bank_cache, QuestionBankEntry, affected_exam_ids_query
+from ..dao.model_converter import get_model_converter
+from ..dao.mp_question_dao import MpQuestionDao, AsyncMpQuestionDao
 from ..dto.mp_option_dto import MpOptionDTO
 from ..dto.mp_question_dto import MpQuestionDTO, MpQuestionOptionDTO
 from ..model.mp_option_model import MpOptionModel
@@ -11,6 +16,7 @@ from ..model.mp_question_model import MpQuestionModel
 class MpQuestionService(BaseService[MpQuestionModel, MpQuestionDTO]):
     """
     继承自通用服务基类  提供相关的业务逻辑处理
+    问题的写操作会使所属测试的题库缓存失效，并将数据库中的题库版本号加1
     """
 
     def __init__(self):
@@ -20,53 +26,215 @@ class MpQuestionService(BaseService[MpQuestionModel, MpQuestionDTO]):
         """
         dao_instance = MpQuestionDao()
         super().__init__(dao_instance)
-        # 创建选项DAO实例用于转换
-        self.option_dao = MpOptionDao()
+
+    def _before_write(self, ids: List[int] = (), data_list: list = ()) -> Set[int]:
+        # 写入前查询受影响的测试，问题修改前后所属的测试都需要失效
+        return self.session_execute_query(affected_exam_ids_query(self.dao.model, set(ids), list(data_list)))
+
+    def _after_write(self, exam_ids: Set[int]) -> None:
+        # 题库版本号加1（在工作单元中时与写操作一起提交），其他worker进程检查版本号时重新加载
+        self.session_execute_query(bump_versions_query(question_bank_version_key(exam_id) for exam_id in exam_ids if exam_id is not None))
+        # 立即失效，并在工作单元提交后再失效一次
+        question_bank_cache.invalidate(exam_ids)
+        self.after_commit(lambda: question_bank_cache.invalidate(exam_ids))
 
     # 可以根据业务需求添加自定义方法
 
     def get_questions_with_options(self, exam_id: int) -> List[MpQuestionOptionDTO]:
         """
-        获取指定测试的所有问题及其选项
+        获取指定测试的所有问题及其选项，优先从题库缓存中读取
+        返回的列表由所有请求共享，不能修改
+        """
+        return self.get_question_bank(exam_id).questions
+
+    def get_question_bank(self, exam_id: int, validate: bool = False) -> QuestionBankEntry:
+        """
+        获取指定测试的题库缓存项（包含版本号），缓存不存在或已被其他进程修改时查询数据库并写入缓存
+            validate: 是否每次都检查数据库中的题库版本号（答题判分时使用），为False时每隔一段时间检查一次
+        """
+        return question_bank_cache.get_or_load(exam_id, lambda: self.load_questions_with_options(exam_id),
+                                               lambda: self.get_question_bank_version(exam_id), validate)
+
+    def get_question_bank_version(self, exam_id: int) -> int:
+        """
+        从主库读取指定测试的题库版本号
+        """
+        with use_primary():
+            return self.session_execute_query(version_query(question_bank_version_key(exam_id)))
+
+    def load_questions_with_options(self, exam_id: int) -> List[MpQuestionOptionDTO]:
+        """
+        从数据库查询指定测试的所有问题及其选项，不经过缓存
+        查询结果会写入题库缓存，因此从主库读取，避免题目修改后从库尚未同步时缓存旧数据
         """
         # 使用session_execute_query方法执行JOIN查询
-        result = self.session_execute_query(
-            lambda db_session: db_session.query(
-                MpQuestionModel,
-                MpOptionModel
-            ).join(
-                MpOptionModel,
-                MpQuestionModel.id == MpOptionModel.question_id
-            ).filter(
-                MpQuestionModel.exam_id == exam_id,
-                MpQuestionModel.status == 0
-            ).all()
-        )
-
-        # 处理查询结果，将选项分组到对应的问题中
-        question_dict: Dict[int, Dict[str, Any]] = {}
-
-        # 遍历结果
-        for question_model, option_model in result:
-            # 如果问题已经在字典中，只需要添加选项
-            if question_model.id in question_dict:
-                existing_question = question_dict[question_model.id]
-                if option_model:  # 如果有选项
-                    option_dict = self.option_dao._model_to_dict__(option_model)
-                    existing_question["options"].append(option_dict)
-            else:
-                # 创建新的问题项并添加到字典中
-                question_dict[question_model.id] = {
-                    **self.dao._model_to_dict__(question_model),
-                    "options": []
-                }
-                if option_model:  # 如果有选项
-                    option_dict = self.option_dao._model_to_dict__(option_model)
-                    question_dict[question_model.id]["options"].append(option_dict)
-
-        # 将字典转换为复合DTO列表并返回
-        return [
-            MpQuestionOptionDTO.model_validate(question_dict)
-            for question_dict in question_dict.values()
-        ]
+        with use_primary():
+            result = self.session_execute_query(questions_with_options_query(exam_id))
+        # 将选项分组到对应的问题中，并转换为复合DTO列表返回
+        return group_questions_with_options(result)
+
+    def get_answer_key(self, exam_id: int) -> AnswerKey:
+        """
+        获取指定测试的答案索引，随题库缓存一起加载。用于判分，每次都检查题库版本号，不使用其他进程修改前的答案
+        """
+        return self.get_question_bank(exam_id, validate=True).answer_key
+
+    def get_right_option_ids(self, exam_id: int, question_id: int) -> FrozenSet[int]:
+        """
+        获取问题的正确选项ID集合。优先从答案索引中读取，问题不在索引中时查询数据库
+        """
+        right_ids = self.get_answer_key(exam_id).get_right_option_ids(question_id)
+        if right_ids is None:
+            right_ids = self.session_execute_query(right_option_ids_query(question_id))
+        return right_ids
+
+    def get_option_score(self, exam_id: int, option_id: int) -> Optional[int]:
+        """
+        获取选项得分。优先从答案索引中读取，选项不在索引中时查询数据库，选项不存在时返回None
+        """
+        score = self.get_answer_key(exam_id).get_option_score(option_id)
+        if score is None:
+            score = self.session_execute_query(option_score_query(option_id))
+        return score
+
+
+class AsyncMpQuestionService(AsyncBaseService[MpQuestionModel, MpQuestionDTO]):
+    """
+    继承自异步通用服务基类  提供与MpQuestionService相同的业务方法，供 async def 接口使用
+    问题的写操作会使所属测试的题库缓存失效，并将数据库中的题库版本号加1
+    """
+
+    def __init__(self):
+        """
+        初始化服务实例
+        创建异步DAO实例并传递给基类
+        """
+        dao_instance = AsyncMpQuestionDao()
+        super().__init__(dao_instance)
+
+    async def _before_write(self, ids: List[int] = (), data_list: list = ()) -> Set[int]:
+        # 写入前查询受影响的测试，问题修改前后所属的测试都需要失效
+        return await self.session_execute_query(affected_exam_ids_query(self.dao.model, set(ids), list(data_list)))
+
+    async def _after_write(self, exam_ids: Set[int]) -> None:
+        # 题库版本号加1（在工作单元中时与写操作一起提交），其他worker进程检查版本号时重新加载
+        await self.session_execute_query(bump_versions_query(question_bank_version_key(exam_id) for exam_id in exam_ids if exam_id is not None))
+        # 立即失效，并在工作单元提交后再失效一次
+        question_bank_cache.invalidate(exam_ids)
+        self.after_commit(lambda: question_bank_cache.invalidate(exam_ids))
+
+    async def get_questions_with_options(self, exam_id: int) -> List[MpQuestionOptionDTO]:
+        """
+        获取指定测试的所有问题及其选项，优先从题库缓存中读取
+        返回的列表由所有请求共享，不能修改
+        """
+        return (await self.get_question_bank(exam_id)).questions
+
+    async def get_question_bank(self, exam_id: int, validate: bool = False) -> QuestionBankEntry:
+        """
+        获取指定测试的题库缓存项（包含版本号），缓存不存在或已被其他进程修改时查询数据库并写入缓存
+        同一时刻大量请求同一个测试时，只有一个请求查询数据库
+            validate: 是否每次都检查数据库中的题库版本号（答题判分时使用），为False时每隔一段时间检查一次
+        """
+        return await question_bank_cache.get_or_load_async(exam_id, lambda: self.load_questions_with_options(exam_id),
+                                                           lambda: self.get_question_bank_version(exam_id), validate)
+
+    async def get_question_bank_version(self, exam_id: int) -> int:
+        """
+        从主库读取指定测试的题库版本号
+        """
+        with use_primary():
+            return await self.session_execute_query(version_query(question_bank_version_key(exam_id)))
+
+    async def load_questions_with_options(self, exam_id: int) -> List[MpQuestionOptionDTO]:
+        """
+        从数据库查询指定测试的所有问题及其选项，不经过缓存（从主库读取，原因同MpQuestionService.load_questions_with_options）
+        """
+        with use_primary():
+            result = await self.session_execute_query(questions_with_options_query(exam_id))
+        return group_questions_with_options(result)
+
+    async def get_answer_key(self, exam_id: int) -> AnswerKey:
+        """
+        获取指定测试的答案索引，随题库缓存一起加载。用于判分，每次都检查题库版本号，不使用其他进程修改前的答案
+        """
+        return (await self.get_question_bank(exam_id, validate=True)).answer_key
+
+    async def get_right_option_ids(self, exam_id: int, question_id: int) -> FrozenSet[int]:
+        """
+        获取问题的正确选项ID集合。优先从答案索引中读取，问题不在索引中时查询数据库
+        """
+        right_ids = (await self.get_answer_key(exam_id)).get_right_option_ids(question_id)
+        if right_ids is None:
+            right_ids = await self.session_execute_query(right_option_ids_query(question_id))
+        return right_ids
+
+    async def get_option_score(self, exam_id: int, option_id: int) -> Optional[int]:
+        """
+        获取选项得分。优先从答案索引中读取，选项不在索引中时查询数据库，选项不存在时返回None
+        """
+        score = (await self.get_answer_key(exam_id)).get_option_score(option_id)
+        if score is None:
+            score = await self.session_execute_query(option_score_query(option_id))
+        return score
+
+
+def questions_with_options_query(exam_id: int):
+    """
+    构建查询函数：查询指定测试中状态正常的问题及其选项（JOIN查询）
+    按问题id、选项id排序，相同的数据总是得到相同的题库内容和版本号
+    同步服务和异步服务共用该查询函数
+    """
+    return lambda db_session: db_session.query(
+        MpQuestionModel,
+        MpOptionModel
+    ).join(
+        MpOptionModel,
+        MpQuestionModel.id == MpOptionModel.question_id
+    ).filter(
+        MpQuestionModel.exam_id == exam_id,
+        MpQuestionModel.status == 0
+    ).order_by(
+        MpQuestionModel.id,
+        MpOptionModel.id
+    ).all()
+
+
+def right_option_ids_query(question_id: int):
+    """
+    构建查询函数：查询问题的正确选项ID集合，答案索引中没有该问题时使用
+    """
+    return lambda db_session: frozenset(
+        row.id for row in db_session.query(MpOptionModel.id).filter(MpOptionModel.question_id == question_id, MpOptionModel.is_right == 1).all()
+    )
+
+
+def option_score_query(option_id: int):
+    """
+    构建查询函数：查询选项得分（is_right字段），答案索引中没有该选项时使用
+    """
+    return lambda db_session: db_session.query(MpOptionModel.is_right).filter(MpOptionModel.id == option_id).scalar()
+
+
+def group_questions_with_options(result) -> List[MpQuestionOptionDTO]:
+    """
+    处理JOIN查询结果，将选项分组到对应的问题中，并转换为复合DTO列表
+        result: (问题模型实例, 选项模型实例) 元组列表
+    """
+    question_converter = get_model_converter(MpQuestionModel, MpQuestionOptionDTO)
+    option_converter = get_model_converter(MpOptionModel, MpOptionDTO)
+
+    # 问题ID -> (问题模型实例, 选项DTO列表)，字典保持问题第一次出现的顺序
+    question_dict: Dict[int, tuple] = {}
+    for question_model, option_model in result:
+        item = question_dict.get(question_model.id)
+        if item is None:
+            item = question_dict[question_model.id] = (question_model, [])
+        if option_model:  # 如果有选项
+            item[1].append(option_converter.to_dto(option_model))
 
+    # 转换为复合DTO列表并返回
+    return [
+        question_converter.to_dto(question_model, options=options)
+        for question_model, options in question_dict.values()
+    ]
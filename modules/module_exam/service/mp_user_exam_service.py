@@ -1,8 +1,14 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple
+
+from sqlalchemy import func, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.engine import Row
 
 from .base_service import BaseService
-from ..dao.mp_user_exam_dao import MpUserExamDao
+from .async_base_service import AsyncBaseService
+from ..dao.mp_user_exam_dao import MpUserExamDao, AsyncMpUserExamDao
 from ..dto.mp_user_exam_dto import MpUserExamDTO
+from ..model.mp_exam_model import MpExamModel
 from ..model.mp_user_exam_model import MpUserExamModel
 
 class MpUserExamService(BaseService[MpUserExamModel, MpUserExamDTO]):
@@ -53,4 +59,208 @@ class MpUserExamService(BaseService[MpUserExamModel, MpUserExamDTO]):
         )
         return result
 
+    def get_finished_user_exams_by_cursor(self, user_id: int, exam_id: int, page_size: int = 10, cursor: Optional[str] = None) -> Tuple[List[MpUserExamDTO], Optional[str]]:
+        # 根据user_id 和 exam_id 游标分页查询用户已完成的测试记录，按id降序排列
+        records: List[MpUserExamDTO] = self.dao_instance.session_execute_query(
+            lambda db_session: self.dao_instance.apply_cursor_pagination(
+                db_session.query(MpUserExamModel).filter(
+                    MpUserExamModel.user_id == user_id,
+                    MpUserExamModel.exam_id == exam_id,
+                    MpUserExamModel.finish_time != None,
+                ), page_size, cursor, ['-id']
+            ).all()
+        )
+        return self.dao_instance.build_cursor_page(records, page_size, ['-id'])
+
+    def record_answer(self, user_id: int, exam_id: int, score_delta: int, page_no: int, is_finished: bool = False) -> int:
+        """
+        答题时原子地更新用户未完成的测试记录：score = score + score_delta，page_no = page_no
+        没有未完成的测试记录时创建一条。并发提交时由数据库保证分数不会丢失、也不会创建多条未完成记录
+            user_id: 用户id
+            exam_id: 测试id
+            score_delta: 本题得分
+            page_no: 当前题号
+            is_finished: 是否为最后一题，为True时同时设置完成时间
+        返回:
+            用户测试记录id
+        """
+        return self.dao_instance.session_execute_query(record_answer_query(user_id, exam_id, score_delta, page_no, is_finished))
+
+    def get_latest_finished_exams(self, user_id: int, page_size: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Row], Optional[str]]:
+        """
+        一次查询获取用户做过的每个测试中最近一次完成的测试记录，并带出测试名称，按测试id升序排列
+            user_id: 用户id
+            page_size: 每页大小。不传时返回全部记录
+            cursor: 分页游标。第一页传None，之后传上一页返回的next_cursor
+        返回:
+            (Row列表, 下一页游标)。Row包含 id, exam_id, exam_name, finish_time 字段
+        """
+        if page_size is None:
+            rows = self.dao_instance.session_execute_query(
+                lambda db_session: latest_finished_exams_query(db_session, user_id).order_by(MpUserExamModel.exam_id).all()
+            )
+            return rows, None
+        rows = self.dao_instance.session_execute_query(
+            lambda db_session: self.dao_instance.apply_cursor_pagination(
+                latest_finished_exams_query(db_session, user_id), page_size, cursor, ['exam_id']
+            ).all()
+        )
+        return self.dao_instance.build_cursor_page(rows, page_size, ['exam_id'])
+
+
+class AsyncMpUserExamService(AsyncBaseService[MpUserExamModel, MpUserExamDTO]):
+    def __init__(self):
+        """
+        初始化服务实例
+        创建异步DAO实例并传递给基类
+        """
+        self.dao_instance = AsyncMpUserExamDao()
+        super().__init__(self.dao_instance)
+
+    async def get_last_user_exam(self, userId: int, exam_id: int) -> Optional[MpUserExamDTO]:
+        # 排序按id降序，取最近一次的测试记录
+        mp_user_exams_list: List[MpUserExamDTO] = await self.dao_instance.get_list_by_filters(filters=MpUserExamDTO(
+            user_id=userId,
+            exam_id=exam_id,
+        ), sort_by=['-id'])
+        if len(mp_user_exams_list) > 0:
+            return mp_user_exams_list[0]
+        else:
+            return None
+
+    async def find_last_one_finished_user_exam(self, user_id: int, exam_id: int) -> MpUserExamDTO:
+        # 根据user_id 和 exam_id 查询用户最近完成的测试记录
+        result: MpUserExamDTO = await self.dao_instance.session_execute_query(
+            lambda db_session: db_session.query(MpUserExamModel).filter(
+                MpUserExamModel.user_id == user_id,
+                MpUserExamModel.exam_id == exam_id,
+                MpUserExamModel.finish_time != None,
+            ).order_by(MpUserExamModel.id.desc()).first()
+        )
+        return result
+
+    async def find_last_one_not_finished_user_exam(self, user_id: int, exam_id: int) -> MpUserExamDTO:
+        # 根据user_id 和 exam_id 查询用户最近未完成的测试记录
+        result: MpUserExamDTO = await self.dao_instance.session_execute_query(
+            lambda db_session: db_session.query(MpUserExamModel).filter(
+                MpUserExamModel.user_id == user_id,
+                MpUserExamModel.exam_id == exam_id,
+                MpUserExamModel.finish_time == None,
+            ).order_by(MpUserExamModel.id.desc()).first()
+        )
+        return result
+
+    async def get_finished_user_exams_by_cursor(self, user_id: int, exam_id: int, page_size: int = 10, cursor: Optional[str] = None) -> Tuple[List[MpUserExamDTO], Optional[str]]:
+        # 根据user_id 和 exam_id 游标分页查询用户已完成的测试记录，按id降序排列
+        records: List[MpUserExamDTO] = await self.dao_instance.session_execute_query(
+            lambda db_session: self.dao_instance.apply_cursor_pagination(
+                db_session.query(MpUserExamModel).filter(
+                    MpUserExamModel.user_id == user_id,
+                    MpUserExamModel.exam_id == exam_id,
+                    MpUserExamModel.finish_time != None,
+                ), page_size, cursor, ['-id']
+            ).all()
+        )
+        return self.dao_instance.build_cursor_page(records, page_size, ['-id'])
+
+    async def record_answer(self, user_id: int, exam_id: int, score_delta: int, page_no: int, is_finished: bool = False) -> int:
+        """
+        答题时原子地更新或创建用户未完成的测试记录，参数与返回值同MpUserExamService.record_answer
+        """
+        return await self.dao_instance.session_execute_query(record_answer_query(user_id, exam_id, score_delta, page_no, is_finished))
+
+    async def get_latest_finished_exams(self, user_id: int, page_size: Optional[int] = None, cursor: Optional[str] = None) -> Tuple[List[Row], Optional[str]]:
+        """
+        一次查询获取用户做过的每个测试中最近一次完成的测试记录，参数与返回值同MpUserExamService.get_latest_finished_exams
+        """
+        if page_size is None:
+            rows = await self.dao_instance.session_execute_query(
+                lambda db_session: latest_finished_exams_query(db_session, user_id).order_by(MpUserExamModel.exam_id).all()
+            )
+            return rows, None
+        rows = await self.dao_instance.session_execute_query(
+            lambda db_session: self.dao_instance.apply_cursor_pagination(
+                latest_finished_exams_query(db_session, user_id), page_size, cursor, ['exam_id']
+            ).all()
+        )
+        return self.dao_instance.build_cursor_page(rows, page_size, ['exam_id'])
+
+
+def latest_finished_exams_query(db_session, user_id: int):
+    """
+    构建查询：用户做过的每个测试中最近一次完成的测试记录，连接测试表带出测试名称
+    同步服务和异步服务共用该查询
+
+    先按exam_id分组取出每个测试最大的用户测试id（即最近一次完成的记录），再与用户测试表、测试表连接。
+    查询开销只与用户做过的测试记录数有关，与系统中的测试总数无关
+    """
+    latest = db_session.query(
+        func.max(MpUserExamModel.id).label("id")
+    ).filter(
+        MpUserExamModel.user_id == user_id,
+        MpUserExamModel.finish_time != None,
+    ).group_by(
+        MpUserExamModel.exam_id
+    ).subquery()
+
+    return db_session.query(
+        MpUserExamModel.id,
+        MpUserExamModel.exam_id,
+        MpExamModel.name.label("exam_name"),
+        MpUserExamModel.finish_time,
+    ).join(
+        latest,
+        MpUserExamModel.id == latest.c.id
+    ).join(
+        MpExamModel,
+        MpExamModel.id == MpUserExamModel.exam_id
+    )
+
+
+def record_answer_query(user_id: int, exam_id: int, score_delta: int, page_no: int, is_finished: bool):
+    """
+    构建查询函数：原子地累加未完成测试记录的分数并更新题号，返回用户测试记录id
+    同步服务和异步服务共用该查询函数
+
+    依赖唯一索引 uk_user_exam_unfinished(user_id, exam_id, unfinished)，同一用户同一测试最多只有一条未完成记录：
+        1. INSERT 一条未完成记录，与已有的未完成记录冲突时改为 UPDATE score = score + 本题得分, page_no = 当前题号
+           MySQL 使用 ON DUPLICATE KEY UPDATE，并通过 id = LAST_INSERT_ID(id) 取回被更新记录的id
+           SQLite 使用 ON CONFLICT DO UPDATE ... RETURNING id
+        2. 最后一题时，再设置该记录的完成时间
+    """
+    table = MpUserExamModel.__table__
+    values = {
+        "user_id": user_id,
+        "exam_id": exam_id,
+        "page_no": page_no,
+        "score": score_delta,
+        "create_time": func.now(),
+    }
+
+    def query_func(db_session) -> int:
+        dialect_name = db_session.bind.dialect.name
+        if dialect_name == 'mysql':
+            stmt = mysql.insert(table).values(values)
+            stmt = stmt.on_duplicate_key_update([
+                ("id", func.last_insert_id(table.c.id)),
+                ("score", table.c.score + stmt.inserted.score),
+                ("page_no", stmt.inserted.page_no),
+            ])
+            user_exam_id = db_session.execute(stmt).lastrowid
+        elif dialect_name == 'sqlite':
+            stmt = sqlite.insert(table).values(values)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.user_id, table.c.exam_id, table.c.unfinished],
+                set_={"score": table.c.score + stmt.excluded.score, "page_no": stmt.excluded.page_no},
+            ).returning(table.c.id)
+            user_exam_id = db_session.execute(stmt).scalar_one()
+        else:
+            raise NotImplementedError(f"record_answer不支持当前数据库: {dialect_name}")
+
+        if is_finished:
+            db_session.execute(
+                update(table).where(table.c.id == user_exam_id, table.c.finish_time == None).values(finish_time=func.now())
+            )
+        return user_exam_id
 
+    return query_func
@@ -1,5 +1,12 @@
+from typing import List, Dict
+
+from sqlalchemy import func, case, and_
+
 from .base_service import BaseService
-from ..dao.mp_user_option_dao import MpUserOptionDao
+from .async_base_service import AsyncBaseService
+from ..dao.mp_user_option_dao import MpUserOptionDao, AsyncMpUserOptionDao
+from ..model.mp_option_model import MpOptionModel
+from ..model.mp_question_model import MpQuestionModel
 from ..model.mp_user_option_model import MpUserOptionModel
 
 from ..dto.mp_user_option_dto import MpUserOptionDTO
@@ -15,3 +22,75 @@ class MpUserOptionService(BaseService[MpUserOptionModel, MpUserOptionDTO]):
 
     # 可以根据业务需求添加自定义方法
 
+    def get_question_results(self, user_exam_id: int, exam_id: int) -> List[Dict[str, int]]:
+        """
+        一次查询计算某次用户测试中每个问题是否回答正确
+            user_exam_id: 用户测试记录ID
+            exam_id: 测试ID
+        返回:
+            [{"question_id": 问题ID, "is_right": 是否回答正确 0/1}, ...]，按问题ID排序
+        """
+        return self.session_execute_query(question_results_query(user_exam_id, exam_id))
+
+
+class AsyncMpUserOptionService(AsyncBaseService[MpUserOptionModel, MpUserOptionDTO]):
+    def __init__(self):
+        """
+        初始化服务实例
+        创建异步DAO实例并传递给基类
+        """
+        dao_instance = AsyncMpUserOptionDao()
+        super().__init__(dao_instance)
+
+    async def get_question_results(self, user_exam_id: int, exam_id: int) -> List[Dict[str, int]]:
+        """
+        一次查询计算某次用户测试中每个问题是否回答正确，返回值同MpUserOptionService.get_question_results
+        """
+        return await self.session_execute_query(question_results_query(user_exam_id, exam_id))
+
+
+def question_results_query(user_exam_id: int, exam_id: int):
+    """
+    构建查询函数：按问题分组，计算用户在某次测试中每个问题是否回答正确
+    同步服务和异步服务共用该查询函数
+
+    以测试的全部选项为基础，左连接用户在该次测试中选择的选项，每个选项属于以下情况之一：
+        正确选项且用户选择了、错误选项且用户没有选择：符合
+        正确选项但用户没有选择、错误选项但用户选择了：不符合
+    一个问题的所有选项都符合，并且用户至少选择了一个选项时，该问题回答正确
+    单选题和多选题使用同一个判断规则
+    """
+    is_chosen = MpUserOptionModel.id.isnot(None)
+    is_right_option = func.coalesce(MpOptionModel.is_right, 0) == 1
+    mismatch = case(
+        (and_(is_right_option, MpUserOptionModel.id.is_(None)), 1),
+        (and_(~is_right_option, is_chosen), 1),
+        else_=0,
+    )
+
+    def query_func(db_session) -> List[Dict[str, int]]:
+        rows = db_session.query(
+            MpQuestionModel.id.label("question_id"),
+            func.count(MpUserOptionModel.id).label("chosen_count"),
+            func.sum(mismatch).label("mismatch_count"),
+        ).join(
+            MpOptionModel,
+            MpOptionModel.question_id == MpQuestionModel.id
+        ).outerjoin(
+            # 用户选项的question_id与选项所属的问题一致，加上该条件后可以使用索引(user_exam_id, question_id, option_id)
+            MpUserOptionModel,
+            and_(MpUserOptionModel.user_exam_id == user_exam_id, MpUserOptionModel.question_id == MpQuestionModel.id,
+                 MpUserOptionModel.option_id == MpOptionModel.id)
+        ).filter(
+            MpQuestionModel.exam_id == exam_id
+        ).group_by(
+            MpQuestionModel.id
+        ).order_by(
+            MpQuestionModel.id
+        ).all()
+        return [
+            {"question_id": row.question_id, "is_right": 1 if row.chosen_count > 0 and row.mismatch_count == 0 else 0}
+            for row in rows
+        ]
+
+    return query_func
@@ -1,5 +1,6 @@
 from .base_service import BaseService
-from ..dao.mp_user_dao import MpUserDao
+from .async_base_service import AsyncBaseService
+from ..dao.mp_user_dao import MpUserDao, AsyncMpUserDao
 from ..model.mp_user_model import MpUserModel
 
 from ..dto.mp_user_dto import MpUserDTO
@@ -15,3 +16,12 @@ class MpUserService(BaseService[MpUserModel, MpUserDTO]):
 
     # 可以根据业务需求添加自定义方法
 
+
+class AsyncMpUserService(AsyncBaseService[MpUserModel, MpUserDTO]):
+    def __init__(self):
+        """
+        初始化服务实例
+        创建异步DAO实例并传递给基类
+        """
+        dao_instance = AsyncMpUserDao()
+        super().__init__(dao_instance)
@@ -0,0 +1,347 @@
+import asyncio
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Union
+
+import anyio.to_thread
+from pydantic import BaseModel
+
+from utils.cache_util import TTLCache
+from utils.compression_util import compress
+from utils.etag_util import content_version
+from utils.response_util import encode_response
+from .answer_key import AnswerKey
+from ..dto.mp_question_dto import MpQuestionOptionDTO
+from ..model.mp_option_model import MpOptionModel
+from ..model.mp_question_model import MpQuestionModel
+
+# 题库缓存最多缓存的测试数量
+QUESTION_BANK_CACHE_MAXSIZE = 256
+# 题库缓存的过期时间（秒）。题目和选项修改时会主动失效，过期时间只是兜底
+QUESTION_BANK_CACHE_TTL = 600
+# 读取题库时检查数据库中题库版本号（mp_data_version）的间隔（秒）。其他worker进程修改题库后，本进程最多在该时间后重新加载
+# 答题判分不受该间隔限制，每次都检查版本号，不会使用其他进程修改前的答案判分
+QUESTION_BANK_VERSION_CHECK_INTERVAL = 1
+
+
+class QuestionBankEntry:
+    """
+    题库缓存项
+        exam_id: 测试ID
+        version: 缓存项的版本号，即未压缩响应体的摘要。题库内容相同时版本号相同，与worker进程、重启和重新加载无关
+        questions: 该测试的问题及其选项列表
+        answer_key: 根据questions构建的答案索引，随题库一起加载和失效
+        payloads: 已经序列化好的接口响应体，key为压缩编码（identity 未压缩、gzip、br），随题库一起失效。
+            未压缩的响应体在加载时生成，压缩的响应体第一次使用时生成
+        payload_lock: 生成响应体的锁，同一个响应体只生成一次
+        source_version: 加载题库前从数据库读取的题库版本号（mp_data_version），与数据库中的版本号不同时说明题库已被修改
+        checked_at: 最近一次确认版本号未变化的时间（time.monotonic()）
+    """
+
+    __slots__ = ("exam_id", "version", "questions", "answer_key", "payloads", "payload_lock", "source_version", "checked_at")
+
+    def __init__(self, exam_id: int, version: str, questions: List[MpQuestionOptionDTO], answer_key: AnswerKey,
+                 payloads: Dict[str, bytes], payload_lock: threading.Lock, source_version: int = 0):
+        self.exam_id = exam_id
+        self.version = version
+        self.questions = questions
+        self.answer_key = answer_key
+        self.payloads = payloads
+        self.payload_lock = payload_lock
+        self.source_version = source_version
+        self.checked_at = time.monotonic()
+
+    def has_response_body(self, encoding: Optional[str] = None) -> bool:
+        """
+        指定编码的响应体是否已经生成
+        """
+        return (encoding or "identity") in self.payloads
+
+    def response_body(self, encoding: Optional[str] = None) -> bytes:
+        """
+        获取题库的接口响应体（{code, message, data} 的JSON字节串）。第一次调用时序列化并保存在缓存项中，之后直接复用
+            encoding: 压缩编码 gzip 或 br，为None时返回未压缩的响应体。压缩结果同样只生成一次（使用预压缩级别）
+        """
+        key = encoding or "identity"
+        body = self.payloads.get(key)
+        if body is not None:
+            return body
+        with self.payload_lock:
+            body = self.payloads.get(key)
+            if body is None:
+                identity = self.payloads.get("identity")
+                if identity is None:
+                    identity = self.payloads["identity"] = encode_response(data=self.questions)
+                body = self.payloads[key] = identity if encoding is None else compress(identity, encoding, precompress=True)
+        return body
+
+
+class _LoadLocks:
+    """
+    按key分配的加载锁。锁在没有请求使用时删除，数量不超过同时在加载的key数量，不会随请求传入的key无限增长
+    内部使用锁保护，可以在多个线程中同时使用
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        """
+            factory: 创建锁的函数，例如 threading.Lock、asyncio.Lock
+        """
+        self._factory = factory
+        # key -> [锁, 使用中的请求数]
+        self._items: Dict[Any, list] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Any) -> Any:
+        """
+        获取key对应的锁（不加锁），使用完后必须调用release
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                item = self._items[key] = [self._factory(), 0]
+            item[1] += 1
+            return item[0]
+
+    def release(self, key: Any) -> None:
+        with self._lock:
+            item = self._items[key]
+            item[1] -= 1
+            if item[1] == 0:
+                del self._items[key]
+
+    def __contains__(self, key: Any) -> bool:
+        """
+        key是否有请求正在使用（正在加载或等待加载）
+        """
+        with self._lock:
+            return key in self._items
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+
+class QuestionBankCache:
+    """
+    按exam_id缓存测试的题库（问题+选项）及答案索引，供 /mp/exam/getQuestionList 和答题判分使用
+
+    同一个测试的题库对所有用户都相同，缓存后大量用户同时打开同一个测试时只需查询一次数据库：
+        1. 缓存不存在时，同一个exam_id只允许一个请求加载题库，其他请求等待加载完成后直接读取缓存
+        2. 题目或选项被修改时，调用invalidate使对应测试的缓存失效。在工作单元中修改时，提交后会再失效一次，
+           避免提交前其他请求加载到修改前的数据并写入缓存
+        3. 加载过程中缓存被失效时，本次加载的结果不写入缓存，避免缓存修改前的旧数据
+        4. invalidate只对当前进程有效。修改题库时同时在数据库中将题库版本号加1，传入version_loader时，
+           读取缓存前比较数据库中的版本号与加载时的版本号，不同时重新加载，其他worker进程的修改也能生效
+
+    缓存的DTO列表由所有请求共享，调用方不能修改
+    """
+
+    def __init__(self, maxsize: int = QUESTION_BANK_CACHE_MAXSIZE, ttl: float = QUESTION_BANK_CACHE_TTL,
+                 version_check_interval: float = QUESTION_BANK_VERSION_CHECK_INTERVAL):
+        """
+        初始化题库缓存
+            maxsize: 最多缓存多少个测试的题库
+            ttl: 缓存过期时间（秒）
+            version_check_interval: 检查数据库中题库版本号的间隔（秒）
+        """
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.version_check_interval = version_check_interval
+        # 失效序号，每次invalidate、clear时加1。加载前记录当前序号，加载后与失效时的序号比较，判断加载期间题库是否被修改过
+        self._sequence = 0
+        # exam_id -> 最近一次失效时的序号，只保存有请求正在加载的测试，加载结束后删除，不会随测试数量增长
+        self._invalidations: Dict[int, int] = {}
+        # 最近一次clear时的序号
+        self._cleared_at = 0
+        # exam_id -> 加载锁，加载完成后删除
+        self._locks = _LoadLocks(threading.Lock)
+        self._async_locks = _LoadLocks(asyncio.Lock)
+        self._lock = threading.Lock()
+
+    def get(self, exam_id: int) -> Optional[QuestionBankEntry]:
+        """
+        读取缓存的题库，不存在或已过期时返回None
+        """
+        return self._cache.get(exam_id)
+
+    def get_or_load(self, exam_id: int, loader: Callable[[], List[MpQuestionOptionDTO]],
+                    version_loader: Optional[Callable[[], int]] = None, validate: bool = False) -> QuestionBankEntry:
+        """
+        读取缓存的题库，不存在或版本号已变化时调用loader加载并写入缓存（同步版本）
+            loader: 查询数据库并返回问题+选项列表的函数
+            version_loader: 从数据库读取题库版本号的函数，为None时不检查版本号（只依赖本进程的invalidate）
+            validate: 是否每次都检查版本号（答题判分），为False时每隔version_check_interval秒检查一次
+        """
+        entry = self._cache.get(exam_id)
+        if entry is not None and self._is_current(entry, version_loader, validate):
+            return entry
+        lock = self._locks.acquire(exam_id)
+        try:
+            with lock:
+                # 等待锁期间其他线程可能已经重新加载完成
+                current = self._cache.get(exam_id)
+                if current is not None and current is not entry and self._is_current(current, version_loader, validate):
+                    return current
+                token = self._sequence
+                # 先读取版本号再加载题库：加载期间题库被修改时，缓存项的版本号偏旧，下次检查时重新加载
+                source_version = version_loader() if version_loader is not None else 0
+                return self._store(self._build_entry(exam_id, loader(), source_version), token)
+        finally:
+            self._release(self._locks, exam_id)
+
+    async def get_or_load_async(self, exam_id: int, loader: Callable[[], Awaitable[List[MpQuestionOptionDTO]]],
+                                version_loader: Optional[Callable[[], Awaitable[int]]] = None, validate: bool = False) -> QuestionBankEntry:
+        """
+        读取缓存的题库，不存在或版本号已变化时调用loader加载并写入缓存（异步版本）
+            loader: 查询数据库并返回问题+选项列表的协程函数
+            version_loader: 从数据库读取题库版本号的协程函数，参数说明同get_or_load
+            validate: 是否每次都检查版本号（答题判分）
+        """
+        entry = self._cache.get(exam_id)
+        if entry is not None and await self._is_current_async(entry, version_loader, validate):
+            return entry
+        lock = self._async_locks.acquire(exam_id)
+        try:
+            async with lock:
+                # 等待锁期间其他协程可能已经重新加载完成
+                current = self._cache.get(exam_id)
+                if current is not None and current is not entry and await self._is_current_async(current, version_loader, validate):
+                    return current
+                token = self._sequence
+                source_version = await version_loader() if version_loader is not None else 0
+                questions = await loader()
+                # 序列化大题库耗时较长，在线程池中执行，避免阻塞事件循环
+                entry = await anyio.to_thread.run_sync(self._build_entry, exam_id, questions, source_version)
+                return self._store(entry, token)
+        finally:
+            self._release(self._async_locks, exam_id)
+
+    def _needs_check(self, entry: QuestionBankEntry, version_loader: Optional[Callable], validate: bool) -> bool:
+        """
+        是否需要读取数据库中的版本号：传入了version_loader，并且要求每次检查或距离上次检查已超过间隔
+        """
+        return version_loader is not None and (validate or time.monotonic() - entry.checked_at >= self.version_check_interval)
+
+    def _is_current(self, entry: QuestionBankEntry, version_loader: Optional[Callable[[], int]], validate: bool) -> bool:
+        """
+        缓存项是否仍然是最新的：不需要检查版本号，或者数据库中的版本号与加载时的版本号相同
+        """
+        if not self._needs_check(entry, version_loader, validate):
+            return True
+        if version_loader() != entry.source_version:
+            return False
+        entry.checked_at = time.monotonic()
+        return True
+
+    async def _is_current_async(self, entry: QuestionBankEntry, version_loader: Optional[Callable[[], Awaitable[int]]], validate: bool) -> bool:
+        """
+        _is_current的异步版本
+        """
+        if not self._needs_check(entry, version_loader, validate):
+            return True
+        if await version_loader() != entry.source_version:
+            return False
+        entry.checked_at = time.monotonic()
+        return True
+
+    def _release(self, locks: _LoadLocks, exam_id: int) -> None:
+        """
+        释放加载锁。没有请求在加载该测试时，删除它的失效序号：之后开始的加载记录的序号都不小于它，不再需要比较
+        """
+        locks.release(exam_id)
+        with self._lock:
+            if exam_id not in self._locks and exam_id not in self._async_locks:
+                self._invalidations.pop(exam_id, None)
+
+    @staticmethod
+    def _build_entry(exam_id: int, questions: List[MpQuestionOptionDTO], source_version: int = 0) -> QuestionBankEntry:
+        """
+        生成缓存项：序列化未压缩的响应体，由响应体的摘要得到版本号，并构建答案索引
+        """
+        identity = encode_response(data=questions)
+        return QuestionBankEntry(
+            exam_id=exam_id,
+            version=content_version(identity),
+            questions=questions,
+            answer_key=AnswerKey.from_questions(questions),
+            payloads={"identity": identity},
+            payload_lock=threading.Lock(),
+            source_version=source_version,
+        )
+
+    def _store(self, entry: QuestionBankEntry, token: int) -> QuestionBankEntry:
+        """
+        加载期间（序号token之后）题库没有被失效时，将缓存项写入缓存
+        """
+        with self._lock:
+            if max(self._invalidations.get(entry.exam_id, 0), self._cleared_at) <= token:
+                self._cache.set(entry.exam_id, entry)
+        return entry
+
+    def invalidate(self, exam_ids: Iterable[int]) -> None:
+        """
+        使指定测试的题库缓存失效
+            exam_ids: 测试ID列表
+        """
+        with self._lock:
+            for exam_id in exam_ids:
+                if exam_id is None:
+                    continue
+                self._sequence += 1
+                # 只有正在加载的测试需要记录失效序号；之后才开始的加载记录的序号已经包含本次失效
+                if exam_id in self._locks or exam_id in self._async_locks:
+                    self._invalidations[exam_id] = self._sequence
+                self._cache.invalidate(exam_id)
+
+    def clear(self) -> None:
+        """
+        使全部题库缓存失效
+        """
+        with self._lock:
+            self._sequence += 1
+            self._cleared_at = self._sequence
+            self._cache.clear()
+
+
+# 全局题库缓存实例
+question_bank_cache = QuestionBankCache()
+
+
+def _field_values(data_list: Iterable[Union[BaseModel, Dict[str, Any]]], field: str) -> Set[Any]:
+    """
+    从DTO或字典列表中取出指定字段的非空值集合
+    """
+    values = set()
+    for data in data_list:
+        value = data.get(field) if isinstance(data, dict) else getattr(data, field, None)
+        if value is not None:
+            values.add(value)
+    return values
+
+
+def affected_exam_ids_query(model, ids: Set[int], data_list: list):
+    """
+    构建查询函数：查询写操作影响到的测试ID
+        model: MpQuestionModel 或 MpOptionModel
+        ids: 被修改的记录ID（修改前的数据所属的测试同样需要失效）
+        data_list: 写入的数据。问题数据中的exam_id、选项数据中的question_id指向修改后所属的测试
+    同步服务和异步服务共用该查询函数
+    """
+    ids = set(ids) | _field_values(data_list, "id")
+    if model is MpQuestionModel:
+        exam_ids = _field_values(data_list, "exam_id")
+        question_ids = ids
+    else:
+        exam_ids = set()
+        question_ids = _field_values(data_list, "question_id")
+
+    def query_func(db_session):
+        condition = MpQuestionModel.id.in_(question_ids)
+        if model is MpOptionModel and ids:
+            # 选项所属的问题
+            condition = condition | MpQuestionModel.id.in_(
+                db_session.query(MpOptionModel.question_id).filter(MpOptionModel.id.in_(ids)).scalar_subquery()
+            )
+        rows = db_session.query(MpQuestionModel.exam_id).filter(condition).distinct().all()
+        return exam_ids | {row.exam_id for row in rows}
+
+    return query_func
@@ -0,0 +1,128 @@
+import hmac
+import ipaddress
+import os
+from typing import List, Optional, Union
+
+from anyio import to_thread
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import PlainTextResponse
+
+from config.database_config import DB_POOL_OPTIONS
+from utils.metrics_util import metrics_registry
+from utils.pool_util import get_pool_stats
+from utils.sql_stats_util import statement_stats
+from utils.response_util import ResponseUtil
+
+
+def _parse_networks(value: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    return [ipaddress.ip_network(network.strip()) for network in value.split(",") if network.strip()]
+
+
+# 允许访问内部接口的网段，多个网段用英文逗号分隔，例如Prometheus所在的内网网段。默认只允许本机访问
+INTERNAL_ALLOWED_NETWORKS = _parse_networks(os.getenv("INTERNAL_ALLOWED_NETWORKS", "127.0.0.0/8,::1/128"))
+# 可信的反向代理地址（网段），多个用英文逗号分隔。默认为空：不信任任何代理
+# 连接来自可信代理时，从 X-Forwarded-For 的最右侧开始跳过可信代理，取第一个地址作为客户端地址；
+# 连接不是来自可信代理、请求却带有转发请求头（经过了未配置的代理，例如同一台机器上的nginx）时拒绝访问，
+# 避免代理转发的外部请求被当作本机请求
+INTERNAL_TRUSTED_PROXIES = _parse_networks(os.getenv("INTERNAL_TRUSTED_PROXIES", ""))
+# 内部接口的访问令牌。配置后请求还需要带 Authorization: Bearer <令牌> 或 X-Internal-Token: <令牌>
+# 代理不添加转发请求头、无法区分本机请求和代理转发的请求时，应配置该令牌
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN", "")
+
+# 代理转发时添加的请求头
+FORWARDING_HEADERS = ("x-forwarded-for", "forwarded", "x-real-ip")
+
+
+def _in_networks(address: Optional[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]], networks: list) -> bool:
+    return address is not None and any(address in network for network in networks)
+
+
+def _parse_address(value: Optional[str]) -> Optional[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]]:
+    """
+    解析IP地址，不是IP地址时（例如测试客户端的地址testclient）返回None
+    """
+    try:
+        return ipaddress.ip_address(value.strip()) if value else None
+    except ValueError:
+        return None
+
+
+def client_address(request: Request) -> Optional[Union[ipaddress.IPv4Address, ipaddress.IPv6Address]]:
+    """
+    获取请求的客户端地址，无法确定时返回None
+    连接来自可信代理时按 X-Forwarded-For 确定；否则请求带有转发请求头时无法确定（返回None），不带时为连接的对端地址
+    """
+    peer = _parse_address(request.client.host if request.client else None)
+    if not _in_networks(peer, INTERNAL_TRUSTED_PROXIES):
+        if any(header in request.headers for header in FORWARDING_HEADERS):
+            return None
+        return peer
+    forwarded_for = [item for value in request.headers.getlist("x-forwarded-for") for item in value.split(",")]
+    address = peer
+    # 从右向左：最右侧是离本服务最近的代理添加的地址，客户端可以在左侧伪造任意地址
+    for item in reversed(forwarded_for):
+        address = _parse_address(item)
+        if not _in_networks(address, INTERNAL_TRUSTED_PROXIES):
+            break
+    return address
+
+
+def _token_matches(request: Request) -> bool:
+    """
+    请求中的访问令牌是否与INTERNAL_API_TOKEN一致（固定时间比较）
+    """
+    authorization = request.headers.get("authorization", "")
+    token = authorization[7:].strip() if authorization[:7].lower() == "bearer " else request.headers.get("x-internal-token", "")
+    return hmac.compare_digest(token.encode(), INTERNAL_API_TOKEN.encode())
+
+
+def require_local_client(request: Request):
+    """
+    内部监控接口只允许本机或INTERNAL_ALLOWED_NETWORKS中的地址访问，不对小程序开放
+    配置了INTERNAL_API_TOKEN时还需要带正确的访问令牌
+    """
+    if not _in_networks(client_address(request), INTERNAL_ALLOWED_NETWORKS):
+        raise HTTPException(status_code=403, detail="内部接口只允许本机访问")
+    if INTERNAL_API_TOKEN and not _token_matches(request):
+        raise HTTPException(status_code=403, detail="内部接口的访问令牌无效")
+
+
+# 创建路由实例
+router = APIRouter(prefix='/internal', tags=['内部监控接口'], dependencies=[Depends(require_local_client)])
+# Prometheus按约定抓取 /metrics 路径，单独创建不带前缀的路由实例
+metrics_router = APIRouter(tags=['内部监控接口'], dependencies=[Depends(require_local_client)])
+
+
+"""
+Prometheus文本格式的HTTP请求指标：按路由模板统计的请求数（含状态码）、耗时直方图、处理中的请求数
+uvicorn使用多个worker进程时，配置METRICS_MULTIPROC_DIR后返回所有进程汇总的数据
+"""
+@metrics_router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+"""
+数据库连接池统计：借出次数、借出等待时间直方图、等待超时次数、连接存活时间，以及连接池当前的借出数、溢出数
+同时返回连接池配置和同步接口线程池大小，用于根据线程数确定连接池大小
+"""
+@router.get("/db/pool")
+async def dbPoolStats():
+    return ResponseUtil.success(data={
+        "pool_options": DB_POOL_OPTIONS,
+        "thread_limit": to_thread.current_default_thread_limiter().total_tokens,
+        "pools": get_pool_stats(),
+    })
+
+
+"""
+SQL语句统计：按语句形状汇总的执行次数、总耗时、平均耗时、最大耗时和行数，返回前n种
+    order_by: 排序字段 total 总耗时、count 执行次数、max 最大耗时、avg 平均耗时
+    reset: 为true时返回后清空统计数据
+"""
+@router.get("/db/statements")
+async def dbStatementStats(n: int = 20, order_by: str = "total", reset: bool = False):
+    data = statement_stats.top(n=n, order_by=order_by)
+    if reset:
+        statement_stats.reset()
+    return ResponseUtil.success(data=data)
@@ -0,0 +1,114 @@
+# ================================ 【文件说明】 ================================
+# 同步数据访问层（BaseDao）与异步数据访问层（AsyncBaseDao）的吞吐量对比脚本
+#
+# 脚本在进程内创建一个FastAPI应用，包含两个功能相同的接口：
+#   /sync/getExamList   def接口       + MpExamService       （占用anyio线程池中的线程，阻塞在pymysql上）
+#   /async/getExamList  async def接口 + AsyncMpExamService  （运行在事件循环上，使用aiomysql）
+# 然后使用httpx模拟大量并发客户端分别压测两个接口，输出吞吐量和延迟分位数。
+#
+# 脚本使用方式（在项目根目录下运行，数据库使用 config/database_config.py 中配置的本地数据库）
+#   python scripts/benchmark_async_vs_sync.py --concurrency 256 --requests 5000
+#
+# 依赖：httpx（pip install httpx）
+# ==============================================================================
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import anyio.to_thread
+import httpx
+from fastapi import FastAPI
+
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+from modules.module_exam.service.mp_exam_service import MpExamService, AsyncMpExamService
+
+
+def create_app() -> FastAPI:
+    """
+    创建压测使用的FastAPI应用，同步接口和异步接口执行相同的分页查询
+    """
+    app = FastAPI()
+    sync_service = MpExamService()
+    async_service = AsyncMpExamService()
+
+    @app.get("/sync/getExamList")
+    def sync_get_exam_list(page_num: int = 1, page_size: int = 10):
+        return sync_service.get_page_list_by_filters(page_num=page_num, page_size=page_size, filters=MpExamDTO(status=0))
+
+    @app.get("/async/getExamList")
+    async def async_get_exam_list(page_num: int = 1, page_size: int = 10):
+        return await async_service.get_page_list_by_filters(page_num=page_num, page_size=page_size, filters=MpExamDTO(status=0))
+
+    return app
+
+
+async def run_load(client: httpx.AsyncClient, path: str, concurrency: int, total_requests: int) -> dict:
+    """
+    使用concurrency个并发客户端，共发送total_requests个请求，返回统计结果
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = total_requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(0.50),
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def main(concurrency: int, total_requests: int, warmup: int):
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    print(f"并发客户端数 = {concurrency}, 每轮请求数 = {total_requests}, anyio线程池大小 = {limiter.total_tokens}")
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+        for mode in ("sync", "async"):
+            path = f"/{mode}/getExamList"
+            # 预热：建立连接池中的连接
+            await run_load(client, path, min(concurrency, 20), warmup)
+            stats = await run_load(client, path, concurrency, total_requests)
+            print(f"[{mode:>5}] rps = {stats['rps']:.1f}, p50 = {stats['p50_ms']:.1f}ms, "
+                  f"p95 = {stats['p95_ms']:.1f}ms, p99 = {stats['p99_ms']:.1f}ms, "
+                  f"errors = {stats['errors']}, elapsed = {stats['elapsed_s']:.2f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="同步与异步数据访问层吞吐量对比")
+    parser.add_argument("--concurrency", type=int, default=256, help="并发客户端数，默认256")
+    parser.add_argument("--requests", type=int, default=5000, help="每轮压测的请求总数，默认5000")
+    parser.add_argument("--warmup", type=int, default=200, help="预热请求数，默认200")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.warmup))
@@ -0,0 +1,98 @@
+# ================================ 【文件说明】 ================================
+# 响应压缩的CPU开销与节省字节数对比脚本
+#
+# 构造一个题库响应体（--questions 个问题，每个问题 --options 个选项，选项内容 --content-length 个字符，
+# 内容为随机汉字组合，接近真实题库的压缩率），对 gzip 各级别、brotli 各级别（需要安装brotli）分别测量：
+#   压缩后大小、压缩率、压缩耗时、解压耗时（客户端开销）
+# 并给出按 --rps 的请求量计算的每秒压缩CPU耗时：实时压缩每个请求都要压缩一次，预压缩（题库缓存项中保存压缩结果）每个题库只压缩一次
+#
+# 脚本使用方式（在项目根目录下运行，不需要数据库）
+#   python scripts/benchmark_compression.py --questions 500 --options 4 --content-length 500 --rps 50
+#
+# 依赖：brotli（可选，pip install brotli）
+# ==============================================================================
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.module_exam.dto.mp_option_dto import MpOptionDTO
+from modules.module_exam.dto.mp_question_dto import MpQuestionOptionDTO
+from utils.compression_util import brotli
+from utils.response_util import encode_response
+
+GZIP_LEVELS = (1, 3, 6, 9)
+BROTLI_QUALITIES = (1, 4, 5, 7, 9, 11)
+
+
+def build_body(question_count: int, option_count: int, content_length: int, seed: int = 1) -> bytes:
+    """
+    构造题库响应体，题目和选项内容由随机汉字词语组成
+    """
+    rnd = random.Random(seed)
+    words = ["".join(chr(0x4e00 + rnd.randrange(3000)) for _ in range(rnd.randrange(1, 4))) for _ in range(3000)]
+
+    def text(length: int) -> str:
+        result = ""
+        while len(result) < length:
+            result += rnd.choice(words)
+        return result[:length]
+
+    questions = [
+        MpQuestionOptionDTO(
+            id=question_id, exam_id=1, name=text(30), type=1, status=0,
+            options=[
+                MpOptionDTO(id=question_id * 100 + option_id, question_id=question_id, content=text(content_length),
+                            is_right=1 if option_id == 0 else 0, status=0)
+                for option_id in range(option_count)
+            ],
+        )
+        for question_id in range(1, question_count + 1)
+    ]
+    return encode_response(data=questions)
+
+
+def measure(func, rounds: int):
+    """
+    执行rounds次func，返回最后一次的结果和平均耗时（毫秒）
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        result = func()
+    return result, (time.perf_counter() - start) / rounds * 1000
+
+
+def main(question_count: int, option_count: int, content_length: int, rounds: int, rps: float):
+    body = build_body(question_count, option_count, content_length)
+    print(f"响应体 = {len(body) / 1024:.1f}KB, 每秒请求数 = {rps}, brotli = {'已安装' if brotli is not None else '未安装'}")
+    print(f"{'编码':>10} {'压缩后KB':>10} {'压缩率':>8} {'压缩ms':>9} {'解压ms':>8} {'实时压缩CPU/秒':>14} {'节省KB/请求':>12}")
+
+    cases = [(f"gzip-{level}", lambda level=level: gzip.compress(body, compresslevel=level, mtime=0), gzip.decompress)
+             for level in GZIP_LEVELS]
+    if brotli is not None:
+        cases += [(f"br-{quality}", lambda quality=quality: brotli.compress(body, quality=quality), brotli.decompress)
+                  for quality in BROTLI_QUALITIES]
+
+    for name, compress_func, decompress_func in cases:
+        # brotli 11级很慢，只执行一次
+        compressed, compress_ms = measure(compress_func, 1 if name == "br-11" else rounds)
+        _, decompress_ms = measure(lambda: decompress_func(compressed), rounds)
+        print(f"{name:>10} {len(compressed) / 1024:>10.1f} {len(compressed) / len(body):>8.1%} {compress_ms:>9.2f} "
+              f"{decompress_ms:>8.2f} {compress_ms * rps / 1000:>13.2f}s {(len(body) - len(compressed)) / 1024:>12.1f}")
+    print("预压缩：每个题库版本只压缩一次，之后每个请求的压缩CPU开销为0")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="响应压缩的CPU开销与节省字节数对比")
+    parser.add_argument("--questions", type=int, default=500, help="问题数，默认500")
+    parser.add_argument("--options", type=int, default=4, help="每个问题的选项数，默认4")
+    parser.add_argument("--content-length", type=int, default=500, help="选项内容的字符数，默认500")
+    parser.add_argument("--rounds", type=int, default=5, help="每种编码执行的次数，默认5")
+    parser.add_argument("--rps", type=float, default=50, help="用于估算实时压缩CPU开销的每秒请求数，默认50")
+    args = parser.parse_args()
+    main(args.questions, args.options, args.content_length, args.rounds, args.rps)
@@ -0,0 +1,128 @@
+# ================================ 【文件说明】 ================================
+# 日志配置对吞吐量影响的对比脚本
+#
+# 脚本在进程内创建一个FastAPI应用，注册日志中间件，接口与 /mp/exam/danxue_Answer 一样输出一条多字段的请求日志（不访问数据库，
+# 只比较日志本身的开销），然后使用httpx模拟并发客户端，分别在以下日志配置下压测，输出吞吐量和延迟分位数：
+#   off                关闭INFO日志（LOG_LEVEL=WARNING）
+#   text               彩色文本，在请求线程中同步写入（原有方式）
+#   json               JSON格式，在请求线程中同步写入
+#   json+background    JSON格式，后台线程写入（LOG_ASYNC=1）
+#   json+background+sampled  JSON格式，后台线程写入，接口采样率为 --sample-rate（LOG_SAMPLE_RATES）
+#
+# 脚本使用方式（在项目根目录下运行，日志写入 --log-file 指定的文件）
+#   python scripts/benchmark_logging.py --concurrency 64 --requests 20000 --log-file /tmp/benchmark.log
+#
+# 依赖：httpx（pip install httpx）
+# ==============================================================================
+import argparse
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+from fastapi import Body, FastAPI
+
+from config.log_config import configure_logging, request_logger, set_sample_rates
+from middlewares.logger_middleware import LoggerMiddleware
+
+ANSWER_PATH = "/mp/exam/danxue_Answer"
+
+# 日志配置：名称 -> (日志级别, 输出格式, 是否后台写入, 是否采样)
+MODES = {
+    "off": ("WARNING", "text", False, False),
+    "text": ("INFO", "text", False, False),
+    "json": ("INFO", "json", False, False),
+    "json+background": ("INFO", "json", True, False),
+    "json+background+sampled": ("INFO", "json", True, True),
+}
+
+
+def create_app() -> FastAPI:
+    """
+    创建压测使用的FastAPI应用，接口只输出请求日志
+    """
+    app = FastAPI()
+    app.middleware("http")(LoggerMiddleware)
+
+    @app.post(ANSWER_PATH)
+    async def danxue_answer(userId: int = Body(None), examId: int = Body(None), questionId: int = Body(None),
+                            optionId: int = Body(None), pageNo: int = Body(None)):
+        request_logger.info('/mp/exam/danxue_Answer, userId = {}, examId = {}, questionId = {}, optionId = {}, pageNo = {}',
+                            userId, examId, questionId, optionId, pageNo)
+        return {"code": 200, "message": "success"}
+
+    return app
+
+
+async def run_load(client: httpx.AsyncClient, concurrency: int, total_requests: int) -> dict:
+    """
+    使用concurrency个并发客户端，共发送total_requests个请求，返回统计结果
+    """
+    latencies: List[float] = []
+    errors = 0
+    remaining = total_requests
+    payload = {"userId": 1, "examId": 1, "questionId": 11, "optionId": 111, "pageNo": 1}
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            try:
+                response = await client.post(ANSWER_PATH, json=payload)
+                if response.status_code != 200:
+                    errors += 1
+            except Exception:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000
+
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+    }
+
+
+async def main(concurrency: int, total_requests: int, log_file: str, sample_rate: float):
+    app = create_app()
+    transport = httpx.ASGITransport(app=app)
+    print(f"并发客户端数 = {concurrency}, 每轮请求数 = {total_requests}, 日志文件 = {log_file}")
+
+    with open(log_file, "w", encoding="utf-8") as stream:
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=120) as client:
+            for mode, (level, fmt, use_background, sampled) in MODES.items():
+                configure_logging(level=level, fmt=fmt, use_background=use_background, stream=stream)
+                set_sample_rates(f"{ANSWER_PATH}={sample_rate}" if sampled else "")
+                # 预热
+                await run_load(client, min(concurrency, 20), 200)
+                stats = await run_load(client, concurrency, total_requests)
+                print(f"[{mode:>23}] rps = {stats['rps']:.1f}, p50 = {stats['p50_ms']:.2f}ms, "
+                      f"p99 = {stats['p99_ms']:.2f}ms, errors = {stats['errors']}")
+    # 恢复默认的日志配置（同时写完后台队列中剩余的日志）
+    set_sample_rates("")
+    configure_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="日志配置对吞吐量影响的对比")
+    parser.add_argument("--concurrency", type=int, default=64, help="并发客户端数，默认64")
+    parser.add_argument("--requests", type=int, default=20000, help="每轮压测的请求总数，默认20000")
+    parser.add_argument("--log-file", default="benchmark.log", help="日志输出文件，默认当前目录下的 benchmark.log")
+    parser.add_argument("--sample-rate", type=float, default=0.1, help="采样模式下接口的日志采样率，默认0.1")
+    args = parser.parse_args()
+    asyncio.run(main(args.concurrency, args.requests, args.log_file, args.sample_rate))
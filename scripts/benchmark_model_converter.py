@@ -0,0 +1,121 @@
+# ================================ 【文件说明】 ================================
+# 模型实例 → DTO 转换方式的耗时和内存分配对比脚本
+#
+# 在内存中构造rows条模型实例（不需要连接数据库），对比以下几种转换方式：
+#   legacy     原写法：_model_to_dict__ 逐字段getattr并把datetime转为字符串，再逐条调用model_validate
+#   construct  ModelConverter.to_dto_list  可信转换，跳过校验直接构建DTO
+#   validate   ModelConverter.validate_list  通过缓存的TypeAdapter对整个列表做一次批量校验
+#
+# 耗时取rounds轮的平均值。内存通过tracemalloc统计单轮转换：
+#   结果占用  转换结束后DTO列表仍占用的内存
+#   临时分配  转换过程中的内存峰值减去结果占用，即中间字典、字符串等临时对象的开销
+#
+# 脚本使用方式（在项目根目录下运行）
+#   python scripts/benchmark_model_converter.py --table mp_user_option --rows 10000 --rounds 5
+# ==============================================================================
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.module_exam.dao.model_converter import get_model_converter
+from modules.module_exam.dto.mp_option_dto import MpOptionDTO
+from modules.module_exam.dto.mp_question_dto import MpQuestionDTO
+from modules.module_exam.dto.mp_user_option_dto import MpUserOptionDTO
+from modules.module_exam.model.mp_option_model import MpOptionModel
+from modules.module_exam.model.mp_question_model import MpQuestionModel
+from modules.module_exam.model.mp_user_option_model import MpUserOptionModel
+
+# 可压测的表及其(模型类, DTO类)
+TABLES = {
+    "mp_option": (MpOptionModel, MpOptionDTO),
+    "mp_question": (MpQuestionModel, MpQuestionDTO),
+    "mp_user_option": (MpUserOptionModel, MpUserOptionDTO),
+}
+
+
+def build_rows(model, rows: int) -> list:
+    """
+    构造rows条模型实例，按字段类型填充数据
+    """
+    now = datetime.now()
+    values = {}
+    for column in model.__table__.columns:
+        python_type = column.type.python_type
+        if python_type is datetime:
+            values[column.key] = now
+        elif python_type is int:
+            values[column.key] = 1
+        else:
+            values[column.key] = "benchmark"
+    result = []
+    for i in range(rows):
+        instance = model(**values)
+        instance.id = i + 1
+        result.append(instance)
+    return result
+
+
+def legacy_model_to_dict(instance) -> dict:
+    """
+    原BaseDao._model_to_dict__的写法
+    """
+    model_dict = {}
+    for column in instance.__table__.columns:
+        value = getattr(instance, column.name)
+        if isinstance(value, datetime):
+            model_dict[column.name] = value.isoformat()
+        else:
+            model_dict[column.name] = value
+    return model_dict
+
+
+def measure(func, rounds: int):
+    """
+    执行func函数rounds次，返回(平均耗时毫秒, 结果占用KB, 临时分配KB)
+    """
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    avg_ms = (time.perf_counter() - start) / rounds * 1000
+
+    tracemalloc.start()
+    result = func()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return avg_ms, current / 1024, (peak - current) / 1024
+
+
+def main(table: str, rows: int, rounds: int):
+    model, dto = TABLES[table]
+    records = build_rows(model, rows)
+    converter = get_model_converter(model, dto)
+
+    cases = {
+        "legacy": lambda: [dto.model_validate(legacy_model_to_dict(record)) for record in records],
+        "construct": lambda: converter.to_dto_list(records),
+        "validate": lambda: converter.validate_list(records),
+    }
+
+    print(f"表 = {table}, 记录数 = {rows}, 轮数 = {rounds}")
+    baseline = None
+    for name, func in cases.items():
+        avg_ms, result_kb, temp_kb = measure(func, rounds)
+        baseline = baseline or avg_ms
+        print(f"[{name:>9}] 平均耗时 = {avg_ms:.2f}ms, 相对legacy = {avg_ms / baseline:.2f}x, 结果占用 = {result_kb:.0f}KB, 临时分配 = {temp_kb:.0f}KB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="模型实例转DTO方式耗时和内存分配对比")
+    parser.add_argument("--table", choices=TABLES.keys(), default="mp_user_option", help="压测的表，默认mp_user_option")
+    parser.add_argument("--rows", type=int, default=10000, help="每轮转换的记录数，默认10000")
+    parser.add_argument("--rounds", type=int, default=5, help="每种方式执行的轮数，默认5")
+    args = parser.parse_args()
+    main(args.table, args.rows, args.rounds)
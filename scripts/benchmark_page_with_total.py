@@ -0,0 +1,78 @@
+# ================================ 【文件说明】 ================================
+# 分页数据 + 记录总数 查询方式的耗时对比脚本
+#
+# 对比以下几种写法：
+#   two_call   先调用get_page_list_by_filters，再调用get_total_by_filters（两个会话、两个事务）
+#   exact      get_page_with_total(count_mode="exact")      一条SQL，通过 COUNT(*) OVER() 得到总数
+#   cached     get_page_with_total(count_mode="cached")     总数从缓存读取
+#   estimated  get_page_with_total(count_mode="estimated")  无查询条件时读取MySQL表统计信息
+#
+# 脚本使用方式（在项目根目录下运行，数据库使用 config/database_config.py 中配置的本地数据库）
+#   python scripts/benchmark_page_with_total.py --table mp_user_option --page-num 1 --rounds 200
+# ==============================================================================
+import argparse
+import os
+import sys
+import time
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules.module_exam.service.mp_exam_service import MpExamService
+from modules.module_exam.service.mp_option_service import MpOptionService
+from modules.module_exam.service.mp_question_service import MpQuestionService
+from modules.module_exam.service.mp_user_exam_service import MpUserExamService
+from modules.module_exam.service.mp_user_option_service import MpUserOptionService
+
+# 可压测的表及其服务类
+SERVICES = {
+    "mp_exam": MpExamService,
+    "mp_option": MpOptionService,
+    "mp_question": MpQuestionService,
+    "mp_user_exam": MpUserExamService,
+    "mp_user_option": MpUserOptionService,
+}
+
+
+def measure(func, rounds: int) -> float:
+    """
+    执行func函数rounds次，返回平均耗时（毫秒）
+    """
+    func()  # 预热
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main(table: str, page_num: int, page_size: int, rounds: int):
+    service = SERVICES[table]()
+    sort_by = ["-id"]
+
+    def two_call():
+        service.get_page_list_by_filters(page_num=page_num, page_size=page_size, sort_by=sort_by)
+        return service.get_total_by_filters()
+
+    cases = {
+        "two_call": two_call,
+        "exact": lambda: service.get_page_with_total(page_num=page_num, page_size=page_size, sort_by=sort_by, count_mode="exact"),
+        "cached": lambda: service.get_page_with_total(page_num=page_num, page_size=page_size, sort_by=sort_by, count_mode="cached"),
+        "estimated": lambda: service.get_page_with_total(page_num=page_num, page_size=page_size, sort_by=sort_by, count_mode="estimated"),
+    }
+
+    print(f"表 = {table}, 页码 = {page_num}, 每页大小 = {page_size}, 轮数 = {rounds}")
+    baseline = None
+    for name, func in cases.items():
+        avg_ms = measure(func, rounds)
+        baseline = baseline or avg_ms
+        print(f"[{name:>9}] 平均耗时 = {avg_ms:.3f}ms, 相对two_call = {avg_ms / baseline:.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="分页数据+记录总数查询方式耗时对比")
+    parser.add_argument("--table", choices=SERVICES.keys(), default="mp_user_option", help="压测的表，默认mp_user_option")
+    parser.add_argument("--page-num", type=int, default=1, help="页码，默认1")
+    parser.add_argument("--page-size", type=int, default=10, help="每页大小，默认10")
+    parser.add_argument("--rounds", type=int, default=200, help="每种写法执行的轮数，默认200")
+    args = parser.parse_args()
+    main(args.table, args.page_num, args.page_size, args.rounds)
@@ -0,0 +1,94 @@
+# ================================ 【文件说明】 ================================
+# 接口响应序列化方式的耗时对比脚本
+#
+# 构造一个大题库（--questions 个问题，每个问题 --options 个选项，选项内容 --content-length 个字符），
+# 比较 /mp/exam/getQuestionList 响应体的三种生成方式，并检查三种方式输出的JSON完全相同：
+#   fastapi   ResponseUtil.success 返回pydantic模型，由FastAPI调用jsonable_encoder转换后再用json.dumps序列化（原有方式）
+#   direct    ResponseUtil.success_json 直接序列化为字节串（有orjson时使用orjson）
+#   cached    题库缓存项中保存的响应体，只在第一次请求时序列化，之后直接复用
+#
+# 脚本使用方式（在项目根目录下运行，不需要数据库）
+#   python scripts/benchmark_response_serialization.py --questions 500 --options 4 --content-length 500
+# ==============================================================================
+import argparse
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder
+from starlette.responses import JSONResponse
+
+from modules.module_exam.dto.mp_option_dto import MpOptionDTO
+from modules.module_exam.dto.mp_question_dto import MpQuestionOptionDTO
+from modules.module_exam.service.answer_key import AnswerKey
+from modules.module_exam.service.question_bank_cache import QuestionBankEntry
+from utils.response_util import ResponseUtil, orjson
+
+
+def build_questions(question_count: int, option_count: int, content_length: int) -> list:
+    """
+    构造测试题库
+    """
+    now = datetime.now()
+    return [
+        MpQuestionOptionDTO(
+            id=question_id, exam_id=1, name=f"问题{question_id}", type=1, status=0, create_time=now,
+            options=[
+                MpOptionDTO(id=question_id * 100 + option_id, question_id=question_id, content="选" * content_length,
+                            is_right=1 if option_id == 0 else 0, status=0, create_time=now)
+                for option_id in range(option_count)
+            ],
+        )
+        for question_id in range(1, question_count + 1)
+    ]
+
+
+def measure(func, rounds: int) -> float:
+    """
+    执行rounds次func，返回平均耗时（毫秒）
+    """
+    start = time.perf_counter()
+    for _ in range(rounds):
+        func()
+    return (time.perf_counter() - start) / rounds * 1000
+
+
+def main(question_count: int, option_count: int, content_length: int, rounds: int) -> bool:
+    questions = build_questions(question_count, option_count, content_length)
+    entry = QuestionBankEntry(exam_id=1, version=1, questions=questions,
+                              answer_key=AnswerKey.from_questions(questions), payloads={},
+                              payload_lock=threading.Lock())
+
+    cases = {
+        "fastapi": lambda: JSONResponse(jsonable_encoder(ResponseUtil.success(data=questions))).body,
+        "direct": lambda: ResponseUtil.success_json(data=questions).body,
+        "cached": lambda: entry.response_body(),
+    }
+
+    expected = cases["fastapi"]()
+    same = all(func() == expected for func in cases.values())
+    print(f"问题数 = {question_count}, 每题选项数 = {option_count}, 选项内容长度 = {content_length}, "
+          f"响应体 = {len(expected) / 1024:.1f}KB, orjson = {'已安装' if orjson is not None else '未安装'}")
+    print(f"三种方式输出的JSON{'完全相同' if same else '不同！'}")
+
+    baseline = None
+    for name, func in cases.items():
+        elapsed = measure(func, rounds)
+        baseline = baseline or elapsed
+        print(f"[{name:>7}] 平均 {elapsed:.3f}ms / 次, 相对原有方式 {baseline / elapsed:.1f}x")
+    return same
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="接口响应序列化方式的耗时对比")
+    parser.add_argument("--questions", type=int, default=500, help="问题数，默认500")
+    parser.add_argument("--options", type=int, default=4, help="每个问题的选项数，默认4")
+    parser.add_argument("--content-length", type=int, default=500, help="选项内容的字符数，默认500")
+    parser.add_argument("--rounds", type=int, default=20, help="每种方式执行的次数，默认20")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.questions, args.options, args.content_length, args.rounds) else 1)
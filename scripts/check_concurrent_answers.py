@@ -0,0 +1,121 @@
+# ================================ 【文件说明】 ================================
+# 并发答题时测试分数是否正确的检查脚本
+#
+# 模拟同一个用户对同一个测试并发提交concurrency次答题（每次得1分），检查最终结果：
+#   只有一条未完成的测试记录，且分数等于concurrency
+#
+# 两种写法：
+#   atomic  MpUserExamService.record_answer，一条 INSERT ... ON DUPLICATE KEY UPDATE score = score + 1 完成
+#   legacy  原写法：先查询未完成的测试记录，在Python中修改分数后再update_by_id写回，不存在时add一条
+#           并发时会丢失更新，或创建出多条未完成记录
+#
+# 检查前后会删除 user_id 对应用户在该测试下的测试记录，请使用不存在的用户id
+#
+# 脚本使用方式（在项目根目录下运行，数据库使用 config/database_config.py 中配置的本地数据库）
+#   python scripts/check_concurrent_answers.py --user-id 999999 --exam-id 1 --concurrency 50 --mode atomic
+#   --async-url 可以指定其他数据库，例如 sqlite+aiosqlite:///test.db（需已建表，已有数据库先执行 scripts/upgrade_schema.py）
+#   --sqlite 不需要MySQL：在临时SQLite文件中按当前模型建表后检查（唯一索引和 ON CONFLICT 的写法与MySQL不同，
+#            MySQL上的结果仍需在MySQL中执行本脚本确认）
+#   python scripts/check_concurrent_answers.py --sqlite --concurrency 50
+# ==============================================================================
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from config.database_config import myAsyncSession, myBaseModel
+from modules.module_exam.dto.mp_user_exam_dto import MpUserExamDTO
+from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
+from modules.module_exam.service.mp_user_exam_service import AsyncMpUserExamService
+
+
+async def submit_atomic(service: AsyncMpUserExamService, user_id: int, exam_id: int, page_no: int):
+    """
+    新写法：一条语句原子地累加分数
+    """
+    await service.record_answer(user_id=user_id, exam_id=exam_id, score_delta=1, page_no=page_no)
+
+
+async def submit_legacy(service: AsyncMpUserExamService, user_id: int, exam_id: int, page_no: int):
+    """
+    原写法：读取-修改-写回
+    """
+    user_exam = await service.find_last_one_not_finished_user_exam(user_id=user_id, exam_id=exam_id)
+    if user_exam is None:
+        await service.add(data=MpUserExamDTO(user_id=user_id, exam_id=exam_id, page_no=page_no, score=1))
+    else:
+        user_exam.score += 1
+        user_exam.page_no = page_no
+        await service.update_by_id(id=user_exam.id, update_data=user_exam)
+
+
+async def clean(service: AsyncMpUserExamService, user_id: int, exam_id: int):
+    """
+    删除检查用户在该测试下的测试记录
+    """
+    await service.session_execute_query(lambda db_session: db_session.execute(
+        delete(MpUserExamModel).where(MpUserExamModel.user_id == user_id, MpUserExamModel.exam_id == exam_id)
+    ).rowcount)
+
+
+async def main(user_id: int, exam_id: int, concurrency: int, mode: str) -> bool:
+    service = AsyncMpUserExamService()
+    submit = submit_atomic if mode == "atomic" else submit_legacy
+
+    await clean(service, user_id, exam_id)
+    results = await asyncio.gather(
+        *[submit(service, user_id, exam_id, page_no) for page_no in range(1, concurrency + 1)],
+        return_exceptions=True,
+    )
+    errors = [result for result in results if isinstance(result, Exception)]
+
+    records = await service.get_list_by_filters(filters=MpUserExamDTO(user_id=user_id, exam_id=exam_id))
+    unfinished = [record for record in records if record.finish_time is None]
+    total_score = sum(record.score for record in unfinished)
+    await clean(service, user_id, exam_id)
+
+    passed = not errors and len(unfinished) == 1 and total_score == concurrency
+    print(f"写法 = {mode}, 并发提交次数 = {concurrency}, 失败请求数 = {len(errors)}")
+    print(f"未完成记录数 = {len(unfinished)}（期望1）, 分数 = {[record.score for record in unfinished]}（期望{concurrency}）")
+    for error in errors[:3]:
+        print(f"失败原因: {error!r}")
+    print("检查通过" if passed else "检查未通过")
+    return passed
+
+
+async def main_sqlite(path: str, args) -> bool:
+    """
+    在临时SQLite文件中按当前模型创建mp_user_exam表（包含唯一索引uk_user_exam_unfinished）后检查
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+    async with engine.begin() as conn:
+        await conn.run_sync(myBaseModel.metadata.create_all, tables=[MpUserExamModel.__table__])
+    myAsyncSession.configure(bind=engine)
+    try:
+        return await main(args.user_id, args.exam_id, args.concurrency, args.mode)
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="并发答题分数检查")
+    parser.add_argument("--user-id", type=int, default=999999, help="检查使用的用户id，默认999999")
+    parser.add_argument("--exam-id", type=int, default=1, help="检查使用的测试id，默认1")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发提交次数，默认50")
+    parser.add_argument("--mode", choices=["atomic", "legacy"], default="atomic", help="答题写法，默认atomic")
+    parser.add_argument("--async-url", default=None, help="异步数据库连接地址，默认使用database_config中的配置")
+    parser.add_argument("--sqlite", action="store_true", help="在临时SQLite文件中建表后检查，不需要MySQL")
+    args = parser.parse_args()
+    if args.sqlite:
+        with tempfile.TemporaryDirectory() as directory:
+            sys.exit(0 if asyncio.run(main_sqlite(os.path.join(directory, "check.db"), args)) else 1)
+    if args.async_url:
+        myAsyncSession.configure(bind=create_async_engine(args.async_url))
+    sys.exit(0 if asyncio.run(main(args.user_id, args.exam_id, args.concurrency, args.mode)) else 1)
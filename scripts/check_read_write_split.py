@@ -0,0 +1,110 @@
+# ================================ 【文件说明】 ================================
+# 读写分离路由检查脚本
+#
+# 使用两个本地SQLite数据库文件分别作为主库和从库，两个库中id=1的测试名称不同（primary / replica），
+# 通过读到的测试名称判断查询实际在哪个库执行，检查以下情况：
+#   1. 普通读操作在从库执行
+#   2. 请求中发生写操作后，该请求的读操作在主库执行（读到自己的写入）；其他请求不受影响，仍读从库
+#   3. 工作单元中写操作之后的读操作在主库执行
+#   4. use_primary() 代码块中的读操作在主库执行
+#   5. 异步服务的路由与同步服务相同
+#
+# 脚本使用方式（在项目根目录下运行，会覆盖目录中的 primary.db、replica.db 文件）
+#   python scripts/check_read_write_split.py --dir /tmp
+# ==============================================================================
+import argparse
+import asyncio
+import contextvars
+import os
+import sys
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+
+import config.database_config as database_config
+from config.database_config import unit_of_work, use_primary
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+from modules.module_exam.model.mp_exam_model import MpExamModel
+from modules.module_exam.service.mp_exam_service import MpExamService, AsyncMpExamService
+
+
+def prepare(directory: str):
+    """
+    创建主库和从库文件，并把同步、异步会话分别绑定到主库，从库选择器指向从库
+    """
+    engines = {}
+    for name in ("primary", "replica"):
+        path = os.path.join(directory, f"{name}.db")
+        if os.path.exists(path):
+            os.remove(path)
+        engine = create_engine(f"sqlite:///{path}")
+        MpExamModel.__table__.create(engine)
+        with engine.begin() as conn:
+            conn.execute(MpExamModel.__table__.insert(), [{"id": 1, "name": name, "type": "check", "status": 0}])
+        engines[name] = (engine, create_async_engine(f"sqlite+aiosqlite:///{path}"))
+    database_config.mySession.configure(bind=engines["primary"][0])
+    database_config.myAsyncSession.configure(bind=engines["primary"][1])
+    database_config.replica_router.configure([engines["replica"][0]])
+    database_config.async_replica_router.configure([engines["replica"][1].sync_engine])
+
+
+def run_in_new_request(func):
+    """
+    在新的上下文中执行func，模拟一次独立的请求
+    """
+    return contextvars.Context().run(func)
+
+
+def check_sync() -> list:
+    service = MpExamService()
+    results = []
+    results.append(("普通读操作读从库", run_in_new_request(lambda: service.get_by_id(1).name), "replica"))
+
+    def write_then_read():
+        service.update_by_id(1, MpExamDTO(status=0))
+        return service.get_by_id(1).name
+    results.append(("写操作后同一请求读主库", run_in_new_request(write_then_read), "primary"))
+    results.append(("其他请求仍读从库", run_in_new_request(lambda: service.get_by_id(1).name), "replica"))
+
+    def unit_of_work_read():
+        with unit_of_work():
+            before = service.get_by_id(1).name
+            service.update_by_id(1, MpExamDTO(status=0))
+            return before + "," + service.get_by_id(1).name
+    results.append(("工作单元中写操作前读从库、写操作后读主库", run_in_new_request(unit_of_work_read), "replica,primary"))
+
+    def primary_block():
+        with use_primary():
+            return service.get_by_id(1).name
+    results.append(("use_primary中读主库", run_in_new_request(primary_block), "primary"))
+    return results
+
+
+async def check_async() -> list:
+    service = AsyncMpExamService()
+    results = [("异步 普通读操作读从库", (await service.get_by_id(1)).name, "replica")]
+    await service.update_by_id(1, MpExamDTO(status=0))
+    results.append(("异步 写操作后同一请求读主库", (await service.get_by_id(1)).name, "primary"))
+    return results
+
+
+def main(directory: str) -> bool:
+    prepare(directory)
+    results = check_sync() + run_in_new_request(lambda: asyncio.run(check_async()))
+    passed = True
+    for name, actual, expected in results:
+        ok = actual == expected
+        passed = passed and ok
+        print(f"[{'通过' if ok else '失败'}] {name}: 读到 {actual}（期望 {expected}）")
+    print("检查通过" if passed else "检查未通过")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="读写分离路由检查")
+    parser.add_argument("--dir", default=".", help="主库、从库数据库文件所在目录，默认当前目录")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.dir) else 1)
@@ -0,0 +1,138 @@
+# ================================ 【文件说明】 ================================
+# 微信接口客户端检查脚本
+#
+# 在后台线程中启动微信接口模拟服务（scripts/wx_stub_server.py），使用 AsyncWxClient 调用模拟服务，检查以下情况：
+#   1. 正常调用返回openid，code无效时返回微信的errcode
+#   2. 并发调用复用长连接，同时进行的调用数不超过上限
+#   3. 可重试的调用（获取access_token）读取超时后重试，重试次数有上限
+#   4. code只能使用一次，code2session读取超时后不重试
+#   5. 系统繁忙（errcode=-1）时重试，重试成功后正常返回
+#   6. 连续失败后熔断，熔断期间直接失败且不请求微信接口；熔断时间过后试探调用成功则恢复
+#
+# 脚本使用方式（在项目根目录下运行）
+#   python scripts/check_wx_client.py --port 18081
+# ==============================================================================
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx
+import uvicorn
+
+from scripts.wx_stub_server import StubState, create_app
+from utils.wx_client_util import AsyncWxClient, CircuitBreaker, WxApiError, WxApiUnavailable
+
+
+def start_stub(state: StubState, port: int) -> uvicorn.Server:
+    """
+    在后台线程中启动模拟服务，等待启动完成后返回
+    """
+    server = uvicorn.Server(uvicorn.Config(create_app(state), host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+    return server
+
+
+async def expect_error(coro, error_type=WxApiError) -> bool:
+    try:
+        await coro
+    except error_type:
+        return True
+    return False
+
+
+async def run_checks(state: StubState, base_url: str) -> list:
+    results = []
+    timeout = httpx.Timeout(0.2, connect=1, pool=1)
+
+    def configure(latency_ms=0, error_rate=0, busy_rate=0):
+        state.latency_ms, state.error_rate, state.busy_rate = latency_ms, error_rate, busy_rate
+        state.reset_stats()
+
+    client = AsyncWxClient(base_url=base_url, max_retries=2, max_concurrency=5, timeout=timeout,
+                           breaker=CircuitBreaker(failure_threshold=3, reset_timeout=0.5))
+
+    configure()
+    result = await client.code2session("abc")
+    results.append(("正常调用返回openid", result.get("openid"), "openid-abc"))
+    result = await client.code2session("invalid")
+    results.append(("code无效时返回errcode", result.get("errcode"), 40029))
+
+    configure(latency_ms=50)
+    await asyncio.gather(*(client.code2session(f"c{i}") for i in range(40)))
+    results.append(("并发调用数不超过上限5", state.max_in_flight <= 5, True))
+    results.append(("40次调用复用长连接（连接数不超过5）", len(state.connections) <= 5, True))
+
+    configure(latency_ms=500)
+    failed = await expect_error(client.get_access_token())
+    results.append(("获取access_token读取超时后失败", failed, True))
+    results.append(("获取access_token读取超时后重试2次（共调用3次）", state.calls.get("/cgi-bin/token"), 3))
+
+    configure(latency_ms=500)
+    client.breaker.record_success()
+    failed = await expect_error(client.code2session("slow"))
+    results.append(("code2session读取超时后失败", failed, True))
+    results.append(("code2session读取超时后不重试（共调用1次）", state.calls.get("/sns/jscode2session"), 1))
+
+    # 第一次返回系统繁忙、第二次正常：busy_rate=1，第一次调用后改为0
+    configure(busy_rate=1)
+    client.breaker.record_success()
+    original_sleep = asyncio.sleep
+
+    async def sleep_and_recover(delay):
+        state.busy_rate = 0
+        await original_sleep(delay)
+    asyncio.sleep = sleep_and_recover
+    try:
+        result = await client.get_access_token()
+    finally:
+        asyncio.sleep = original_sleep
+    results.append(("系统繁忙时重试后成功", str(result.get("access_token", "")).startswith("stub-token"), True))
+
+    configure(error_rate=1)
+    client.breaker.record_success()
+    for _ in range(3):
+        await expect_error(client.get_access_token())
+    results.append(("连续失败3次后熔断", client.breaker.state, CircuitBreaker.OPEN))
+    calls = state.calls.get("/cgi-bin/token")
+    fast_fail = await expect_error(client.get_access_token(), WxApiUnavailable)
+    results.append(("熔断期间直接失败", fast_fail, True))
+    results.append(("熔断期间不请求微信接口", state.calls.get("/cgi-bin/token"), calls))
+
+    configure()
+    await asyncio.sleep(0.6)
+    result = await client.get_access_token()
+    results.append(("熔断时间过后试探调用成功并恢复", client.breaker.state, CircuitBreaker.CLOSED))
+
+    await client.aclose()
+    return results
+
+
+def main(port: int) -> bool:
+    state = StubState()
+    server = start_stub(state, port)
+    try:
+        results = asyncio.run(run_checks(state, f"http://127.0.0.1:{port}"))
+    finally:
+        server.should_exit = True
+    passed = True
+    for name, actual, expected in results:
+        ok = actual == expected
+        passed = passed and ok
+        print(f"[{'通过' if ok else '失败'}] {name}: {actual}（期望 {expected}）")
+    print("检查通过" if passed else "检查未通过")
+    return passed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="微信接口客户端检查")
+    parser.add_argument("--port", type=int, default=18081, help="模拟服务的监听端口，默认18081")
+    args = parser.parse_args()
+    sys.exit(0 if main(args.port) else 1)
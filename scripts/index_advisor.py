@@ -0,0 +1,225 @@
+# ================================ 【文件说明】 ================================
+# 索引检查脚本：对服务层发出的每种查询执行EXPLAIN，报告全表扫描和文件排序
+#
+# 检查方式：
+#   1. 用数据库中的一条真实数据作为查询参数，依次调用各服务的读方法（见 query_cases），
+#      通过SQLAlchemy的before_cursor_execute事件记录实际发出的SQL语句及参数
+#   2. 对每种SQL语句执行EXPLAIN（MySQL）或 EXPLAIN QUERY PLAN（SQLite），报告：
+#        全表扫描  MySQL type=ALL / SQLite SCAN 表（未使用索引）
+#        文件排序  MySQL Extra包含Using filesort / SQLite USE TEMP B-TREE FOR ORDER BY
+#        临时表    MySQL Extra包含Using temporary / SQLite USE TEMP B-TREE FOR GROUP BY、DISTINCT
+#   3. 对比模型中声明的索引与数据库中实际存在的索引，输出需要执行的 CREATE INDEX / DROP INDEX 语句
+#
+# 只执行查询，不修改数据库。表中数据很少时，MySQL可能认为全表扫描更快而不使用索引，请在有一定数据量的库中检查
+#
+# 脚本使用方式（在项目根目录下运行，数据库使用 config/database_config.py 中配置的本地数据库）
+#   python scripts/index_advisor.py
+#   python scripts/index_advisor.py --url sqlite:///test.db --verbose
+# ==============================================================================
+import argparse
+import os
+import sys
+from typing import Callable, Dict, List, Tuple
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, event, inspect, select
+from sqlalchemy.engine import Engine
+from sqlalchemy.schema import CreateIndex
+
+from config.database_config import myBaseModel, myEngine, mySession
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+from modules.module_exam.dto.mp_option_dto import MpOptionDTO
+from modules.module_exam.dto.mp_question_dto import MpQuestionDTO
+from modules.module_exam.dto.mp_user_dto import MpUserDTO
+from modules.module_exam.dto.mp_user_exam_dto import MpUserExamDTO
+from modules.module_exam.dto.mp_user_option_dto import MpUserOptionDTO
+from modules.module_exam.model.mp_option_model import MpOptionModel
+from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
+from modules.module_exam.model.mp_user_model import MpUserModel
+from modules.module_exam.model.mp_user_option_model import MpUserOptionModel
+from modules.module_exam.service.mp_exam_service import MpExamService
+from modules.module_exam.service.mp_option_service import MpOptionService
+from modules.module_exam.service.mp_question_service import MpQuestionService, right_option_ids_query, option_score_query
+from modules.module_exam.service.mp_user_exam_service import MpUserExamService
+from modules.module_exam.service.mp_user_option_service import MpUserOptionService
+from modules.module_exam.service.mp_user_service import MpUserService
+
+
+def sample_params(engine: Engine) -> Dict[str, object]:
+    """
+    从数据库中取一条真实数据作为查询参数，表为空时使用默认值1
+    """
+    params = {"user_id": 1, "exam_id": 1, "user_exam_id": 1, "question_id": 1, "option_id": 1, "wx_openid": ""}
+    with engine.connect() as conn:
+        row = conn.execute(select(MpUserExamModel.id, MpUserExamModel.user_id, MpUserExamModel.exam_id).order_by(MpUserExamModel.id.desc()).limit(1)).first()
+        if row is not None:
+            params.update(user_exam_id=row.id, user_id=row.user_id, exam_id=row.exam_id)
+        row = conn.execute(select(MpUserOptionModel.question_id, MpUserOptionModel.option_id).where(MpUserOptionModel.user_exam_id == params["user_exam_id"]).limit(1)).first()
+        if row is None:
+            row = conn.execute(select(MpOptionModel.question_id, MpOptionModel.id.label("option_id")).limit(1)).first()
+        if row is not None:
+            params.update(question_id=row.question_id, option_id=row.option_id)
+        openid = conn.execute(select(MpUserModel.wx_openid).limit(1)).scalar()
+        if openid is not None:
+            params["wx_openid"] = openid
+    return params
+
+
+def query_cases(p: Dict[str, object]) -> List[Tuple[str, Callable[[], object]]]:
+    """
+    需要检查的查询：(说明, 调用服务读方法的函数)。与接口中的调用保持一致，新增查询时在这里补充
+    """
+    exam = MpExamService()
+    question = MpQuestionService()
+    option = MpOptionService()
+    user = MpUserService()
+    user_exam = MpUserExamService()
+    user_option = MpUserOptionService()
+    return [
+        ("getExamList 分页", lambda: exam.get_page_list_by_filters(page_num=1, page_size=10, filters=MpExamDTO(status=0))),
+        ("getExamList 游标分页", lambda: exam.get_list_by_cursor(page_size=10, filters=MpExamDTO(status=0))),
+        ("getQuestionList 题库", lambda: question.load_questions_with_options(p["exam_id"])),
+        ("getQuestionList2 问题列表", lambda: question.get_list_by_filters(filters=MpQuestionDTO(exam_id=p["exam_id"], status=0))),
+        ("getQuestionList2 选项列表", lambda: option.get_list_by_filters(filters=MpOptionDTO(question_id=p["question_id"]))),
+        ("答题 题目个数", lambda: question.get_total_by_filters(filters=MpQuestionDTO(exam_id=p["exam_id"]))),
+        ("答题 正确选项（答案索引未命中）", lambda: question.session_execute_query(right_option_ids_query(p["question_id"]))),
+        ("答题 选项得分（答案索引未命中）", lambda: question.session_execute_query(option_score_query(p["option_id"]))),
+        ("getExamProgress", lambda: user_exam.get_one_by_filters(filters=MpUserExamDTO(user_id=p["user_id"], exam_id=p["exam_id"]))),
+        ("最近一次测试记录", lambda: user_exam.get_last_user_exam(p["user_id"], p["exam_id"])),
+        ("最近一次完成的测试记录", lambda: user_exam.find_last_one_finished_user_exam(p["user_id"], p["exam_id"])),
+        ("最近一次未完成的测试记录", lambda: user_exam.find_last_one_not_finished_user_exam(p["user_id"], p["exam_id"])),
+        ("result 完成记录游标分页", lambda: user_exam.get_finished_user_exams_by_cursor(p["user_id"], p["exam_id"], page_size=10)),
+        ("history 测试历史", lambda: user_exam.get_latest_finished_exams(p["user_id"])),
+        ("history 测试历史游标分页", lambda: user_exam.get_latest_finished_exams(p["user_id"], page_size=10)),
+        ("questionAnalyse", lambda: user_option.get_question_results(p["user_exam_id"], p["exam_id"])),
+        ("optionAnalyse 用户选项", lambda: user_option.get_list_by_filters(filters=MpUserOptionDTO(user_exam_id=p["user_exam_id"], question_id=p["question_id"]))),
+        ("optionAnalyse 问题", lambda: question.get_one_by_filters(filters=MpQuestionDTO(id=p["question_id"]))),
+        ("wxUserLogin 按openid查询用户", lambda: user.get_one_by_filters(filters=MpUserDTO(wx_openid=p["wx_openid"]))),
+    ]
+
+
+def capture_statements(engine: Engine, cases: List[Tuple[str, Callable[[], object]]]) -> List[Tuple[str, str, object]]:
+    """
+    执行查询并记录发出的SELECT语句，相同的SQL语句只保留第一次
+    返回:
+        [(查询说明, SQL语句, 参数), ...]
+    """
+    captured: List[Tuple[str, str, object]] = []
+    seen = set()
+    current = {"name": ""}
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT") and statement not in seen:
+            seen.add(statement)
+            captured.append((current["name"], statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        for name, call in cases:
+            current["name"] = name
+            try:
+                call()
+            except Exception as e:
+                print(f"[跳过] {name}: {e!r}")
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+    return captured
+
+
+def explain(engine: Engine, statement: str, parameters) -> Tuple[List[str], List[str]]:
+    """
+    执行EXPLAIN
+    返回:
+        (执行计划文本行, 发现的问题列表)
+    """
+    problems: List[str] = []
+    lines: List[str] = []
+    with engine.connect() as conn:
+        if engine.dialect.name == "sqlite":
+            rows = conn.exec_driver_sql("EXPLAIN QUERY PLAN " + statement, parameters).all()
+            # 子查询物化后的临时结果，扫描它不算全表扫描
+            derived = {row[-1].split()[-1] for row in rows if row[-1].startswith("MATERIALIZE ")}
+            for row in rows:
+                detail = row[-1]
+                lines.append(detail)
+                if detail.startswith("SCAN ") and "INDEX" not in detail and detail.split()[1] not in derived:
+                    problems.append(f"全表扫描: {detail}")
+                if "TEMP B-TREE FOR ORDER BY" in detail:
+                    problems.append(f"文件排序: {detail}")
+                elif "TEMP B-TREE" in detail:
+                    problems.append(f"临时表: {detail}")
+        else:
+            result = conn.exec_driver_sql("EXPLAIN " + statement, parameters)
+            for row in result.mappings().all():
+                table, access_type, key, extra = row.get("table"), row.get("type"), row.get("key"), row.get("Extra") or ""
+                lines.append(f"table={table} type={access_type} key={key} rows={row.get('rows')} Extra={extra}")
+                # <derivedN>、<subqueryN> 等为子查询的临时结果，扫描它不算全表扫描
+                if access_type == "ALL" and not str(table).startswith("<"):
+                    problems.append(f"全表扫描: {table}")
+                if "Using filesort" in extra:
+                    problems.append(f"文件排序: {table}")
+                if "Using temporary" in extra:
+                    problems.append(f"临时表: {table}")
+    return lines, problems
+
+
+def index_ddl(engine: Engine) -> List[str]:
+    """
+    对比模型中声明的索引与数据库中实际存在的索引，生成 CREATE INDEX / DROP INDEX 语句
+    数据库中有、模型中没有的索引只包含普通索引（不包含主键、唯一约束以及外键自动创建的索引）
+    """
+    inspector = inspect(engine)
+    statements: List[str] = []
+    for table in myBaseModel.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        existing = {index["name"] for index in inspector.get_indexes(table.name)}
+        unique_constraints = {constraint["name"] for constraint in inspector.get_unique_constraints(table.name)}
+        declared = {index.name for index in table.indexes}
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            if index.name not in existing:
+                statements.append(str(CreateIndex(index).compile(engine)).strip() + ";")
+        for name in sorted(existing - declared - unique_constraints):
+            if name and not name.startswith(("sqlite_", "PRIMARY")) and not any(column.unique and column.name == name for column in table.columns):
+                statements.append(f"DROP INDEX {name} ON {table.name};" if engine.dialect.name == "mysql" else f"DROP INDEX {name};")
+    return statements
+
+
+def main(url: str, verbose: bool) -> int:
+    engine = create_engine(url) if url else myEngine
+    # 服务层通过mySession创建会话，绑定到检查使用的数据库
+    mySession.configure(bind=engine)
+
+    params = sample_params(engine)
+    print(f"数据库 = {engine.url.render_as_string(hide_password=True)}, 查询参数 = {params}")
+    statements = capture_statements(engine, query_cases(params))
+
+    problem_count = 0
+    for name, statement, parameters in statements:
+        lines, problems = explain(engine, statement, parameters)
+        problem_count += len(problems)
+        print(f"\n[{'有问题' if problems else '正常'}] {name}")
+        if verbose or problems:
+            print("  SQL: " + " ".join(statement.split()))
+            for line in lines:
+                print("  计划: " + line)
+        for problem in problems:
+            print("  !! " + problem)
+
+    ddl = index_ddl(engine)
+    print(f"\n共检查 {len(statements)} 种查询，发现 {problem_count} 个问题")
+    if ddl:
+        print("数据库中的索引与模型声明不一致，需要执行：")
+        for statement in ddl:
+            print("  " + statement)
+    return 1 if problem_count else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="查询执行计划检查")
+    parser.add_argument("--url", default=None, help="数据库连接地址，默认使用database_config中的配置")
+    parser.add_argument("--verbose", action="store_true", help="输出全部查询的SQL和执行计划")
+    args = parser.parse_args()
+    sys.exit(main(args.url, args.verbose))
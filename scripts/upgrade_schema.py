@@ -0,0 +1,162 @@
+# ================================ 【文件说明】 ================================
+# 数据库升级脚本：将已有数据库的表结构升级到与当前模型一致
+#
+# 依次检查并执行以下升级步骤，已经升级过的步骤自动跳过，可以重复执行：
+#   1. mp_user_exam 增加生成列 unfinished 和唯一索引 uk_user_exam_unfinished(user_id, exam_id, unfinished)
+#      record_answer 依赖该唯一索引保证同一用户同一测试最多只有一条未完成的测试记录。
+#      旧代码并发答题时可能已经产生了重复的未完成记录，创建唯一索引前需要先清理：
+#      每个(user_id, exam_id)保留id最大的一条（旧代码继续答题时使用的就是这一条），
+#      删除其余的未完成记录及其答题记录（mp_user_option），删除的记录id会打印出来
+#   2. 创建数据版本号表 mp_data_version（各worker进程通过它发现其他进程对题库等缓存数据的修改）
+#
+# 默认只检查并打印需要执行的操作，不修改数据库；加 --execute 才会执行。执行前请备份数据库，
+# 并停止服务（或至少停止答题接口），避免清理重复记录之后、创建唯一索引之前又产生新的重复记录
+#
+# 脚本使用方式（在项目根目录下运行，数据库使用 config/database_config.py 中配置的主库）
+#   python scripts/upgrade_schema.py
+#   python scripts/upgrade_schema.py --execute
+#   python scripts/upgrade_schema.py --url sqlite:///test.db --execute
+# ==============================================================================
+import argparse
+import os
+import sys
+from typing import Callable, List, Tuple
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, delete, func, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.schema import CreateTable
+
+from config.database_config import myEngine
+from modules.module_exam.model.mp_data_version_model import MpDataVersionModel
+from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
+from modules.module_exam.model.mp_user_option_model import MpUserOptionModel
+
+# 生成列的表达式，与 MpUserExamModel.unfinished 一致
+UNFINISHED_EXPRESSION = "CASE WHEN finish_time IS NULL THEN 1 ELSE NULL END"
+
+
+def duplicate_unfinished_ids(conn: Connection) -> List[int]:
+    """
+    查询需要删除的重复未完成记录id：同一(user_id, exam_id)有多条未完成记录时，除id最大的一条外的其余记录
+    """
+    table = MpUserExamModel.__table__
+    latest = select(
+        table.c.user_id, table.c.exam_id, func.max(table.c.id).label("keep_id")
+    ).where(
+        table.c.finish_time == None
+    ).group_by(
+        table.c.user_id, table.c.exam_id
+    ).having(
+        func.count() > 1
+    ).subquery()
+    rows = conn.execute(
+        select(table.c.id).join(
+            latest, (table.c.user_id == latest.c.user_id) & (table.c.exam_id == latest.c.exam_id)
+        ).where(
+            table.c.finish_time == None,
+            table.c.id < latest.c.keep_id,
+        ).order_by(table.c.id)
+    ).all()
+    return [row.id for row in rows]
+
+
+def upgrade_user_exam_unfinished(engine: Engine, execute: bool) -> bool:
+    """
+    升级步骤1：清理重复的未完成测试记录，增加生成列unfinished和唯一索引uk_user_exam_unfinished
+    返回是否需要（或已经执行了）升级
+    """
+    inspector = inspect(engine)
+    columns = {column["name"] for column in inspector.get_columns("mp_user_exam")}
+    indexes = {index["name"] for index in inspector.get_indexes("mp_user_exam")}
+    has_column = "unfinished" in columns
+    has_index = "uk_user_exam_unfinished" in indexes
+    if has_column and has_index:
+        print("[跳过] mp_user_exam.unfinished 和 uk_user_exam_unfinished 已存在")
+        return False
+
+    dialect_name = engine.dialect.name
+    statements = []
+    if not has_column:
+        if dialect_name == "mysql":
+            statements.append(f"ALTER TABLE mp_user_exam ADD COLUMN unfinished TINYINT AS ({UNFINISHED_EXPRESSION}) STORED "
+                              f"COMMENT '是否未完成 1未完成 NULL已完成'")
+        elif dialect_name == "sqlite":
+            # SQLite的ALTER TABLE只能增加VIRTUAL生成列，同样可以建立索引
+            statements.append(f"ALTER TABLE mp_user_exam ADD COLUMN unfinished INTEGER AS ({UNFINISHED_EXPRESSION}) VIRTUAL")
+        else:
+            raise NotImplementedError(f"upgrade_schema不支持当前数据库: {dialect_name}")
+    if not has_index:
+        if dialect_name == "mysql":
+            statements.append("ALTER TABLE mp_user_exam ADD UNIQUE INDEX uk_user_exam_unfinished (user_id, exam_id, unfinished)")
+        else:
+            statements.append("CREATE UNIQUE INDEX uk_user_exam_unfinished ON mp_user_exam (user_id, exam_id, unfinished)")
+
+    with engine.connect() as conn:
+        duplicate_ids = duplicate_unfinished_ids(conn)
+    print(f"[升级] mp_user_exam 重复的未完成记录 {len(duplicate_ids)} 条，需要删除: {duplicate_ids}")
+    for statement in statements:
+        print(f"[升级] {statement};")
+    if not execute:
+        return True
+
+    # 清理重复记录和它们的答题记录在同一个事务中完成
+    with engine.begin() as conn:
+        # 重新查询，避免使用打印之后发生变化的结果
+        duplicate_ids = duplicate_unfinished_ids(conn)
+        for i in range(0, len(duplicate_ids), 500):
+            chunk = duplicate_ids[i:i + 500]
+            options = conn.execute(delete(MpUserOptionModel).where(MpUserOptionModel.user_exam_id.in_(chunk))).rowcount
+            exams = conn.execute(delete(MpUserExamModel).where(MpUserExamModel.id.in_(chunk))).rowcount
+            print(f"[执行] 删除未完成测试记录 {exams} 条，答题记录 {options} 条")
+    # MySQL的DDL语句会隐式提交，逐条执行
+    for statement in statements:
+        with engine.begin() as conn:
+            conn.execute(text(statement))
+        print(f"[执行] {statement};")
+    return True
+
+
+def upgrade_data_version(engine: Engine, execute: bool) -> bool:
+    """
+    升级步骤2：创建数据版本号表mp_data_version
+    返回是否需要（或已经执行了）升级
+    """
+    table = MpDataVersionModel.__table__
+    if inspect(engine).has_table(table.name):
+        print(f"[跳过] {table.name} 已存在")
+        return False
+    print(f"[升级] {str(CreateTable(table).compile(engine)).strip()};")
+    if execute:
+        table.create(engine)
+        print(f"[执行] 创建表 {table.name}")
+    return True
+
+
+# 升级步骤列表，按顺序执行。每个步骤接收(engine, execute)，返回是否需要（或已经执行了）升级
+UPGRADE_STEPS: List[Tuple[str, Callable[[Engine, bool], bool]]] = [
+    ("mp_user_exam 未完成记录唯一索引", upgrade_user_exam_unfinished),
+    ("mp_data_version 数据版本号表", upgrade_data_version),
+]
+
+
+def main(url: str = None, execute: bool = False) -> None:
+    engine = create_engine(url) if url else myEngine
+    print(f"数据库 = {engine.url.render_as_string(hide_password=True)}, {'执行升级' if execute else '只检查，不修改数据库（加 --execute 执行）'}")
+    pending = [name for name, step in UPGRADE_STEPS if step(engine, execute)]
+    if not pending:
+        print("数据库已经是最新的表结构")
+    elif execute:
+        print(f"升级完成: {pending}")
+    else:
+        print(f"需要升级: {pending}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="数据库表结构升级")
+    parser.add_argument("--url", default=None, help="数据库连接地址，默认使用database_config中配置的主库")
+    parser.add_argument("--execute", action="store_true", help="执行升级，不加时只检查并打印需要执行的操作")
+    args = parser.parse_args()
+    main(args.url, args.execute)
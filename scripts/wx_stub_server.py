@@ -0,0 +1,109 @@
+# ================================ 【文件说明】 ================================
+# 微信接口模拟服务
+#
+# 模拟 /sns/jscode2session 和 /cgi-bin/token 两个微信接口，可以注入延迟和错误，用于在本地测试微信接口客户端（utils/wx_client_util.py）：
+#   --latency-ms  每个请求的延迟（毫秒）
+#   --error-rate  返回HTTP 500的比例
+#   --busy-rate   返回 errcode=-1（系统繁忙）的比例
+# js_code 为 invalid 时返回 errcode=40029（code无效）。运行中可以通过 POST /_stub/config 修改以上配置，GET /_stub/stats 查看调用统计
+#
+# 脚本使用方式（在项目根目录下运行），然后设置环境变量 WX_API_BASE_URL=http://127.0.0.1:18080 启动服务
+#   python scripts/wx_stub_server.py --port 18080 --latency-ms 50 --error-rate 0.1
+#
+# 依赖：uvicorn
+# ==============================================================================
+import argparse
+import asyncio
+import itertools
+import random
+
+import uvicorn
+from fastapi import Body, FastAPI, Request
+from fastapi.responses import JSONResponse
+
+
+class StubState:
+    """
+    模拟服务的配置和调用统计
+    """
+
+    def __init__(self, latency_ms: float = 0, error_rate: float = 0, busy_rate: float = 0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.busy_rate = busy_rate
+        self.calls = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        # 客户端连接（地址:端口），用于检查客户端是否复用长连接
+        self.connections = set()
+        self.token_counter = itertools.count(1)
+
+    def reset_stats(self):
+        self.calls = {}
+        self.max_in_flight = 0
+        self.connections = set()
+
+
+def create_app(state: StubState) -> FastAPI:
+    app = FastAPI()
+
+    async def simulate(request: Request):
+        """
+        记录调用并按配置注入延迟和错误，返回需要直接返回的错误响应，没有注入错误时返回None
+        """
+        state.calls[request.url.path] = state.calls.get(request.url.path, 0) + 1
+        state.connections.add(f"{request.client.host}:{request.client.port}")
+        state.in_flight += 1
+        state.max_in_flight = max(state.max_in_flight, state.in_flight)
+        try:
+            if state.latency_ms:
+                await asyncio.sleep(state.latency_ms / 1000)
+        finally:
+            state.in_flight -= 1
+        if random.random() < state.error_rate:
+            return JSONResponse({"message": "stub error"}, status_code=500)
+        if random.random() < state.busy_rate:
+            return JSONResponse({"errcode": -1, "errmsg": "system error"})
+        return None
+
+    @app.get("/sns/jscode2session")
+    async def jscode2session(request: Request, js_code: str = ""):
+        error = await simulate(request)
+        if error is not None:
+            return error
+        if js_code == "invalid":
+            return {"errcode": 40029, "errmsg": "invalid code"}
+        return {"openid": f"openid-{js_code}", "unionid": f"unionid-{js_code}", "session_key": "stub-session-key"}
+
+    @app.get("/cgi-bin/token")
+    async def token(request: Request):
+        error = await simulate(request)
+        if error is not None:
+            return error
+        return {"access_token": f"stub-token-{next(state.token_counter)}", "expires_in": 7200}
+
+    @app.post("/_stub/config")
+    async def config(latency_ms: float = Body(None), error_rate: float = Body(None), busy_rate: float = Body(None)):
+        if latency_ms is not None:
+            state.latency_ms = latency_ms
+        if error_rate is not None:
+            state.error_rate = error_rate
+        if busy_rate is not None:
+            state.busy_rate = busy_rate
+        return {"latency_ms": state.latency_ms, "error_rate": state.error_rate, "busy_rate": state.busy_rate}
+
+    @app.get("/_stub/stats")
+    async def stats():
+        return {"calls": state.calls, "max_in_flight": state.max_in_flight, "connections": len(state.connections)}
+
+    return app
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="微信接口模拟服务")
+    parser.add_argument("--port", type=int, default=18080, help="监听端口，默认18080")
+    parser.add_argument("--latency-ms", type=float, default=0, help="每个请求的延迟（毫秒），默认0")
+    parser.add_argument("--error-rate", type=float, default=0, help="返回HTTP 500的比例，默认0")
+    parser.add_argument("--busy-rate", type=float, default=0, help="返回errcode=-1的比例，默认0")
+    args = parser.parse_args()
+    uvicorn.run(create_app(StubState(args.latency_ms, args.error_rate, args.busy_rate)), host="127.0.0.1", port=args.port)
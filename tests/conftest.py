@@ -0,0 +1,122 @@
+# ================================ 【文件说明】 ================================
+# 测试公共夹具：不需要MySQL，使用临时目录中的SQLite数据库文件代替主库
+#
+# database夹具把同步会话mySession、异步会话myAsyncSession绑定到临时SQLite文件，按当前模型建表并写入测试数据：
+#   测试 mp_exam          id 1~EXAM_COUNT，其中 DISABLED_EXAM_ID 为停用状态，其余状态正常
+#   问题 mp_question      测试1、2各3道题，问题id = 测试id * 10 + 题号，第3题为多选题
+#   选项 mp_option        每道题4个选项，选项id = 问题id * 10 + 选项号，选项1正确，多选题的选项2也正确
+# 测试结束后恢复原来的数据库绑定，并清空题库缓存、记录总数缓存、token缓存等进程内缓存
+#
+# pytest-asyncio未安装时也可以运行：异步代码在测试函数中通过asyncio.run执行
+#
+# 运行方式（在项目根目录下运行）
+#   python -m pytest -q
+# ==============================================================================
+import os
+import sys
+
+# 将项目根目录加入模块搜索路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from config.database_config import myBaseModel, mySession, myAsyncSession
+from modules.module_exam.dao.base_dao import total_count_cache
+# 导入全部模型，create_all时创建全部表
+from modules.module_exam.model.mp_data_version_model import MpDataVersionModel
+from modules.module_exam.model.mp_exam_model import MpExamModel
+from modules.module_exam.model.mp_option_model import MpOptionModel
+from modules.module_exam.model.mp_question_model import MpQuestionModel
+from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
+from modules.module_exam.model.mp_user_model import MpUserModel
+from modules.module_exam.model.mp_user_option_model import MpUserOptionModel
+from modules.module_exam.service.question_bank_cache import question_bank_cache
+from utils.jwt_util import JWTUtil, verified_token_cache
+
+# 测试数据中的测试数量
+EXAM_COUNT = 25
+# 停用状态的测试id
+DISABLED_EXAM_ID = 5
+# 有问题和选项的测试id
+EXAMS_WITH_QUESTIONS = (1, 2)
+# 测试用户id
+USER_ID = 1
+
+
+def seed(engine) -> None:
+    """
+    写入测试数据
+    """
+    with Session(engine) as session:
+        for exam_id in range(1, EXAM_COUNT + 1):
+            session.add(MpExamModel(id=exam_id, name=f"exam{exam_id}", type=f"type{exam_id}", status=-1 if exam_id == DISABLED_EXAM_ID else 0))
+        for exam_id in EXAMS_WITH_QUESTIONS:
+            for question_no in range(1, 4):
+                question_id = exam_id * 10 + question_no
+                is_multiple = question_no == 3
+                session.add(MpQuestionModel(id=question_id, exam_id=exam_id, name=f"question{question_id}",
+                                            type=2 if is_multiple else 1, type_name="多选题" if is_multiple else "单选题", status=0))
+                for option_no in range(1, 5):
+                    is_right = option_no == 1 or (is_multiple and option_no == 2)
+                    session.add(MpOptionModel(id=question_id * 10 + option_no, question_id=question_id,
+                                              content=f"option{option_no}", is_right=1 if is_right else 0, status=0))
+        session.commit()
+
+
+def clear_caches() -> None:
+    """
+    清空进程内缓存，避免测试之间互相影响
+    """
+    question_bank_cache.clear()
+    total_count_cache.clear()
+    verified_token_cache.clear()
+
+
+@pytest.fixture
+def database(tmp_path):
+    """
+    临时SQLite数据库，返回(同步引擎, 异步引擎)
+    """
+    path = tmp_path / "test.db"
+    engine = create_engine(f"sqlite:///{path}")
+    # 每次asyncio.run都会创建新的事件循环，异步引擎不使用连接池，连接不会跨事件循环复用
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    myBaseModel.metadata.create_all(engine)
+    seed(engine)
+
+    sync_bind, async_bind = mySession.kw["bind"], myAsyncSession.kw["bind"]
+    mySession.configure(bind=engine)
+    myAsyncSession.configure(bind=async_engine)
+    clear_caches()
+    try:
+        yield engine, async_engine
+    finally:
+        mySession.configure(bind=sync_bind)
+        myAsyncSession.configure(bind=async_bind)
+        clear_caches()
+        asyncio.run(async_engine.dispose())
+        engine.dispose()
+
+
+@pytest.fixture
+def auth_headers():
+    """
+    带有效JWT的请求头
+    """
+    return {"Authorization": "Bearer " + JWTUtil.create_token({"userId": USER_ID, "openId": "test-openid"})}
+
+
+@pytest.fixture
+def client(database):
+    """
+    应用的测试客户端，数据库使用database夹具中的SQLite数据库。不执行应用的启动和关闭处理
+    """
+    from main import app
+    return TestClient(app)
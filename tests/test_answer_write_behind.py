@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+import modules.module_exam.controller.mp_exam_controller as mp_exam_controller
+from config.database_config import async_unit_of_work
+from modules.module_exam.dao.mp_user_option_dao import MpUserOptionDao
+from modules.module_exam.dto.mp_user_option_dto import MpUserOptionDTO
+from modules.module_exam.service.answer_write_behind import AnswerWriteBehind
+
+from conftest import USER_ID
+
+
+@pytest.fixture
+def write_behind(database, tmp_path):
+    """
+    开启写后模式的实例，缓冲文件在临时目录中
+    """
+    instance = AnswerWriteBehind(enabled=True, buffer_path=str(tmp_path / "answer_buffer.db"), max_attempts=1)
+    yield instance
+    instance.buffer.close()
+
+
+def user_option(user_exam_id: int = 1, option_id: int = 111, **values) -> MpUserOptionDTO:
+    data = dict(user_id=USER_ID, exam_id=1, user_exam_id=user_exam_id, question_id=option_id // 10,
+                option_id=option_id, is_duoxue=0, is_right=1)
+    data.update(values)
+    return MpUserOptionDTO(**data)
+
+
+def saved_option_ids(user_exam_id: int = 1):
+    return [option.option_id for option in MpUserOptionDao().get_list_by_filters(filters=MpUserOptionDTO(user_exam_id=user_exam_id))]
+
+
+def test_append_is_written_after_commit(write_behind):
+    async def run():
+        async with async_unit_of_work():
+            await write_behind.append([user_option(option_id=111), user_option(option_id=121)])
+            # 事务提交前记录未确认，不会被写入数据库
+            assert not write_behind.buffer.has_pending(1)
+            assert await write_behind.flush_all() == 0
+        assert write_behind.buffer.has_pending(1)
+        return await write_behind.flush_all()
+
+    assert asyncio.run(run()) == 2
+    assert len(write_behind.buffer) == 0
+    assert saved_option_ids() == [111, 121]
+
+
+def test_append_is_discarded_on_rollback(write_behind):
+    async def run():
+        async with async_unit_of_work():
+            await write_behind.append([user_option()])
+            raise RuntimeError("fail")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(run())
+    assert len(write_behind.buffer) == 0
+    assert saved_option_ids() == []
+
+
+def test_unconfirmed_records_expire_to_dead_letters(write_behind):
+    write_behind.buffer.append([user_option().model_dump(exclude_none=True)], confirmed=False)
+    assert asyncio.run(write_behind.expire_unconfirmed()) == 0
+    write_behind.confirm_timeout = 0
+    assert asyncio.run(write_behind.expire_unconfirmed()) == 1
+    assert (len(write_behind.buffer), write_behind.buffer.dead_count()) == (0, 1)
+
+
+def test_bad_record_does_not_block_the_batch(write_behind):
+    # 缺少必填字段的记录写入数据库失败，移入死信表，同一批的其他记录照常写入
+    bad = user_option(option_id=121).model_dump(exclude_none=True)
+    del bad["question_id"]
+    write_behind.buffer.append([user_option(option_id=111).model_dump(exclude_none=True), bad, user_option(option_id=131).model_dump(exclude_none=True)])
+    assert asyncio.run(write_behind.flush_all()) == 3
+    assert saved_option_ids() == [111, 131]
+    assert (len(write_behind.buffer), write_behind.buffer.dead_count()) == (0, 1)
+
+
+def test_question_analyse_flushes_pending_answers(client, auth_headers, write_behind, monkeypatch):
+    monkeypatch.setattr(mp_exam_controller, "answer_write_behind", write_behind)
+    for page_no, option_id in enumerate((111, 122, 131), start=1):
+        response = client.post("/mp/exam/danxue_Answer", headers=auth_headers, json={
+            "userId": USER_ID, "examId": 1, "questionId": option_id // 10, "optionId": option_id, "pageNo": page_no,
+        })
+        assert response.json()["code"] == 200
+    # 答题记录还在缓冲中，没有写入数据库
+    user_exam_id = write_behind.buffer.peek(1)[0][1]["user_exam_id"]
+    assert len(write_behind.buffer) == 3
+    assert saved_option_ids(user_exam_id) == []
+
+    response = client.post("/mp/exam/questionAnalyse", headers=auth_headers, json={"userId": USER_ID, "examId": 1})
+    results = {item["questionId"]: item["isAnswerCorrect"] for item in response.json()["data"]}
+    assert results == {11: 1, 12: 0, 13: 0}
+    assert len(write_behind.buffer) == 0
+    assert saved_option_ids(user_exam_id) == [111, 122, 131]
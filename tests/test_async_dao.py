@@ -0,0 +1,49 @@
+import asyncio
+
+from modules.module_exam.dao.mp_exam_dao import AsyncMpExamDao, MpExamDao
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+
+from conftest import DISABLED_EXAM_ID, EXAM_COUNT
+
+
+def test_async_crud(database):
+    dao = AsyncMpExamDao()
+
+    async def run():
+        exam = await dao.get_by_id(1)
+        assert exam.name == "exam1"
+
+        added = await dao.add(MpExamDTO(name="new exam", type="new type", status=0))
+        assert added.id == EXAM_COUNT + 1
+
+        assert await dao.update_by_id(added.id, MpExamDTO(name="renamed"))
+        assert (await dao.get_by_id(added.id)).name == "renamed"
+
+        assert await dao.delete_by_id(added.id)
+        assert await dao.get_by_id(added.id) is None
+
+    asyncio.run(run())
+
+
+def test_async_results_match_sync(database):
+    async_dao, sync_dao = AsyncMpExamDao(), MpExamDao()
+    filters = MpExamDTO(status=0)
+
+    async def run():
+        return (
+            await async_dao.get_list_by_filters(filters=filters, sort_by=["-id"]),
+            await async_dao.get_total_by_filters(filters=filters),
+            await async_dao.get_one_by_filters(filters=MpExamDTO(id=DISABLED_EXAM_ID), fields=["id", "status"], as_dict=True),
+        )
+
+    exams, total, disabled = asyncio.run(run())
+    assert exams == sync_dao.get_list_by_filters(filters=filters, sort_by=["-id"])
+    assert total == EXAM_COUNT - 1
+    assert [exam.id for exam in exams][:2] == [EXAM_COUNT, EXAM_COUNT - 1]
+    assert disabled == {"id": DISABLED_EXAM_ID, "status": -1}
+
+
+def test_async_session_execute_query(database):
+    dao = AsyncMpExamDao()
+    ids = asyncio.run(dao.session_execute_query(lambda db_session: db_session.query(dao.model).filter(dao.model.id <= 3), fields=["id"]))
+    assert [row.id for row in ids] == [1, 2, 3]
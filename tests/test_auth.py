@@ -0,0 +1,106 @@
+import time
+
+import jwt
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from middlewares.auth_middleware import AuthMiddleware, compile_public_paths
+from utils.jwt_util import JWTUtil, verified_token_cache
+
+from conftest import USER_ID
+
+
+@pytest.fixture(autouse=True)
+def empty_token_cache():
+    verified_token_cache.clear()
+    yield
+    verified_token_cache.clear()
+
+
+@pytest.fixture
+def decode_count(monkeypatch):
+    """
+    统计验证签名并解码token的次数
+    """
+    calls = []
+    get_payload = JWTUtil.get_payload
+    monkeypatch.setattr(JWTUtil, "get_payload", staticmethod(lambda token: calls.append(token) or get_payload(token)))
+    return calls
+
+
+@pytest.fixture
+def auth_client():
+    app = FastAPI()
+    app.middleware("http")(AuthMiddleware)
+
+    @app.get("/user")
+    async def user(request: Request):
+        return {"user_id": request.state.user_id, "open_id": request.state.open_id}
+
+    @app.get("/docs/status")
+    async def public():
+        return {"ok": True}
+
+    return TestClient(app)
+
+
+def test_verified_token_is_cached(decode_count):
+    token = JWTUtil.create_token({"userId": USER_ID})
+    assert JWTUtil.get_payload_cached(token)["userId"] == USER_ID
+    assert JWTUtil.get_payload_cached(token)["userId"] == USER_ID
+    assert len(decode_count) == 1
+    assert len(verified_token_cache) == 1
+
+
+def test_invalid_token_is_not_cached(decode_count):
+    token = JWTUtil.create_token({"userId": USER_ID})
+    tampered = token[:-2] + ("AA" if token[-2:] != "AA" else "BB")
+    assert JWTUtil.get_payload_cached(tampered) is None
+    assert JWTUtil.get_payload_cached(tampered) is None
+    assert JWTUtil.get_payload_cached("not-a-token") is None
+    assert len(decode_count) == 3
+    assert len(verified_token_cache) == 0
+
+
+def test_expired_token_is_rejected():
+    token = jwt.encode({"userId": USER_ID, "exp": int(time.time()) - 10}, JWTUtil.SECRET_KEY, algorithm=JWTUtil.ALGORITHM)
+    assert JWTUtil.get_payload_cached(token) is None
+    assert len(verified_token_cache) == 0
+
+
+def test_token_without_expiry_is_not_cached(decode_count):
+    token = jwt.encode({"userId": USER_ID}, JWTUtil.SECRET_KEY, algorithm=JWTUtil.ALGORITHM)
+    assert JWTUtil.get_payload_cached(token)["userId"] == USER_ID
+    assert len(verified_token_cache) == 0
+
+
+def test_cached_token_expires_with_token(decode_count, monkeypatch):
+    token = jwt.encode({"userId": USER_ID, "exp": int(time.time()) + 60}, JWTUtil.SECRET_KEY, algorithm=JWTUtil.ALGORITHM)
+    JWTUtil.get_payload_cached(token)
+    JWTUtil.get_payload_cached(token)
+    assert len(decode_count) == 1
+    # 缓存到token的过期时间，过期后重新验证
+    monkeypatch.setattr(time, "monotonic", lambda monotonic=time.monotonic: monotonic() + 120)
+    JWTUtil.get_payload_cached(token)
+    assert len(decode_count) == 2
+
+
+@pytest.mark.parametrize("path, public", [
+    ("/", True), ("/docs", True), ("/docs/", True), ("/docs/oauth2-redirect", True), ("/docsx", False),
+    ("/internal/db/pool", True), ("/metrics", True), ("/mp/exam/getExamList", False), ("/mp/user/wxUserLogin", True),
+])
+def test_public_paths(path, public):
+    pattern = compile_public_paths("/docs,/internal/,/metrics,/mp/user/wxUserLogin")
+    assert (pattern.fullmatch(path) is not None) == public
+
+
+def test_auth_middleware(auth_client):
+    assert auth_client.get("/user").status_code == 401
+    assert auth_client.get("/user", headers={"Authorization": "Token abc"}).status_code == 401
+    assert auth_client.get("/user", headers={"Authorization": "Bearer invalid"}).status_code == 401
+    assert auth_client.get("/docs/status").json() == {"ok": True}
+
+    token = JWTUtil.create_token({"userId": USER_ID, "openId": "test-openid"})
+    response = auth_client.get("/user", headers={"Authorization": "bearer " + token})
+    assert response.json() == {"user_id": USER_ID, "open_id": "test-openid"}
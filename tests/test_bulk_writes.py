@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from modules.module_exam.dao.mp_exam_dao import AsyncMpExamDao, MpExamDao
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+
+from conftest import EXAM_COUNT
+
+
+def new_exams(count: int, start: int = 1):
+    return [MpExamDTO(name=f"bulk{i}", type=f"bulk-type{i}", status=0) for i in range(start, start + count)]
+
+
+def test_add_many_in_chunks(database):
+    dao = MpExamDao()
+    assert dao.add_many(new_exams(7), chunk_size=3) == 7
+    assert dao.get_total_by_filters() == EXAM_COUNT + 7
+
+
+def test_add_many_returns_ids_in_order(database):
+    dao = MpExamDao()
+    ids = dao.add_many(new_exams(5), chunk_size=2, return_ids=True)
+    assert ids == list(range(EXAM_COUNT + 1, EXAM_COUNT + 6))
+    assert [dao.get_by_id(exam_id).name for exam_id in ids] == [f"bulk{i}" for i in range(1, 6)]
+
+
+def test_add_many_with_different_fields(database):
+    # 字段不同的记录分组写入；字典保留传入的值，DTO过滤掉None
+    dao = MpExamDao()
+    data_list = [{"name": "dict exam", "type": "dict type", "status": -1}, MpExamDTO(name="dto exam", type="dto type")]
+    assert dao.add_many(data_list) == 2
+    assert dao.get_one_by_filters(filters=MpExamDTO(name="dict exam")).status == -1
+    assert dao.get_one_by_filters(filters=MpExamDTO(name="dto exam")).status == 0
+
+
+def test_add_many_is_atomic(database):
+    dao = MpExamDao()
+    data_list = new_exams(3) + [MpExamDTO(name="exam1", type="duplicate name", status=0)]
+    with pytest.raises(IntegrityError):
+        dao.add_many(data_list, chunk_size=2)
+    assert dao.get_total_by_filters() == EXAM_COUNT
+
+
+def test_update_many(database):
+    dao = MpExamDao()
+    updated = dao.update_many([MpExamDTO(id=1, name="first"), {"id": 2, "status": -1}, MpExamDTO(id=3, name="third", status=-1)])
+    assert updated == 3
+    assert (dao.get_by_id(1).name, dao.get_by_id(1).status) == ("first", 0)
+    assert (dao.get_by_id(2).name, dao.get_by_id(2).status) == ("exam2", -1)
+    assert (dao.get_by_id(3).name, dao.get_by_id(3).status) == ("third", -1)
+    with pytest.raises(ValueError):
+        dao.update_many([MpExamDTO(name="missing id")])
+
+
+def test_upsert_many(database):
+    dao = MpExamDao()
+    data_list = [
+        {"id": 1, "name": "upserted", "type": "type1", "status": -1},
+        {"id": EXAM_COUNT + 1, "name": "inserted", "type": "inserted type", "status": 0},
+    ]
+    assert dao.upsert_many(data_list) == 2
+    assert (dao.get_by_id(1).name, dao.get_by_id(1).status) == ("upserted", -1)
+    assert dao.get_by_id(EXAM_COUNT + 1).name == "inserted"
+
+    # 只更新update_fields中的字段
+    dao.upsert_many([{"id": 1, "name": "ignored", "type": "type1", "status": 0}], update_fields=["status"])
+    assert (dao.get_by_id(1).name, dao.get_by_id(1).status) == ("upserted", 0)
+
+
+def test_delete_many(database):
+    dao = MpExamDao()
+    assert dao.delete_many(list(range(1, 11)), chunk_size=4) == 10
+    assert dao.delete_many([1, 2]) == 0
+    assert dao.get_total_by_filters() == EXAM_COUNT - 10
+
+
+def test_async_bulk_writes(database):
+    dao = AsyncMpExamDao()
+
+    async def run():
+        ids = await dao.add_many(new_exams(3), return_ids=True)
+        await dao.update_many([{"id": exam_id, "status": -1} for exam_id in ids])
+        await dao.upsert_many([{"id": ids[0], "name": "async upsert", "type": "bulk-type1", "status": 0}])
+        deleted = await dao.delete_many(ids[1:])
+        return ids, deleted, await dao.get_list_by_filters(filters=MpExamDTO(name="async upsert"))
+
+    ids, deleted, upserted = asyncio.run(run())
+    assert deleted == 2
+    assert [(exam.id, exam.status) for exam in upserted] == [(ids[0], 0)]
@@ -0,0 +1,116 @@
+import gzip
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from middlewares.compression_middleware import CompressionMiddleware
+from modules.module_exam.service.question_bank_cache import question_bank_cache
+from utils.compression_util import brotli, choose_encoding
+
+# 大于默认压缩阈值的JSON数据
+LARGE_DATA = {"items": [f"item{i}" for i in range(500)]}
+
+
+def large_json(request):
+    return JSONResponse(LARGE_DATA, headers={"ETag": '"large"'})
+
+
+def small_json(request):
+    return JSONResponse({"ok": True})
+
+
+def streaming_text(request):
+    async def chunks():
+        for i in range(100):
+            yield f"line{i}\n".encode() * 10
+    return StreamingResponse(chunks(), media_type="text/plain")
+
+
+def binary(request):
+    return Response(b"\x89PNG" + b"0" * 5000, media_type="image/png")
+
+
+def precompressed(request):
+    return Response(gzip.compress(json.dumps(LARGE_DATA).encode()), media_type="application/json", headers={"Content-Encoding": "gzip"})
+
+
+@pytest.fixture
+def compression_client():
+    app = Starlette(routes=[Route(path, endpoint) for path, endpoint in [
+        ("/large", large_json), ("/small", small_json), ("/stream", streaming_text), ("/binary", binary), ("/precompressed", precompressed),
+    ]])
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    (None, None),
+    ("identity", None),
+    ("gzip", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("*", "br" if brotli is not None else "gzip"),
+    ("br;q=0.5, gzip", "gzip"),
+])
+def test_choose_encoding(accept_encoding, expected):
+    assert choose_encoding(accept_encoding) == expected
+
+
+def test_large_response_is_compressed(compression_client):
+    response = compression_client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Accept-Encoding" in response.headers["Vary"]
+    assert response.headers["ETag"] == 'W/"large"'
+    assert int(response.headers["Content-Length"]) < len(json.dumps(LARGE_DATA))
+    assert response.json() == LARGE_DATA
+
+
+@pytest.mark.skipif(brotli is None, reason="未安装brotli")
+def test_brotli_is_preferred(compression_client):
+    response = compression_client.get("/large", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["Content-Encoding"] == "br"
+    assert response.json() == LARGE_DATA
+
+
+@pytest.mark.parametrize("path", ["/small", "/binary"])
+def test_small_or_binary_response_is_not_compressed(compression_client, path):
+    response = compression_client.get(path, headers={"Accept-Encoding": "gzip"})
+    assert "Content-Encoding" not in response.headers
+
+
+def test_identity_request_is_not_compressed(compression_client):
+    response = compression_client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in response.headers
+    assert response.headers["ETag"] == '"large"'
+
+
+def test_streaming_response_is_compressed_in_chunks(compression_client):
+    response = compression_client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert "Content-Length" not in response.headers
+    assert response.text == "".join(f"line{i}\n" * 10 for i in range(100))
+
+
+def test_precompressed_response_is_not_compressed_twice(compression_client):
+    response = compression_client.get("/precompressed", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.json() == LARGE_DATA
+
+
+def test_question_bank_body_is_precompressed_once(client, auth_headers):
+    identity = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, "Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+
+    response = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["Content-Encoding"] == "gzip"
+    assert response.content == identity.content
+    entry = question_bank_cache.get(1)
+    assert gzip.decompress(entry.response_body("gzip")) == identity.content
+    # 再次请求直接使用缓存项中的压缩结果
+    compressed = entry.response_body("gzip")
+    client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert question_bank_cache.get(1).response_body("gzip") is compressed
+
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from modules.module_exam.dao.mp_exam_dao import AsyncMpExamDao, MpExamDao
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+
+from conftest import DISABLED_EXAM_ID, EXAM_COUNT
+
+
+def walk_pages(dao, page_size, sort_by=None, filters=None):
+    """
+    从第一页开始按游标翻到最后一页，返回每一页的id列表
+    """
+    pages, cursor = [], None
+    while True:
+        records, cursor = dao.get_list_by_cursor(page_size=page_size, cursor=cursor, filters=filters, sort_by=sort_by)
+        pages.append([record.id for record in records])
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_all_rows_once(database):
+    pages = walk_pages(MpExamDao(), page_size=10, filters=MpExamDTO(status=0))
+    expected = [exam_id for exam_id in range(1, EXAM_COUNT + 1) if exam_id != DISABLED_EXAM_ID]
+    assert [len(page) for page in pages] == [10, 10, 4]
+    assert sum(pages, []) == expected
+
+
+def test_cursor_follows_descending_sort(database):
+    pages = walk_pages(MpExamDao(), page_size=7, sort_by=["-id"])
+    assert sum(pages, []) == list(range(EXAM_COUNT, 0, -1))
+
+
+def test_cursor_with_non_unique_sort_key_uses_id_as_tiebreaker(database):
+    # status只有0和-1两个值，排序键相同的记录按id区分，翻页时不会重复或遗漏
+    pages = walk_pages(MpExamDao(), page_size=4, sort_by=["-status"])
+    ids = sum(pages, [])
+    assert sorted(ids) == list(range(1, EXAM_COUNT + 1))
+    assert ids[-1] == DISABLED_EXAM_ID
+
+
+def test_exact_page_size_has_no_next_cursor(database):
+    records, cursor = MpExamDao().get_list_by_cursor(page_size=EXAM_COUNT)
+    assert len(records) == EXAM_COUNT
+    assert cursor is None
+
+
+def test_invalid_or_mismatched_cursor_is_rejected(database):
+    dao = MpExamDao()
+    with pytest.raises(ValueError):
+        dao.get_list_by_cursor(page_size=10, cursor="not-a-cursor")
+    _, cursor = dao.get_list_by_cursor(page_size=10, sort_by=["-id"])
+    with pytest.raises(ValueError):
+        dao.get_list_by_cursor(page_size=10, cursor=cursor, sort_by=["id"])
+
+
+def test_async_cursor_matches_sync(database):
+    async def run():
+        return await AsyncMpExamDao().get_list_by_cursor(page_size=10, sort_by=["-id"])
+
+    assert asyncio.run(run()) == MpExamDao().get_list_by_cursor(page_size=10, sort_by=["-id"])
+
+
+def test_exam_list_endpoint_cursor(client, auth_headers):
+    ids, cursor = [], ""
+    while cursor is not None:
+        data = client.get("/mp/exam/getExamList", params={"cursor": cursor, "page_size": 10}, headers=auth_headers).json()["data"]
+        ids += [exam["id"] for exam in data["list"]]
+        cursor = data["next_cursor"]
+    assert ids == [exam_id for exam_id in range(1, EXAM_COUNT + 1) if exam_id != DISABLED_EXAM_ID]
+
+    response = client.get("/mp/exam/getExamList", params={"cursor": "broken"}, headers=auth_headers)
+    assert response.json()["code"] == 400
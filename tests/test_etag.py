@@ -0,0 +1,83 @@
+import pytest
+from sqlalchemy import event
+
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+from modules.module_exam.dto.mp_option_dto import MpOptionDTO
+from modules.module_exam.service.mp_exam_service import MpExamService
+from modules.module_exam.service.mp_option_service import MpOptionService
+
+# 不接受压缩的请求头，响应使用强ETag
+IDENTITY = {"Accept-Encoding": "identity"}
+
+
+@pytest.fixture
+def async_statements(database):
+    """
+    记录异步引擎执行的SQL语句
+    """
+    _, async_engine = database
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_exam_list_not_modified(client, auth_headers, async_statements):
+    response = client.get("/mp/exam/getExamList", headers=auth_headers)
+    etag = response.headers["ETag"]
+    assert response.status_code == 200
+    assert response.headers["Cache-Control"] == "private, no-cache"
+
+    async_statements.clear()
+    response = client.get("/mp/exam/getExamList", params={"page_num": 2}, headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+    # 304只读取版本号，不查询测试列表
+    assert len(async_statements) == 1
+    assert "mp_data_version" in async_statements[0]
+
+
+def test_exam_list_etag_changes_after_write(client, auth_headers):
+    etag = client.get("/mp/exam/getExamList", headers=auth_headers).headers["ETag"]
+    MpExamService().update_by_id(1, MpExamDTO(name="renamed"))
+
+    response = client.get("/mp/exam/getExamList", headers={**auth_headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["data"][0]["name"] == "renamed"
+
+
+def test_question_list_not_modified(client, auth_headers):
+    response = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, **IDENTITY})
+    etag = response.headers["ETag"]
+    assert not etag.startswith("W/")
+    # POST和GET返回相同的ETag
+    assert client.post("/mp/exam/getQuestionList", json={"exam_id": 1}, headers={**auth_headers, **IDENTITY}).headers["ETag"] == etag
+
+    response = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, **IDENTITY, "If-None-Match": etag})
+    assert (response.status_code, response.content) == (304, b"")
+    # 不同测试的ETag不同
+    assert client.get("/mp/exam/getQuestionList", params={"exam_id": 2}, headers={**auth_headers, **IDENTITY}).headers["ETag"] != etag
+
+
+def test_question_list_weak_etag_when_compressed(client, auth_headers):
+    strong = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, **IDENTITY}).headers["ETag"]
+    response = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, "Accept-Encoding": "gzip"})
+    assert response.headers["ETag"] == "W/" + strong
+    # 弱比较：未压缩的响应的ETag同样可以用于条件请求
+    response = client.get("/mp/exam/getQuestionList", params={"exam_id": 1},
+                          headers={**auth_headers, "Accept-Encoding": "gzip", "If-None-Match": strong})
+    assert response.status_code == 304
+
+
+def test_question_list_etag_changes_after_write(client, auth_headers):
+    etag = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, **IDENTITY}).headers["ETag"]
+    MpOptionService().update_by_id(111, MpOptionDTO(content="changed"))
+    response = client.get("/mp/exam/getQuestionList", params={"exam_id": 1}, headers={**auth_headers, **IDENTITY, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
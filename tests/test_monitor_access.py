@@ -0,0 +1,51 @@
+import ipaddress
+
+import pytest
+from fastapi.testclient import TestClient
+
+import modules.module_monitor.controller.monitor_controller as monitor_controller
+
+
+def client_from(host: str) -> TestClient:
+    """
+    连接对端地址为host的测试客户端
+    """
+    from main import app
+    return TestClient(app, client=(host, 50000))
+
+
+@pytest.fixture
+def trusted_proxy(monkeypatch):
+    monkeypatch.setattr(monitor_controller, "INTERNAL_TRUSTED_PROXIES", [ipaddress.ip_network("10.0.0.0/24")])
+
+
+@pytest.mark.parametrize("host, allowed", [("127.0.0.1", True), ("::1", True), ("192.168.1.10", False), ("testclient", False)])
+def test_peer_address(database, host, allowed):
+    assert client_from(host).get("/metrics").status_code == (200 if allowed else 403)
+    assert client_from(host).get("/internal/db/pool").status_code == (200 if allowed else 403)
+
+
+@pytest.mark.parametrize("header", ["X-Forwarded-For", "X-Real-IP", "Forwarded"])
+def test_forwarded_request_from_untrusted_peer_is_denied(database, header):
+    # 本机的反向代理转发的外部请求，对端地址是本机，但带有转发请求头
+    assert client_from("127.0.0.1").get("/metrics", headers={header: "127.0.0.1"}).status_code == 403
+
+
+def test_trusted_proxy_uses_forwarded_for(database, trusted_proxy):
+    client = client_from("10.0.0.1")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"X-Forwarded-For": "127.0.0.1"}).status_code == 200
+    # 最右侧的非代理地址才是客户端地址，左侧伪造的本机地址无效
+    assert client.get("/metrics", headers={"X-Forwarded-For": "127.0.0.1, 203.0.113.5"}).status_code == 403
+    assert client.get("/metrics", headers={"X-Forwarded-For": "203.0.113.5, 127.0.0.1, 10.0.0.2"}).status_code == 200
+
+
+def test_internal_api_token(database, monkeypatch):
+    monkeypatch.setattr(monitor_controller, "INTERNAL_API_TOKEN", "secret-token")
+    client = client_from("127.0.0.1")
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers={"X-Internal-Token": "wrong"}).status_code == 403
+    assert client.get("/metrics", headers={"X-Internal-Token": "secret-token"}).status_code == 200
+    assert client.get("/metrics", headers={"Authorization": "Bearer secret-token"}).status_code == 200
+    # 令牌正确但地址不允许时仍然拒绝
+    assert client_from("192.168.1.10").get("/metrics", headers={"X-Internal-Token": "secret-token"}).status_code == 403
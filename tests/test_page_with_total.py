@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+import modules.module_exam.dao.base_dao as base_dao
+from modules.module_exam.dao.base_dao import COUNT_MODE_CACHED, COUNT_MODE_ESTIMATED, COUNT_MODE_EXACT
+from modules.module_exam.dao.mp_exam_dao import AsyncMpExamDao, MpExamDao
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+
+from conftest import EXAM_COUNT
+
+
+@pytest.fixture
+def statements(database):
+    """
+    记录同步引擎执行的SQL语句
+    """
+    engine, _ = database
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_exact_count_in_one_statement(statements):
+    records, total = MpExamDao().get_page_with_total(page_size=10, page_num=2, filters=MpExamDTO(status=0), sort_by=["id"])
+    assert [record.id for record in records] == list(range(12, 22))
+    assert total == EXAM_COUNT - 1
+    assert len(statements) == 1
+    assert "OVER" in statements[0].upper()
+
+
+def test_exact_count_without_window_functions(statements, monkeypatch):
+    # MySQL 5.7 等不支持窗口函数的数据库：分页数据和总数分两次查询
+    monkeypatch.setattr(base_dao, "supports_window_functions", lambda dialect: False)
+    records, total = MpExamDao().get_page_with_total(page_size=10, page_num=1)
+    assert len(records) == 10
+    assert total == EXAM_COUNT
+    assert len(statements) == 2
+
+
+def test_exact_count_past_last_page(database):
+    records, total = MpExamDao().get_page_with_total(page_size=10, page_num=10)
+    assert records == []
+    assert total == EXAM_COUNT
+
+
+def test_cached_count_reuses_total(database):
+    dao = MpExamDao()
+    _, total = dao.get_page_with_total(page_size=10, page_num=1, count_mode=COUNT_MODE_CACHED)
+    assert total == EXAM_COUNT
+    dao.add(MpExamDTO(name="new exam", type="new type", status=0))
+    # 缓存有效期内返回缓存的总数，分页数据仍是最新的
+    records, total = dao.get_page_with_total(page_size=30, page_num=1, count_mode=COUNT_MODE_CACHED)
+    assert (len(records), total) == (EXAM_COUNT + 1, EXAM_COUNT)
+    # 不同的查询条件使用不同的缓存
+    _, total = dao.get_page_with_total(page_size=10, page_num=1, filters=MpExamDTO(status=0), count_mode=COUNT_MODE_CACHED)
+    assert total == EXAM_COUNT
+
+
+def test_estimated_count_falls_back_to_cached_on_sqlite(database):
+    _, total = MpExamDao().get_page_with_total(page_size=10, page_num=1, count_mode=COUNT_MODE_ESTIMATED)
+    assert total == EXAM_COUNT
+
+
+def test_unknown_count_mode(database):
+    with pytest.raises(ValueError):
+        MpExamDao().get_page_with_total(page_size=10, page_num=1, count_mode="guess")
+
+
+def test_async_page_with_total(database):
+    async def run():
+        return await AsyncMpExamDao().get_page_with_total(page_size=5, page_num=3, sort_by=["-id"], count_mode=COUNT_MODE_EXACT)
+
+    records, total = asyncio.run(run())
+    assert [record.id for record in records] == list(range(15, 10, -1))
+    assert total == EXAM_COUNT
@@ -0,0 +1,103 @@
+import asyncio
+import threading
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from modules.module_exam.dto.mp_option_dto import MpOptionDTO
+from modules.module_exam.model.mp_option_model import MpOptionModel
+from modules.module_exam.service.data_version import bump_versions_query, question_bank_version_key
+from modules.module_exam.service.mp_option_service import MpOptionService
+from modules.module_exam.service.mp_question_service import AsyncMpQuestionService, MpQuestionService
+from modules.module_exam.service.question_bank_cache import QuestionBankCache, question_bank_cache
+
+
+def other_worker_sets_right_option(engine, option_id: int, is_right: int) -> None:
+    """
+    模拟其他worker进程修改选项：不经过本进程的服务（不会调用invalidate），只在同一个事务中将题库版本号加1
+    """
+    with Session(engine) as session:
+        session.execute(update(MpOptionModel).where(MpOptionModel.id == option_id).values(is_right=is_right))
+        bump_versions_query([question_bank_version_key(1)])(session)
+        session.commit()
+
+
+def test_write_bumps_version_and_invalidates(database):
+    question_service = MpQuestionService()
+    entry = question_service.get_question_bank(1)
+    assert question_service.get_question_bank_version(1) == 0
+
+    MpOptionService().update_by_id(112, MpOptionDTO(is_right=1))
+    assert question_service.get_question_bank_version(1) == 1
+    assert question_service.get_question_bank_version(2) == 0
+    reloaded = question_service.get_question_bank(1)
+    assert reloaded is not entry
+    assert reloaded.source_version == 1
+    assert reloaded.answer_key.get_right_option_ids(11) == {111, 112}
+
+
+def test_grading_sees_other_worker_write_immediately(database):
+    engine, _ = database
+    question_service = MpQuestionService()
+    assert question_service.get_option_score(1, 112) == 0
+
+    other_worker_sets_right_option(engine, 112, 1)
+    # 判分每次都检查版本号，不受检查间隔限制
+    assert question_service.get_option_score(1, 112) == 1
+    assert question_service.get_right_option_ids(1, 11) == {111, 112}
+
+
+def test_reads_see_other_worker_write_after_interval(database, monkeypatch):
+    engine, _ = database
+    question_service = MpQuestionService()
+    entry = question_service.get_question_bank(1)
+
+    other_worker_sets_right_option(engine, 112, 1)
+    # 检查间隔内继续使用缓存
+    assert question_service.get_question_bank(1) is entry
+    monkeypatch.setattr(question_bank_cache, "version_check_interval", 0)
+    reloaded = question_service.get_question_bank(1)
+    assert reloaded is not entry
+    assert reloaded.version != entry.version
+    # 版本号未变化时不重新加载
+    assert question_service.get_question_bank(1) is reloaded
+
+
+def test_async_reads_see_other_worker_write(database, monkeypatch):
+    engine, _ = database
+    question_service = AsyncMpQuestionService()
+    monkeypatch.setattr(question_bank_cache, "version_check_interval", 0)
+
+    async def run():
+        entry = await question_service.get_question_bank(1)
+        other_worker_sets_right_option(engine, 112, 1)
+        return entry, await question_service.get_question_bank(1), await question_service.get_answer_key(1)
+
+    entry, reloaded, answer_key = asyncio.run(run())
+    assert reloaded is not entry
+    assert answer_key.get_option_score(112) == 1
+
+
+def test_invalidate_during_load_skips_store_and_prunes_invalidations():
+    cache = QuestionBankCache()
+    loading, resume = threading.Event(), threading.Event()
+
+    def slow_loader():
+        loading.set()
+        resume.wait()
+        return []
+
+    thread = threading.Thread(target=cache.get_or_load, args=(1, slow_loader))
+    thread.start()
+    loading.wait()
+    cache.invalidate([1, 2])
+    # 只记录正在加载的测试的失效序号
+    assert set(cache._invalidations) == {1}
+    resume.set()
+    thread.join()
+
+    # 加载期间被失效，结果不写入缓存；加载结束后失效序号被删除
+    assert cache.get(1) is None
+    assert cache._invalidations == {}
+    entry = cache.get_or_load(1, lambda: [])
+    assert cache.get(1) is entry
@@ -0,0 +1,103 @@
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, inspect, select, text
+from sqlalchemy.exc import IntegrityError
+
+from modules.module_exam.model.mp_user_exam_model import MpUserExamModel
+from modules.module_exam.model.mp_user_option_model import MpUserOptionModel
+from modules.module_exam.service.mp_user_exam_service import AsyncMpUserExamService, MpUserExamService
+from scripts.upgrade_schema import UPGRADE_STEPS, upgrade_user_exam_unfinished
+
+from conftest import USER_ID
+
+# 升级前的mp_user_exam表结构，没有生成列unfinished和唯一索引
+OLD_USER_EXAM_TABLE = """
+CREATE TABLE mp_user_exam (
+    id INTEGER NOT NULL PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    exam_id INTEGER NOT NULL,
+    page_no INTEGER NOT NULL,
+    score INTEGER NOT NULL,
+    create_time DATETIME,
+    finish_time DATETIME
+)
+"""
+
+
+def user_exams(engine, user_id: int = USER_ID, exam_id: int = 1):
+    with engine.connect() as conn:
+        table = MpUserExamModel.__table__
+        return conn.execute(
+            select(table.c.id, table.c.score, table.c.page_no, table.c.finish_time)
+            .where(table.c.user_id == user_id, table.c.exam_id == exam_id).order_by(table.c.id)
+        ).all()
+
+
+def test_record_answer_updates_one_unfinished_row(database):
+    engine, _ = database
+    service = MpUserExamService()
+    first = service.record_answer(USER_ID, 1, score_delta=1, page_no=1)
+    assert service.record_answer(USER_ID, 1, score_delta=0, page_no=2) == first
+    assert service.record_answer(USER_ID, 1, score_delta=1, page_no=3, is_finished=True) == first
+    # 上一次测试已完成，再次答题时创建新的未完成记录
+    second = service.record_answer(USER_ID, 1, score_delta=1, page_no=1)
+    assert second != first
+    rows = user_exams(engine)
+    assert [(row.id, row.score, row.page_no) for row in rows] == [(first, 2, 3), (second, 1, 1)]
+    assert rows[0].finish_time is not None and rows[1].finish_time is None
+
+
+def test_concurrent_record_answer_keeps_every_point(database):
+    engine, _ = database
+    service = AsyncMpUserExamService()
+    concurrency = 20
+
+    async def run():
+        return await asyncio.gather(*(service.record_answer(USER_ID, 1, score_delta=1, page_no=page_no) for page_no in range(1, concurrency + 1)))
+
+    ids = asyncio.run(run())
+    rows = user_exams(engine)
+    assert len(set(ids)) == 1
+    assert [(row.id, row.score) for row in rows] == [(ids[0], concurrency)]
+
+
+def test_unique_index_rejects_second_unfinished_row(database):
+    engine, _ = database
+    insert = "INSERT INTO mp_user_exam (user_id, exam_id, page_no, score) VALUES (:user_id, 1, 1, 0)"
+    with engine.begin() as conn:
+        conn.execute(text(insert), {"user_id": USER_ID})
+    with pytest.raises(IntegrityError):
+        with engine.begin() as conn:
+            conn.execute(text(insert), {"user_id": USER_ID})
+
+
+def test_upgrade_schema_removes_duplicates_and_adds_index(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+    with engine.begin() as conn:
+        conn.execute(text(OLD_USER_EXAM_TABLE))
+        MpUserOptionModel.__table__.create(conn)
+        conn.execute(text(
+            "INSERT INTO mp_user_exam (id, user_id, exam_id, page_no, score, finish_time) VALUES "
+            "(1, 1, 1, 3, 3, '2024-01-01 00:00:00'), (2, 1, 1, 1, 1, NULL), (3, 1, 1, 2, 2, NULL), (4, 2, 1, 1, 1, NULL)"
+        ))
+        conn.execute(text(
+            "INSERT INTO mp_user_option (user_id, exam_id, user_exam_id, option_id, question_id, is_duoxue, is_right) VALUES "
+            "(1, 1, 2, 111, 11, 0, 1), (1, 1, 3, 111, 11, 0, 1), (1, 1, 3, 121, 12, 0, 1)"
+        ))
+
+    # 不加execute时只检查，不修改数据库
+    assert upgrade_user_exam_unfinished(engine, execute=False)
+    assert [row.id for row in user_exams(engine, user_id=1)] == [1, 2, 3]
+
+    assert [name for name, step in UPGRADE_STEPS if step(engine, True)] == [name for name, _ in UPGRADE_STEPS]
+    # 每个(user_id, exam_id)只保留id最大的未完成记录，被删除记录的答题记录一起删除
+    assert [row.id for row in user_exams(engine, user_id=1)] == [1, 3]
+    with engine.connect() as conn:
+        assert conn.execute(text("SELECT user_exam_id FROM mp_user_option ORDER BY id")).scalars().all() == [3, 3]
+    inspector = inspect(engine)
+    assert "uk_user_exam_unfinished" in {index["name"] for index in inspector.get_indexes("mp_user_exam")}
+    assert inspector.has_table("mp_data_version")
+    # 已经升级过的步骤自动跳过
+    assert not any(step(engine, True) for _, step in UPGRADE_STEPS)
+    engine.dispose()
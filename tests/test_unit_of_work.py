@@ -0,0 +1,100 @@
+import asyncio
+
+import pytest
+from fastapi import APIRouter
+
+from config.database_config import async_unit_of_work, await_after_transaction, call_after_commit, unit_of_work
+from modules.module_exam.dao.mp_exam_dao import AsyncMpExamDao, MpExamDao
+from modules.module_exam.dto.mp_exam_dto import MpExamDTO
+
+
+def test_unit_of_work_commits_once(database):
+    dao = MpExamDao()
+    committed = []
+    with unit_of_work() as session:
+        dao.update_by_id(1, MpExamDTO(name="first"))
+        with unit_of_work() as inner_session:
+            assert inner_session is session
+            dao.update_by_id(2, MpExamDTO(name="second"))
+        call_after_commit(lambda: committed.append(True))
+        assert committed == []
+    assert committed == [True]
+    assert (dao.get_by_id(1).name, dao.get_by_id(2).name) == ("first", "second")
+
+
+def test_unit_of_work_rolls_back_every_step(database):
+    dao = MpExamDao()
+    committed = []
+    with pytest.raises(RuntimeError):
+        with unit_of_work():
+            dao.update_by_id(1, MpExamDTO(name="first"))
+            dao.add(MpExamDTO(name="new exam", type="new type", status=0))
+            call_after_commit(lambda: committed.append(True))
+            raise RuntimeError("fail")
+    assert committed == []
+    assert dao.get_by_id(1).name == "exam1"
+    assert dao.get_one_by_filters(filters=MpExamDTO(name="new exam")) is None
+
+
+def test_async_unit_of_work_callbacks(database):
+    dao = AsyncMpExamDao()
+    events = []
+
+    async def record(name):
+        events.append(name)
+
+    async def run():
+        async with async_unit_of_work():
+            await dao.update_by_id(1, MpExamDTO(name="first"))
+            await await_after_transaction(lambda: record("commit 1"), lambda: record("rollback 1"))
+        with pytest.raises(RuntimeError):
+            async with async_unit_of_work():
+                await dao.update_by_id(2, MpExamDTO(name="second"))
+                await await_after_transaction(lambda: record("commit 2"), lambda: record("rollback 2"))
+                raise RuntimeError("fail")
+        # 不在工作单元中时立即执行
+        await await_after_transaction(lambda: record("immediate"))
+        return (await dao.get_by_id(1)).name, (await dao.get_by_id(2)).name
+
+    assert asyncio.run(run()) == ("first", "exam2")
+    assert events == ["commit 1", "rollback 2", "immediate"]
+
+
+def test_middleware_opens_one_unit_of_work_per_request(client, auth_headers, monkeypatch):
+    from main import app
+    dao = AsyncMpExamDao()
+    router = APIRouter()
+
+    @router.post("/test/unit_of_work")
+    async def write_then_fail(fail: bool = False):
+        # 接口中没有显式开启工作单元，两次写入共用中间件开启的工作单元
+        await dao.update_by_id(1, MpExamDTO(name="first"))
+        await dao.update_by_id(2, MpExamDTO(name="second"))
+        if fail:
+            raise RuntimeError("fail")
+        return {}
+
+    monkeypatch.setattr(app.router, "routes", app.router.routes + router.routes)
+    sessions = []
+    monkeypatch.setattr(dao, "_run_in_session", _recording(dao._run_in_session, sessions))
+
+    failing_client = type(client)(app, raise_server_exceptions=False)
+    assert failing_client.post("/test/unit_of_work", params={"fail": True}, headers=auth_headers).status_code == 500
+    assert len(set(sessions)) == 1
+    assert asyncio.run(dao.get_by_id(1)).name == "exam1"
+
+    assert client.post("/test/unit_of_work", headers=auth_headers).status_code == 200
+    assert (asyncio.run(dao.get_by_id(1)).name, asyncio.run(dao.get_by_id(2)).name) == ("first", "second")
+
+
+def _recording(run_in_session, sessions):
+    """
+    包装DAO的_run_in_session，记录每次调用时工作单元中的会话
+    """
+    from config.database_config import current_async_db_session
+
+    async def wrapper(*args, **kwargs):
+        sessions.append(id(current_async_db_session.get()))
+        return await run_in_session(*args, **kwargs)
+
+    return wrapper
@@ -0,0 +1,71 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    进程内的缓存类，带有容量上限和过期时间（TTL）
+    超过容量上限时淘汰最久未使用的缓存项（LRU），超过过期时间的缓存项在读取时视为不存在
+    内部使用锁保护，可以在多个线程中同时使用
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        """
+        初始化缓存
+            maxsize: 最多缓存多少项
+            ttl: 缓存项的过期时间（秒）
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        获取缓存值，缓存不存在或已过期时返回default
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expire_at = item
+            if expire_at < time.monotonic():
+                # 已过期，删除缓存项
+                del self._data[key]
+                return default
+            # 标记为最近使用
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        设置缓存值
+            ttl: 该缓存项的过期时间（秒），不传则使用初始化时的ttl
+        """
+        expire_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expire_at)
+            self._data.move_to_end(key)
+            # 超过容量上限时，淘汰最久未使用的缓存项
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """
+        删除指定的缓存项
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """
+        清空全部缓存
+        """
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
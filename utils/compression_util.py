@@ -0,0 +1,108 @@
+import gzip
+import os
+import zlib
+from typing import Dict, Optional
+
+try:
+    import brotli
+except ImportError:  # brotli为可选依赖（pip install brotli），未安装时只支持gzip
+    brotli = None
+
+# 响应体小于该字节数时不压缩（压缩收益小于压缩开销）
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1000"))
+# 每次请求实时压缩使用的级别：gzip 1-9，brotli 0-11。级别越高压缩率越高、CPU开销越大
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_QUALITY = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+# 预压缩（缓存的响应体只压缩一次）使用的级别，可以比实时压缩更高。不同级别的耗时和压缩率见 scripts/benchmark_compression.py
+PRECOMPRESS_GZIP_LEVEL = int(os.getenv("PRECOMPRESS_GZIP_LEVEL", "9"))
+PRECOMPRESS_BROTLI_QUALITY = int(os.getenv("PRECOMPRESS_BROTLI_QUALITY", "5"))
+# 响应体不小于该字节数时在线程池中压缩，避免压缩大响应体时阻塞事件循环
+COMPRESSION_THREAD_MIN_SIZE = int(os.getenv("COMPRESSION_THREAD_MIN_SIZE", str(256 * 1024)))
+
+# 服务端支持的编码，按优先级排列（客户端权重相同时优先使用前面的编码）
+SUPPORTED_ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+# 需要压缩的响应类型，图片、压缩包等已经压缩过的类型不再压缩
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml", "image/svg+xml")
+# 流式推送的响应类型，压缩会导致数据被缓冲，不压缩
+UNCOMPRESSIBLE_TYPES = ("text/event-stream",)
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    根据请求头 Accept-Encoding 选择响应使用的压缩编码，客户端不接受压缩时返回None
+    支持权重（例如 "gzip;q=0.8, br"）、q=0 表示不接受、* 表示接受任意编码
+    """
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name] = weight
+    best, best_weight = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+def is_compressible(content_type: Optional[str]) -> bool:
+    """
+    响应类型是否需要压缩
+    """
+    if not content_type:
+        return False
+    content_type = content_type.lower()
+    return content_type.startswith(COMPRESSIBLE_TYPES) and not content_type.startswith(UNCOMPRESSIBLE_TYPES)
+
+
+def compress(data: bytes, encoding: str, precompress: bool = False) -> bytes:
+    """
+    压缩数据
+        encoding: gzip 或 br
+        precompress: 是否为预压缩（使用预压缩级别）
+    """
+    if encoding == "br":
+        return brotli.compress(data, quality=PRECOMPRESS_BROTLI_QUALITY if precompress else COMPRESSION_BROTLI_QUALITY)
+    # mtime=0：相同内容的压缩结果相同
+    return gzip.compress(data, compresslevel=PRECOMPRESS_GZIP_LEVEL if precompress else COMPRESSION_GZIP_LEVEL, mtime=0)
+
+
+class StreamCompressor:
+    """
+    流式压缩：响应体分多次发送时，逐块压缩，最后调用flush输出剩余数据
+    """
+
+    def __init__(self, encoding: str):
+        if encoding == "br":
+            compressor = brotli.Compressor(quality=COMPRESSION_BROTLI_QUALITY)
+            self.compress, self.flush = compressor.process, compressor.finish
+        else:
+            # wbits=31：输出gzip格式（带gzip头和校验）
+            compressor = zlib.compressobj(COMPRESSION_GZIP_LEVEL, zlib.DEFLATED, 31)
+            self.compress, self.flush = compressor.compress, compressor.flush
+
+
+def encoding_headers(encoding: Optional[str]) -> Dict[str, str]:
+    """
+    压缩响应需要的响应头。未压缩时也返回Vary，告诉中间缓存响应内容与 Accept-Encoding 有关
+    """
+    headers = {"Vary": "Accept-Encoding"}
+    if encoding is not None:
+        headers["Content-Encoding"] = encoding
+    return headers
+
+
+def weak_etag(etag: str) -> str:
+    """
+    压缩后的响应使用弱ETag（与nginx相同）：表示内容相同但字节不同，If-None-Match 比较时忽略 W/ 前缀
+    """
+    return etag if etag.startswith("W/") else "W/" + etag
@@ -0,0 +1,51 @@
+import hashlib
+import os
+from typing import Dict, Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# 带ETag的响应的Cache-Control。默认客户端可以保存响应，但每次使用前都需要带 If-None-Match 重新验证
+ETAG_CACHE_CONTROL = os.getenv("ETAG_CACHE_CONTROL", "private, no-cache")
+
+
+def content_version(body: bytes) -> str:
+    """
+    由响应内容生成版本号（16位十六进制摘要）。内容相同时版本号相同，与进程、重启和缓存重新加载无关
+    """
+    return hashlib.blake2b(body, digest_size=8).hexdigest()
+
+
+def make_etag(*parts) -> str:
+    """
+    由版本信息生成强ETag，例如 "question-1-8f3a2b1c4d5e6f70"
+    """
+    return '"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """
+    请求头 If-None-Match 中是否包含etag（支持 * 和多个ETag，使用弱比较：忽略双方的弱验证前缀 W/）
+    """
+    value: Optional[str] = request.headers.get("if-none-match")
+    if not value:
+        return False
+    if value.strip() == "*":
+        return True
+    etag = _strip_weak(etag)
+    return any(_strip_weak(item.strip()) == etag for item in value.split(","))
+
+
+def _strip_weak(etag: str) -> str:
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def etag_headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": ETAG_CACHE_CONTROL}
+
+
+def not_modified_response(etag: str) -> Response:
+    """
+    304响应：客户端缓存的内容仍然有效，不返回响应体
+    """
+    return Response(status_code=304, headers=etag_headers(etag))
@@ -0,0 +1,60 @@
+import asyncio
+import contextlib
+import os
+import time
+
+# 多进程之间的文件锁：类Unix系统使用fcntl.flock，Windows使用msvcrt.locking。两者都没有时不加锁
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import msvcrt
+except ImportError:
+    msvcrt = None
+
+
+def _try_lock(fd: int) -> bool:
+    """
+    尝试对文件加排他锁，不等待。已被其他进程（或本进程的其他文件描述符）加锁时返回False
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+@contextlib.asynccontextmanager
+async def async_file_lock(path: str, timeout: float = 0, poll_interval: float = 0.05):
+    """
+    多进程之间的排他文件锁，等待时不阻塞事件循环
+        path: 锁文件路径，不存在时创建
+        timeout: 最长等待时间（秒），0表示不等待
+    返回（as后的变量）是否获得了锁，没有获得锁时由调用方决定跳过还是继续执行
+    使用示例
+        async with async_file_lock("data.lock", timeout=10) as locked:
+            if locked:
+                ...
+    """
+    if fcntl is None and msvcrt is None:
+        yield True
+        return
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o600)
+    locked = False
+    try:
+        deadline = time.monotonic() + timeout
+        while True:
+            locked = _try_lock(fd)
+            if locked or time.monotonic() >= deadline:
+                break
+            await asyncio.sleep(poll_interval)
+        yield locked
+    finally:
+        if locked and fcntl is None:
+            msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        # 关闭文件时释放flock锁
+        os.close(fd)
@@ -1,11 +1,21 @@
+import hashlib
+import os
 import time
 import jwt
 from typing import Optional, Dict, Any
 
+from utils.cache_util import TTLCache
+
+# 已验证token缓存的最大数量。缓存token的sha256摘要，不保存token原文，缓存到token的过期时间（exp）
+JWT_VERIFIED_CACHE_SIZE = int(os.getenv("JWT_VERIFIED_CACHE_SIZE", "10000"))
+
+# 已验证token缓存：token摘要 -> payload
+verified_token_cache = TTLCache(maxsize=JWT_VERIFIED_CACHE_SIZE)
+
 
 class JWTUtil:
-    # 建议从环境变量或配置文件中读取密钥
-    SECRET_KEY: str = "shu-yx-token"
+    # 密钥，从环境变量 JWT_SECRET_KEY 中读取
+    SECRET_KEY: str = os.getenv("JWT_SECRET_KEY", "shu-yx-token")
     ALGORITHM = "HS256"  # 正确的算法名称
 
     @staticmethod
@@ -36,16 +46,8 @@ class JWTUtil:
         Returns:
             token是否有效
         """
-        try:
-            # 解码JWT token
-            jwt.decode(token, JWTUtil.SECRET_KEY, algorithms=[JWTUtil.ALGORITHM])
-            return True
-        except jwt.ExpiredSignatureError:
-            # Token过期
-            return False
-        except jwt.InvalidTokenError:
-            # Token无效
-            return False
+        # 过期或无效的token，get_payload都返回None
+        return JWTUtil.get_payload(token) is not None
 
     @staticmethod
     def get_payload(token: str) -> Optional[Dict[str, Any]]:
@@ -62,4 +64,25 @@ class JWTUtil:
             payload = jwt.decode(token, JWTUtil.SECRET_KEY, algorithms=[JWTUtil.ALGORITHM])
             return payload
         except jwt.InvalidTokenError:
-            return None
\ No newline at end of file
+            return None
+
+    @staticmethod
+    def get_payload_cached(token: str) -> Optional[Dict[str, Any]]:
+        """
+        获取token中的payload数据，验证通过的token缓存到过期时间，再次请求时不再验证签名和解码
+
+        Args:
+            token: 要解析的JWT token字符串
+
+        Returns:
+            token中的payload数据（缓存中的对象，调用方不能修改），如果token无效则返回None
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        payload = verified_token_cache.get(key)
+        if payload is not None:
+            return payload
+        payload = JWTUtil.get_payload(token)
+        # 没有过期时间的token不缓存
+        if payload is not None and isinstance(payload.get("exp"), (int, float)):
+            verified_token_cache.set(key, payload, ttl=payload["exp"] - time.time())
+        return payload
@@ -0,0 +1,195 @@
+import glob
+import json
+import os
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+# 多进程模式的统计文件目录。uvicorn使用多个worker进程时需要配置，每个进程定时把自己的统计数据写入 metrics_<pid>.json，
+# /metrics 接口读取目录中所有进程的文件汇总后返回。启动服务前需要清空该目录（避免累加上一次运行的数据）
+METRICS_MULTIPROC_DIR = os.getenv("METRICS_MULTIPROC_DIR", "")
+# 多进程模式下写入统计文件的间隔（秒）
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+# 请求耗时直方图的分桶上限（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# 没有匹配到路由的请求（例如404）使用的路由标签，避免随机路径导致标签数量无限增长
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class MetricsRegistry:
+    """
+    HTTP请求指标：按 (请求方法, 路由模板, 状态码) 统计的请求数，按 (请求方法, 路由模板) 统计的耗时直方图，按请求方法统计的处理中的请求数
+    处理中的请求还没有匹配路由，因此只按请求方法统计
+    内部使用锁保护，可以在多个线程中同时记录
+    """
+
+    def __init__(self, multiproc_dir: str = METRICS_MULTIPROC_DIR, flush_interval: float = METRICS_FLUSH_INTERVAL):
+        self.multiproc_dir = multiproc_dir
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        # (method, route, status) -> 请求数
+        self._requests: Dict[Tuple[str, str, str], int] = defaultdict(int)
+        # (method, route) -> [各分桶的请求数..., 耗时总和, 请求数]，分桶不累加
+        self._durations: Dict[Tuple[str, str], list] = {}
+        # method -> 处理中的请求数
+        self._in_flight: Dict[str, int] = defaultdict(int)
+        self._stop_event: Optional[threading.Event] = None
+
+    def request_started(self, method: str) -> None:
+        with self._lock:
+            self._in_flight[method] += 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float) -> None:
+        with self._lock:
+            self._in_flight[method] -= 1
+            self._requests[(method, route, str(status))] += 1
+            item = self._durations.get((method, route))
+            if item is None:
+                item = self._durations[(method, route)] = [0] * (len(LATENCY_BUCKETS) + 1) + [0.0, 0]
+            item[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            item[-2] += seconds
+            item[-1] += 1
+
+    def _snapshot(self, include_in_flight: bool = True) -> dict:
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "requests": [[*key, count] for key, count in self._requests.items()],
+                "durations": [[*key, list(item)] for key, item in self._durations.items()],
+                "in_flight": [[method, count] for method, count in self._in_flight.items()] if include_in_flight else [],
+            }
+
+    # ---------------- 多进程模式 ----------------
+
+    def _file_path(self, pid: int) -> str:
+        return os.path.join(self.multiproc_dir, f"metrics_{pid}.json")
+
+    def flush(self, include_in_flight: bool = True) -> None:
+        """
+        将当前进程的统计数据写入统计文件（先写临时文件再替换，读取方不会读到写了一半的文件）
+        """
+        if not self.multiproc_dir:
+            return
+        path = self._file_path(os.getpid())
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._snapshot(include_in_flight), f)
+        os.replace(tmp_path, path)
+
+    def start(self) -> None:
+        """
+        多进程模式下启动后台线程，定时写入统计文件（应用启动时调用）
+        """
+        if not self.multiproc_dir or self._stop_event is not None:
+            return
+        os.makedirs(self.multiproc_dir, exist_ok=True)
+        self._stop_event = threading.Event()
+
+        def run(stop_event: threading.Event):
+            while not stop_event.wait(self.flush_interval):
+                self.flush()
+
+        threading.Thread(target=run, args=(self._stop_event,), name="metrics-flush", daemon=True).start()
+
+    def stop(self) -> None:
+        """
+        停止后台线程并最后写入一次统计文件（应用关闭时调用）。进程退出后不再有处理中的请求，不写入处理中的请求数
+        """
+        if self._stop_event is None:
+            return
+        self._stop_event.set()
+        self._stop_event = None
+        self.flush(include_in_flight=False)
+
+    def _collect(self) -> List[dict]:
+        """
+        获取需要汇总的统计数据：单进程模式只有当前进程；多进程模式读取目录中所有进程的统计文件
+        已退出进程的请求数、耗时保留（计数器不能减少），处理中的请求数不再计入
+        """
+        if not self.multiproc_dir:
+            return [self._snapshot()]
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.multiproc_dir, "metrics_*.json")):
+            try:
+                with open(path, encoding="utf-8") as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            if not _is_process_alive(snapshot.get("pid")):
+                snapshot["in_flight"] = []
+            snapshots.append(snapshot)
+        return snapshots
+
+    # ---------------- Prometheus 文本格式 ----------------
+
+    def render(self) -> str:
+        """
+        汇总统计数据，返回Prometheus文本格式（text/plain; version=0.0.4）
+        """
+        requests: Dict[tuple, int] = defaultdict(int)
+        durations: Dict[tuple, list] = {}
+        in_flight: Dict[str, int] = defaultdict(int)
+        for snapshot in self._collect():
+            for method, route, status, count in snapshot["requests"]:
+                requests[(method, route, status)] += count
+            for method, route, item in snapshot["durations"]:
+                total = durations.setdefault((method, route), [0] * len(item))
+                for index, value in enumerate(item):
+                    total[index] += value
+            for method, count in snapshot["in_flight"]:
+                in_flight[method] += count
+
+        lines = [
+            "# HELP http_requests_total Total number of HTTP requests.",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP http_request_duration_seconds HTTP request latency in seconds.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), item in sorted(durations.items()):
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bucket, count in zip(list(LATENCY_BUCKETS) + ["+Inf"], item[:-2]):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bucket}"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {item[-2]}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {item[-1]}")
+
+        lines += [
+            "# HELP http_requests_in_progress Number of HTTP requests being processed.",
+            "# TYPE http_requests_in_progress gauge",
+        ]
+        for method, count in sorted(in_flight.items()):
+            lines.append(f'http_requests_in_progress{{method="{method}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    """
+    转义Prometheus标签值中的反斜杠、双引号和换行
+    """
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _is_process_alive(pid: Optional[int]) -> bool:
+    if pid is None:
+        return False
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+# 全局指标实例
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,167 @@
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# 借出连接等待时间直方图的分桶上限（毫秒），最后一个桶为大于最大上限的等待
+POOL_WAIT_BUCKETS_MS = (1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolStats:
+    """
+    连接池统计数据：借出次数、借出等待时间直方图、等待超时次数、连接创建/关闭次数及连接存活时间
+    内部使用锁保护，可以在多个线程中同时记录
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_buckets = [0] * (len(POOL_WAIT_BUCKETS_MS) + 1)
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.connects = 0
+        self.closes = 0
+        self.lifetime_total = 0.0
+        self.lifetime_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False) -> None:
+        """
+        记录一次从连接池借出连接的等待时间
+            timed_out: 是否等待超时（超时的等待不计入借出次数）
+        """
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_buckets[bisect_left(POOL_WAIT_BUCKETS_MS, seconds * 1000)] += 1
+            self.wait_total += seconds
+            self.wait_max = max(self.wait_max, seconds)
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connects += 1
+
+    def record_close(self, lifetime: Optional[float]) -> None:
+        """
+        记录一次连接关闭
+            lifetime: 连接从创建到关闭的存活时间（秒），未知时为None
+        """
+        with self._lock:
+            self.closes += 1
+            if lifetime is not None:
+                self.lifetime_total += lifetime
+                self.lifetime_max = max(self.lifetime_max, lifetime)
+
+    def snapshot(self, pool=None) -> Dict[str, Any]:
+        """
+        返回统计数据的快照，传入pool时同时返回连接池的当前状态
+        """
+        with self._lock:
+            waits = self.checkouts + self.timeouts
+            data: Dict[str, Any] = {
+                "name": self.name,
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / waits * 1000, 3) if waits else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "wait_histogram_ms": [
+                    {"le": bucket, "count": count}
+                    for bucket, count in zip(list(POOL_WAIT_BUCKETS_MS) + ["+Inf"], self.wait_buckets)
+                ],
+                "connects": self.connects,
+                "closes": self.closes,
+                "lifetime_avg_s": round(self.lifetime_total / self.closes, 3) if self.closes else 0.0,
+                "lifetime_max_s": round(self.lifetime_max, 3),
+            }
+        if pool is not None and isinstance(pool, QueuePool):
+            data.update({
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+            })
+        return data
+
+
+class _InstrumentedPoolMixin:
+    """
+    连接池混入类：记录每次借出连接的等待时间以及等待超时
+    """
+    stats: Optional[PoolStats] = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.stats is not None:
+                self.stats.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.stats is not None:
+            self.stats.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # engine.dispose() 会重新创建连接池，统计数据沿用到新的连接池
+        pool = super().recreate()
+        pool.stats = self.stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    """
+    带统计的QueuePool，用于同步引擎：create_engine(url, poolclass=InstrumentedQueuePool)
+    """
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """
+    带统计的AsyncAdaptedQueuePool，用于异步引擎：create_async_engine(url, poolclass=InstrumentedAsyncQueuePool)
+    """
+
+
+# 名称 -> 引擎，供统计接口遍历
+_engines: Dict[str, Engine] = {}
+
+
+def instrument_engine(name: str, engine) -> None:
+    """
+    为引擎的连接池开启统计，并注册到统计列表中
+        name: 引擎名称，例如 primary、async_primary、replica_0
+        engine: 同步引擎或异步引擎。连接池需要是InstrumentedQueuePool或InstrumentedAsyncQueuePool，否则只统计连接创建和关闭
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+    stats = PoolStats(name)
+    sync_engine.pool.stats = stats
+
+    @event.listens_for(sync_engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        connection_record.info["connected_at"] = time.monotonic()
+        stats.record_connect()
+
+    @event.listens_for(sync_engine, "close")
+    def on_close(dbapi_connection, connection_record):
+        connected_at = connection_record.info.get("connected_at") if connection_record is not None else None
+        stats.record_close(time.monotonic() - connected_at if connected_at is not None else None)
+
+    _engines[name] = sync_engine
+
+
+def get_pool_stats() -> List[Dict[str, Any]]:
+    """
+    获取所有已注册引擎的连接池统计数据
+    """
+    result = []
+    for name, engine in _engines.items():
+        stats = getattr(engine.pool, "stats", None) or PoolStats(name)
+        result.append(stats.snapshot(engine.pool))
+    return result
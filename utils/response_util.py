@@ -2,6 +2,13 @@ from pydantic import BaseModel
 from typing import Generic, TypeVar, Optional, Any, Dict, List
 from datetime import datetime
 from sqlalchemy.ext.declarative import DeclarativeMeta
+import pydantic_core
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # orjson为可选依赖（pip install orjson），未安装时使用pydantic自带的序列化
+    orjson = None
 
 # 定义一个泛型类型变量
 T = TypeVar('T')
@@ -15,6 +22,37 @@ class ResponseModel(BaseModel, Generic[T]):
     # 响应数据，类型为泛型T，可选
     data: Optional[T] = None
 
+def dumps_json(content: Any) -> bytes:
+    """
+    将响应内容直接序列化为JSON字节串，不经过FastAPI的jsonable_encoder逐个字段转换
+    DTO、datetime等类型按pydantic的JSON规则转换，输出与FastAPI默认返回的JSON相同
+    """
+    if orjson is not None:
+        # orjson不支持的类型（DTO、Decimal等）交给pydantic转换；OPT_UTC_Z：UTC时间输出为Z结尾，与pydantic一致
+        return orjson.dumps(content, default=pydantic_core.to_jsonable_python,
+                            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z)
+    return pydantic_core.to_json(content)
+
+
+def encode_response(code: int = 200, message: str = "success", data: Any = None) -> bytes:
+    """
+    将 {code, message, data} 响应结构序列化为JSON字节串，可以缓存后重复使用
+    """
+    return dumps_json({"code": code, "message": message, "data": data})
+
+
+class JSONBytesResponse(Response):
+    """
+    JSON响应：content为已经序列化好的字节串时直接返回，否则使用dumps_json序列化
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps_json(content)
+
+
 # 定义响应工具类 ResponseUtil。该类提供各个静态方法，用于创建成功和失败的响应对象。
 class ResponseUtil:
     # 定义success方法，用于创建成功的响应对象,默认状态码200，消息"success"
@@ -22,6 +60,11 @@ class ResponseUtil:
     def success(code=200,message="success",data=None):
         return ResponseModel(code=code, message=message, data=data)
 
+    # 定义success_json方法，与success返回相同的JSON，但直接序列化为字节串返回，适合数据量大的接口
+    @staticmethod
+    def success_json(code=200,message="success",data=None):
+        return JSONBytesResponse(encode_response(code=code, message=message, data=data))
+
     # 定义error方法，用于创建失败的响应对象，默认状态码500，消息"error"
     @staticmethod
     def error(code=500,message="error",data=None):
@@ -0,0 +1,147 @@
+import os
+import re
+import threading
+import time
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config.log_config import logger
+
+# 是否开启SQL语句统计
+SQL_STATS_ENABLED = os.getenv("SQL_STATS_ENABLED", "1") == "1"
+# 慢查询阈值（毫秒），执行时间超过该值的语句写入慢查询日志
+SQL_SLOW_QUERY_MS = float(os.getenv("SQL_SLOW_QUERY_MS", "200"))
+# 最多统计多少种语句形状，超出后新的语句形状合并统计到 OTHER_SHAPE 中，避免内存无限增长
+SQL_STATS_MAX_SHAPES = int(os.getenv("SQL_STATS_MAX_SHAPES", "1000"))
+OTHER_SHAPE = "<other>"
+
+# 字符串、数字常量以及各种驱动的参数占位符：'abc'、123、%(name)s、%s、?、:name
+_LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b|%\(\w+\)s|%s|\?|(?<!:):\w+")
+# 连续的多个占位符，例如 IN (?, ?, ?) 或 VALUES (?, ?), (?, ?)
+_LIST_PATTERN = re.compile(r"\?(?:\s*,\s*\?)+")
+_VALUES_PATTERN = re.compile(r"\((?:\.\.\.|\?)\)(?:\s*,\s*\((?:\.\.\.|\?)\))+")
+_SPACE_PATTERN = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_statement(statement: str) -> str:
+    """
+    将SQL语句转换为语句形状：常量和参数替换为?，IN列表、多行VALUES合并为(...)，空白合并为一个空格
+    相同形状的语句只是参数不同，可以合并统计。同一条语句文本的转换结果会被缓存
+    """
+    shape = _LITERAL_PATTERN.sub("?", statement)
+    shape = _LIST_PATTERN.sub("...", shape)
+    shape = _VALUES_PATTERN.sub("(...)", shape)
+    return _SPACE_PATTERN.sub(" ", shape).strip()
+
+
+class RequestSqlStats:
+    """
+    一次请求中执行的SQL语句数量和数据库总耗时
+    """
+    __slots__ = ("count", "total_time")
+
+    def __init__(self):
+        self.count = 0
+        self.total_time = 0.0
+
+
+# 当前请求的SQL统计，由SqlStatsMiddleware在请求开始时设置。为None时不统计请求级别的数据
+current_request_sql_stats: ContextVar[Optional[RequestSqlStats]] = ContextVar("current_request_sql_stats", default=None)
+
+
+class StatementStats:
+    """
+    按语句形状汇总的统计数据：执行次数、总耗时、最大耗时、影响/返回的行数
+    内部使用锁保护，可以在多个线程中同时记录
+    """
+
+    def __init__(self, max_shapes: int = SQL_STATS_MAX_SHAPES):
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        # 语句形状 -> [执行次数, 总耗时, 最大耗时, 行数]
+        self._data: Dict[str, list] = {}
+
+    def record(self, shape: str, elapsed: float, rows: int) -> None:
+        with self._lock:
+            item = self._data.get(shape)
+            if item is None:
+                if len(self._data) >= self.max_shapes:
+                    shape = OTHER_SHAPE
+                item = self._data.setdefault(shape, [0, 0.0, 0.0, 0])
+            item[0] += 1
+            item[1] += elapsed
+            if elapsed > item[2]:
+                item[2] = elapsed
+            if rows > 0:
+                item[3] += rows
+
+    def top(self, n: int = 20, order_by: str = "total") -> List[Dict[str, Any]]:
+        """
+        获取前n种语句形状的统计数据
+            order_by: 排序字段 total 总耗时、count 执行次数、max 最大耗时、avg 平均耗时
+        """
+        with self._lock:
+            items = [(shape, list(item)) for shape, item in self._data.items()]
+        result = [{
+            "statement": shape,
+            "count": count,
+            "total_ms": round(total * 1000, 3),
+            "avg_ms": round(total / count * 1000, 3) if count else 0.0,
+            "max_ms": round(max_time * 1000, 3),
+            "rows": rows,
+        } for shape, (count, total, max_time, rows) in items]
+        key = {"total": "total_ms", "count": "count", "max": "max_ms", "avg": "avg_ms"}.get(order_by, "total_ms")
+        result.sort(key=lambda item: item[key], reverse=True)
+        return result[:n]
+
+    def reset(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# 全局语句统计实例
+statement_stats = StatementStats()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._sql_stats_start = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    start = getattr(context, "_sql_stats_start", None)
+    if start is None:
+        return
+    elapsed = time.perf_counter() - start
+    shape = normalize_statement(statement)
+    # SELECT语句的rowcount在部分驱动中为-1（例如sqlite3），此时不统计行数
+    rows = cursor.rowcount if cursor.rowcount is not None else -1
+    statement_stats.record(shape, elapsed, rows)
+
+    request_stats = current_request_sql_stats.get()
+    if request_stats is not None:
+        request_stats.count += 1
+        request_stats.total_time += elapsed
+
+    if elapsed * 1000 >= SQL_SLOW_QUERY_MS:
+        logger.warning(f'慢查询 {elapsed * 1000:.1f}ms, rows = {rows}, statement = {shape}')
+
+
+_installed = False
+
+
+def install_sql_stats() -> None:
+    """
+    为所有数据库引擎（包括异步引擎内部的同步引擎）注册语句统计事件，重复调用只注册一次
+    """
+    global _installed
+    if _installed or not SQL_STATS_ENABLED:
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    _installed = True
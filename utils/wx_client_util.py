@@ -0,0 +1,227 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import httpx
+
+from config.log_config import logger
+
+# 微信接口地址。测试时可以指向本地的模拟服务（scripts/wx_stub_server.py）
+WX_API_BASE_URL = os.getenv("WX_API_BASE_URL", "https://api.weixin.qq.com")
+# 微信小程序应用ID和应用密钥
+WX_APP_ID = os.getenv("WX_APP_ID", "wxf9788c249032b959")
+WX_APP_SECRET = os.getenv("WX_APP_SECRET", "c69674e1cb73d754ef9cab64f3553867")
+# 超时时间（秒）：建立连接、读取响应、等待连接池中的空闲连接
+WX_CONNECT_TIMEOUT = float(os.getenv("WX_CONNECT_TIMEOUT", "2"))
+WX_READ_TIMEOUT = float(os.getenv("WX_READ_TIMEOUT", "3"))
+WX_POOL_TIMEOUT = float(os.getenv("WX_POOL_TIMEOUT", "1"))
+# 连接池：最大连接数、最多保持的空闲长连接数
+WX_MAX_CONNECTIONS = int(os.getenv("WX_MAX_CONNECTIONS", "50"))
+WX_MAX_KEEPALIVE = int(os.getenv("WX_MAX_KEEPALIVE", "20"))
+# 同时进行的微信接口调用数上限，超出的调用排队等待
+WX_MAX_CONCURRENCY = int(os.getenv("WX_MAX_CONCURRENCY", "32"))
+# 失败后的最大重试次数，以及重试等待时间的基数和上限（秒），实际等待时间在 [0, min(上限, 基数*2^重试次数)] 中随机
+WX_MAX_RETRIES = int(os.getenv("WX_MAX_RETRIES", "2"))
+WX_RETRY_BASE_DELAY = float(os.getenv("WX_RETRY_BASE_DELAY", "0.1"))
+WX_RETRY_MAX_DELAY = float(os.getenv("WX_RETRY_MAX_DELAY", "1"))
+# 熔断：连续失败多少次后熔断，熔断多少秒后放行一次试探调用
+WX_BREAKER_FAILURE_THRESHOLD = int(os.getenv("WX_BREAKER_FAILURE_THRESHOLD", "5"))
+WX_BREAKER_RESET_TIMEOUT = float(os.getenv("WX_BREAKER_RESET_TIMEOUT", "30"))
+
+# 微信接口返回的"系统繁忙"错误码，可以重试
+WX_ERRCODE_BUSY = -1
+
+
+class WxApiError(Exception):
+    """
+    微信接口调用失败（网络错误、超时、微信服务端错误、熔断中）
+    """
+
+
+class WxApiUnavailable(WxApiError):
+    """
+    熔断中，微信接口暂时不可用，调用直接失败
+    """
+
+
+class CircuitBreaker:
+    """
+    熔断器：连续失败次数达到阈值后进入熔断状态，熔断期间的调用直接失败，不再请求微信接口；
+    熔断时间过后进入半开状态，只放行一次试探调用，成功则恢复，失败则重新熔断
+    内部使用锁保护，可以在多个线程中同时使用
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = WX_BREAKER_FAILURE_THRESHOLD, reset_timeout: float = WX_BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """
+        是否允许本次调用
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at >= self.reset_timeout:
+                # 放行一次试探调用，结果返回前其他调用仍然直接失败。试探调用被取消（没有记录结果）时，再过reset_timeout秒放行下一次
+                self.state = self.HALF_OPEN
+                self._opened_at = now
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != self.OPEN:
+                    logger.warning(f'微信接口连续失败 {self.failures} 次，熔断 {self.reset_timeout} 秒')
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class _RetryableError(Exception):
+    """
+    可以重试的失败，message为失败原因
+    """
+
+
+class AsyncWxClient:
+    """
+    异步微信接口客户端：
+        1. 所有调用共享一个httpx连接池，复用长连接
+        2. 连接、读取、等待连接池都有超时时间
+        3. 网络错误、超时、5xx、系统繁忙时有限次重试，重试间隔随机（避免大量请求同时重试）
+        4. 连续失败后熔断，熔断期间直接失败，不再请求微信接口
+        5. 同时进行的调用数有上限
+    """
+
+    def __init__(self, base_url: str = WX_API_BASE_URL, app_id: str = WX_APP_ID, app_secret: str = WX_APP_SECRET,
+                 max_retries: int = WX_MAX_RETRIES, max_concurrency: int = WX_MAX_CONCURRENCY,
+                 breaker: Optional[CircuitBreaker] = None,
+                 timeout: Optional[httpx.Timeout] = None, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        初始化客户端，参数默认使用环境变量中的配置
+            transport: 自定义httpx传输层（测试使用），默认使用连接池
+        """
+        self.base_url = base_url
+        self.app_id = app_id
+        self.app_secret = app_secret
+        self.max_retries = max_retries
+        self.max_concurrency = max_concurrency
+        self.breaker = breaker or CircuitBreaker()
+        self.timeout = timeout or httpx.Timeout(WX_READ_TIMEOUT, connect=WX_CONNECT_TIMEOUT, pool=WX_POOL_TIMEOUT)
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # 第一次调用时创建，httpx.AsyncClient需要在事件循环中使用
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=WX_MAX_CONNECTIONS, max_keepalive_connections=WX_MAX_KEEPALIVE),
+                transport=self._transport,
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    async def aclose(self) -> None:
+        """
+        关闭连接池（应用关闭时调用）
+        """
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def code2session(self, code: str) -> Dict[str, Any]:
+        """
+        通过微信小程序登录凭证（code）获取openid、unionid、session_key
+        code只能使用一次，读取响应超时时微信可能已经处理过，因此只在连接失败时重试
+        返回微信接口的响应，code无效等业务错误通过响应中的errcode、errmsg返回
+        """
+        params = {"appid": self.app_id, "secret": self.app_secret, "js_code": code, "grant_type": "authorization_code"}
+        return await self.get("/sns/jscode2session", params, idempotent=False)
+
+    async def get_access_token(self) -> Dict[str, Any]:
+        """
+        获取接口调用凭证（access_token、expires_in）
+        """
+        params = {"grant_type": "client_credential", "appid": self.app_id, "secret": self.app_secret}
+        return await self.get("/cgi-bin/token", params)
+
+    async def get(self, path: str, params: Dict[str, Any], idempotent: bool = True) -> Dict[str, Any]:
+        """
+        发送GET请求并返回解析后的JSON
+            idempotent: 请求是否可以重复执行。为False时，只有请求确定没有发送到服务端（连接失败、等待连接池超时）才重试
+        失败（重试后仍失败、熔断中）时抛出WxApiError
+        """
+        if not self.breaker.allow():
+            raise WxApiUnavailable(f'微信接口熔断中 {path}')
+        client = self.client
+        attempt = 0
+        while True:
+            try:
+                async with self._semaphore:
+                    result = await self._get_once(client, path, params, idempotent)
+                self.breaker.record_success()
+                return result
+            except _RetryableError as e:
+                reason = str(e)
+            except WxApiError:
+                self.breaker.record_failure()
+                raise
+            if attempt >= self.max_retries:
+                self.breaker.record_failure()
+                raise WxApiError(f'微信接口调用失败 {path}：{reason}（已重试 {attempt} 次）')
+            attempt += 1
+            # 随机等待时间（full jitter），避免大量请求在同一时刻重试
+            delay = random.uniform(0, min(WX_RETRY_MAX_DELAY, WX_RETRY_BASE_DELAY * 2 ** attempt))
+            logger.warning(f'微信接口调用失败 {path}：{reason}，{delay * 1000:.0f}ms 后第 {attempt} 次重试')
+            await asyncio.sleep(delay)
+
+    @staticmethod
+    async def _get_once(client: httpx.AsyncClient, path: str, params: Dict[str, Any], idempotent: bool) -> Dict[str, Any]:
+        try:
+            response = await client.get(path, params=params)
+        except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+            # 请求没有发送到服务端，总是可以重试
+            raise _RetryableError(repr(e))
+        except httpx.TransportError as e:
+            if idempotent:
+                raise _RetryableError(repr(e))
+            raise WxApiError(f'微信接口调用失败 {path}：{e!r}')
+        if response.status_code >= 500:
+            if idempotent:
+                raise _RetryableError(f'HTTP {response.status_code}')
+            raise WxApiError(f'微信接口调用失败 {path}：HTTP {response.status_code}')
+        try:
+            result = response.json()
+        except ValueError:
+            raise WxApiError(f'微信接口返回的不是JSON {path}：HTTP {response.status_code}')
+        if result.get("errcode") == WX_ERRCODE_BUSY:
+            # 系统繁忙，微信没有处理本次请求，可以重试
+            raise _RetryableError(f'errcode = {WX_ERRCODE_BUSY}, errmsg = {result.get("errmsg")}')
+        return result
+
+
+# 全局微信接口客户端
+wx_client = AsyncWxClient()